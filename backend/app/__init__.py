@@ -2,15 +2,27 @@
 Backend Application Package
 """
 
+import os
+
 from flask import Flask
 from flask_cors import CORS
 
-def create_app(config_name='development'):
+def create_app(config_name='development', config=None):
     """
     Application factory pattern
+    
+    Args:
+        config_name: Ambiente ('development', 'testing' ou 'production')
+        config: Valores que substituem os padrões abaixo (ex.:
+            {'CACHE_FILTROS_MAX_ENTRADAS': 0, 'SIMULACOES_LOTE_MAX': 50})
     """
     app = Flask(__name__)
     
+    # Substituições explícitas antes dos padrões: os setdefault abaixo só
+    # preenchem o que não foi informado
+    if config:
+        app.config.update(config)
+    
     # Configuração CORS
     CORS(app)
     
@@ -20,8 +32,87 @@ def create_app(config_name='development'):
     else:
         app.config['DEBUG'] = False
     
+    # Linhas lidas por bloco na importação de planilhas
+    app.config.setdefault('UPLOAD_TAMANHO_BLOCO', 50_000)
+    
+    # Importações assíncronas: workers simultâneos e jobs pendentes aceitos
+    from app.services.jobs import MAX_PENDENTES_PADRAO, MAX_WORKERS_PADRAO
+    app.config.setdefault('UPLOAD_MAX_WORKERS', MAX_WORKERS_PADRAO)
+    app.config.setdefault('UPLOAD_MAX_PENDENTES', MAX_PENDENTES_PADRAO)
+    
+    # Processos do upload em lote (None = núcleos da máquina)
+    app.config.setdefault('UPLOAD_LOTE_MAX_PROCESSOS', None)
+    
+    # Limites do cache LRU de resultados de filtros
+    app.config.setdefault('CACHE_FILTROS_MAX_ENTRADAS', 256)
+    app.config.setdefault('CACHE_FILTROS_MAX_BYTES', 64 * 1024 * 1024)
+    
+    # Limites do cache de uploads já convertidos (pelo hash do conteúdo)
+    app.config.setdefault('CACHE_UPLOADS_MAX_ENTRADAS', 4)
+    app.config.setdefault('CACHE_UPLOADS_MAX_BYTES', 512 * 1024 * 1024)
+    
+    # Máximo de simulações por requisição em /simulacoes/batch
+    app.config.setdefault('SIMULACOES_LOTE_MAX', 1000)
+    
+    # Persistência: 'memoria' (padrão), 'sqlite' ou 'mmap' (vários workers)
+    app.config.setdefault('ARMAZENAMENTO', os.getenv('ARMAZENAMENTO', 'memoria'))
+    app.config.setdefault('SQLITE_CAMINHO', os.getenv('SQLITE_CAMINHO', 'uan_dados.sqlite3'))
+    app.config.setdefault('MMAP_DIRETORIO', os.getenv('MMAP_DIRETORIO', 'uan_dados_mmap'))
+    
+    # Métricas das requisições em /metrics (formato Prometheus)
+    app.config.setdefault('METRICAS_HABILITADAS', os.getenv('METRICAS_HABILITADAS', '1') != '0')
+    
+    # Compressão das respostas (Accept-Encoding): gzip e, se instalados, zstd/brotli
+    from app.services.compressao import NIVEIS_PADRAO, PREFERENCIA_PADRAO
+    app.config.setdefault('COMPRESSAO_HABILITADA', os.getenv('COMPRESSAO_HABILITADA', '1') != '0')
+    app.config.setdefault('COMPRESSAO_MINIMO_BYTES', 1024)
+    app.config.setdefault('COMPRESSAO_NIVEIS', dict(NIVEIS_PADRAO))
+    app.config.setdefault('COMPRESSAO_PREFERENCIA', PREFERENCIA_PADRAO)
+    app.config.setdefault('COMPRESSAO_TIPOS', {
+        'application/json', 'application/x-ndjson', 'application/vnd.apache.arrow.stream',
+        'text/plain', 'text/csv', 'text/html'
+    })
+    
+    # Perfil de requisições sob demanda (X-Profile: 1 ou ?profile=1)
+    app.config.setdefault('PERFIL_HABILITADO', os.getenv('PERFIL_HABILITADO', '0') == '1')
+    app.config.setdefault('PERFIL_DIRETORIO', os.getenv('PERFIL_DIRETORIO', 'perfis'))
+    app.config.setdefault('PERFIL_PREFIXO', '/api/data/')
+    
     # Registrar blueprints
     from app.routes import data_routes
     app.register_blueprint(data_routes.bp)
     
+    if app.config['METRICAS_HABILITADAS']:
+        from app.routes import metricas_routes
+        metricas_routes.instrumentar(app)
+    
+    if app.config['COMPRESSAO_HABILITADA']:
+        from app.routes import compressao_routes
+        compressao_routes.instrumentar(app)
+    
+    if app.config['PERFIL_HABILITADO']:
+        from app.routes import perfil_routes
+        perfil_routes.instrumentar(app)
+    
+    if app.config['ARMAZENAMENTO'] == 'sqlite':
+        from app.services.armazenamento import ArmazenamentoSQLite
+        data_routes.data_service.usar_armazenamento(ArmazenamentoSQLite(app.config['SQLITE_CAMINHO']))
+    elif app.config['ARMAZENAMENTO'] == 'mmap':
+        from app.services.armazenamento_mmap import ArmazenamentoMmap
+        data_routes.data_service.usar_armazenamento(ArmazenamentoMmap(app.config['MMAP_DIRETORIO']))
+    
+    data_routes.data_service.cache_filtros.configurar(
+        max_entradas=app.config['CACHE_FILTROS_MAX_ENTRADAS'],
+        max_bytes=app.config['CACHE_FILTROS_MAX_BYTES']
+    )
+    data_routes.data_service.cache_uploads.configurar(
+        max_entradas=app.config['CACHE_UPLOADS_MAX_ENTRADAS'],
+        max_bytes=app.config['CACHE_UPLOADS_MAX_BYTES']
+    )
+    
+    data_routes.gerenciador_jobs.configurar(
+        max_workers=app.config['UPLOAD_MAX_WORKERS'],
+        max_pendentes=app.config['UPLOAD_MAX_PENDENTES']
+    )
+    
     return app
@@ -3,9 +3,13 @@ Modelos de dados da aplicação
 """
 
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Optional
 from datetime import datetime
 
+import numpy as np
+
+from app.services.columnar_store import ColumnarStore, ColunaCategorica
+
 
 @dataclass
 class ProjecaoFinanceira:
@@ -20,6 +24,79 @@ class ProjecaoFinanceira:
     projetado_ajustado: str
 
 
+class ProjecaoBatch:
+    """
+    Conjunto de linhas em arrays paralelos: colunas do store + ids selecionados
+
+    É o que o serviço, as rotas e os serializadores trocam no lugar de listas
+    de dicionários. Nenhuma linha é copiada ao criar ou fatiar o batch; as
+    colunas só são recortadas por `ids` quando lidas. Dicionários só são
+    materializados sob demanda (`to_records`).
+    """
+
+    __slots__ = ('store', 'ids')
+
+    def __init__(self, store: ColumnarStore, ids: Optional[np.ndarray] = None):
+        """
+        Args:
+            store: Store colunar de origem (não é alterado)
+            ids: Linhas selecionadas, em ordem (todas se None)
+        """
+        self.store = store
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.store) if self.ids is None else len(self.ids)
+
+    @property
+    def colunas(self) -> List[str]:
+        """Colunas do batch, na ordem do store"""
+        return self.store.ordem_colunas
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes das colunas se o batch fosse copiado (tabelas de valores compartilhadas)"""
+        if self.ids is None:
+            return self.store.nbytes
+        linhas = len(self.ids)
+        return (sum(arr.itemsize * linhas for arr in self.store.valores.values())
+                + sum(c.codigos.itemsize * linhas for c in self.store.categoricas.values()))
+
+    def valores(self, coluna: str) -> np.ndarray:
+        """Coluna monetária das linhas selecionadas (float64)"""
+        arr = self.store.valores[coluna]
+        return arr if self.ids is None else arr[self.ids]
+
+    def categorica(self, coluna: str) -> ColunaCategorica:
+        """Coluna categórica das linhas selecionadas (mesma tabela de valores)"""
+        categorica = self.store.categoricas[coluna]
+        if self.ids is None:
+            return categorica
+        return ColunaCategorica(categorica.codigos[self.ids], categorica.valores)
+
+    def fatiar(self, inicio: int, fim: Optional[int] = None) -> 'ProjecaoBatch':
+        """
+        Sub-batch das posições [inicio, fim) do batch
+
+        Args:
+            inicio: Primeira posição
+            fim: Posição final exclusiva (até o fim se None)
+
+        Returns:
+            Batch sobre o mesmo store
+        """
+        ids = np.arange(len(self.store)) if self.ids is None else self.ids
+        return ProjecaoBatch(self.store, ids[inicio:fim])
+
+    def para_store(self) -> ColumnarStore:
+        """Store só com as linhas do batch (o próprio store se forem todas)"""
+        return self.store if self.ids is None else self.store.selecionar(self.ids)
+
+    def to_records(self) -> List[Dict]:
+        """Linhas como lista de dicionários (todas as colunas, formato JSON da API)"""
+        return self.store.to_records(self.ids)
+
+
 @dataclass
 class Simulacao:
     """Modelo para simulação de resultados"""
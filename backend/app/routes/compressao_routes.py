@@ -0,0 +1,63 @@
+"""
+Compressão das respostas negociada por Accept-Encoding
+"""
+
+from flask import current_app, request
+
+from app.services import compressao
+
+
+def _comprimivel(resposta) -> bool:
+    """Resposta de sucesso, ainda não codificada e de um tipo que comprime bem"""
+    return (200 <= resposta.status_code < 300 and resposta.status_code != 204
+            and 'Content-Encoding' not in resposta.headers
+            and 'Content-Range' not in resposta.headers
+            and not resposta.direct_passthrough
+            and resposta.mimetype in current_app.config['COMPRESSAO_TIPOS'])
+
+
+def _comprimir_resposta(resposta):
+    # Em toda resposta, comprimida ou não: um cache intermediário não pode
+    # servir a representação de um Accept-Encoding para outro
+    resposta.vary.add('Accept-Encoding')
+    if request.method == 'HEAD' or not _comprimivel(resposta):
+        return resposta
+
+    codificacao = compressao.negociar(request.headers.get('Accept-Encoding'),
+                                      current_app.config['COMPRESSAO_PREFERENCIA'])
+    if codificacao is None:
+        return resposta
+    nivel = current_app.config['COMPRESSAO_NIVEIS'][codificacao]
+
+    if resposta.is_streamed:
+        # Tamanho desconhecido: comprime sempre, pedaço a pedaço
+        resposta.response = compressao.comprimir_fluxo(resposta.response, codificacao, nivel)
+        resposta.headers.pop('Content-Length', None)
+    else:
+        dados = resposta.get_data()
+        if len(dados) < current_app.config['COMPRESSAO_MINIMO_BYTES']:
+            return resposta
+        resposta.set_data(compressao.comprimir(dados, codificacao, nivel))
+
+    resposta.headers['Content-Encoding'] = codificacao
+    etag, fraca = resposta.get_etag()
+    if etag:
+        resposta.set_etag(compressao.etag_comprimida(etag, codificacao), weak=fraca)
+    return resposta
+
+
+def instrumentar(app):
+    """
+    Comprime as respostas da aplicação conforme o Accept-Encoding
+
+    Respostas com corpo de pelo menos COMPRESSAO_MINIMO_BYTES e tipo em
+    COMPRESSAO_TIPOS são comprimidas com a codificação aceita pelo cliente
+    (zstd e brotli só se instalados; gzip sempre). Respostas em streaming
+    (NDJSON, Arrow) são comprimidas pedaço a pedaço. A ETag recebe o sufixo
+    da codificação, pois cada codificação é uma representação diferente.
+    Todas as respostas levam `Vary: Accept-Encoding`.
+
+    Args:
+        app: Aplicação Flask
+    """
+    app.after_request(_comprimir_resposta)
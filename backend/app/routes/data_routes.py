@@ -2,23 +2,95 @@
 Rotas para manipulação de dados
 """
 
-from flask import Blueprint, request, jsonify
-from app.services.data_service import DataService
+import base64
+import binascii
+import hashlib
 import os
+import tempfile
+from functools import wraps
+
+from flask import Blueprint, Response, current_app, request, jsonify
+from app.services.data_service import MODO_SUBSTITUIR, MODO_UPSERT, DataService
+from app.services.ingestao import ABA_PADRAO, TAMANHO_BLOCO_PADRAO, copiar_com_hash, listar_abas
+from app.services.jobs import FilaCheiaError, GerenciadorJobs
+from app.services import compressao, serializacao
 
 bp = Blueprint('data', __name__, url_prefix='/api/data')
 
 # Instância do serviço de dados (singleton para MVP)
 data_service = DataService()
 
+# Importações assíncronas (?async=1 no upload)
+gerenciador_jobs = GerenciadorJobs()
+
+
+def _etag_leitura(snapshot):
+    """
+    ETag de uma leitura: versão do snapshot servido + versão global (simulações)
+    + rota, query string e Accept
+    
+    A versão global é lida antes do corpo, então o corpo nunca é mais antigo
+    que a ETag; a do conjunto de dados é a do snapshot fixado para a requisição.
+    """
+    chave = '|'.join([
+        str(snapshot.versao_dataset),
+        str(data_service.versao),
+        request.path,
+        request.query_string.decode('latin-1'),
+        request.headers.get('Accept', '')
+    ])
+    return hashlib.sha1(chave.encode('utf-8')).hexdigest()
+
+
+def com_etag(view):
+    """
+    Decorador para rotas de leitura: responde 304 quando If-None-Match
+    corresponde à versão atual, sem executar a rota
+    
+    O snapshot fica fixado durante a rota, de modo que a ETag sempre
+    descreve o corpo enviado.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with data_service.fixar_snapshot() as snapshot:
+            etag = _etag_leitura(snapshot)
+            # A resposta pode ter ido comprimida, com a ETag da codificação
+            correspondente = next((t for t in compressao.variantes_etag(etag)
+                                   if request.if_none_match.contains(t)), None)
+            if correspondente is not None:
+                resposta = Response(status=304)
+                resposta.set_etag(correspondente)
+            else:
+                resposta = current_app.make_response(view(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+                resposta.set_etag(etag)
+        
+        resposta.headers['Cache-Control'] = 'no-cache'
+        return resposta
+    
+    return wrapper
+
 
 @bp.route('/upload', methods=['POST'])
 def upload_dados():
     """
     Endpoint para upload de dados
     
-    Espera arquivo multipart/form-data com chave 'arquivo'
+    Espera arquivo multipart/form-data com chave 'arquivo'. A planilha é
+    lida em blocos direto do stream, sem cópia em disco.
+    
+    Com ?async=1 o arquivo é copiado para um temporário, a importação é
+    enfileirada e a resposta 202 traz o id do job para consulta em
+    /api/data/jobs/<id>.
+    
+    Com ?modo=upsert as linhas são mescladas ao conjunto atual pela chave
+    (ANO, MES, CATEGORIA, PRODUTO, TIPO_CLIENTE) em vez de substituí-lo.
     """
+    modo = request.args.get('modo', MODO_SUBSTITUIR)
+    if modo not in (MODO_SUBSTITUIR, MODO_UPSERT):
+        return jsonify({'sucesso': False, 'mensagem': f'Modo de importação não suportado: {modo}'}), 400
+    
     try:
         if 'arquivo' not in request.files:
             return jsonify({'sucesso': False, 'mensagem': 'Nenhum arquivo enviado'}), 400
@@ -28,20 +100,13 @@ def upload_dados():
         if arquivo.filename == '':
             return jsonify({'sucesso': False, 'mensagem': 'Arquivo vazio'}), 400
         
-        # Salvar arquivo temporariamente
-        arquivo_path = f'/tmp/{arquivo.filename}'
-        arquivo.save(arquivo_path)
+        tamanho_bloco = current_app.config.get('UPLOAD_TAMANHO_BLOCO', TAMANHO_BLOCO_PADRAO)
         
-        # Converter para JSON
-        resultado = data_service.converter_excel_para_json(arquivo_path)
+        if request.args.get('async', '').lower() in ('1', 'true', 'sim'):
+            return _enfileirar_upload(arquivo, tamanho_bloco, modo)
         
-        if resultado['sucesso']:
-            # Armazenar dados
-            data_service.armazenar_dados(resultado['dados'])
-            
-            # Remover arquivo temporário
-            if os.path.exists(arquivo_path):
-                os.remove(arquivo_path)
+        # Ler direto do stream da requisição, em blocos
+        resultado = data_service.importar_excel(arquivo.stream, tamanho_bloco=tamanho_bloco, modo=modo)
         
         return jsonify(resultado)
         
@@ -49,31 +114,358 @@ def upload_dados():
         return jsonify({'sucesso': False, 'mensagem': str(e)}), 500
 
 
+def _salvar_temporario(arquivo):
+    """
+    Copia um arquivo enviado para um temporário, calculando o hash na cópia
+    
+    Returns:
+        Tupla (caminho, SHA-256 do conteúdo)
+    """
+    descritor, caminho = tempfile.mkstemp(suffix='.xlsx', prefix='upload_')
+    with os.fdopen(descritor, 'wb') as destino:
+        hash_arquivo = copiar_com_hash(arquivo.stream, destino)
+    return caminho, hash_arquivo
+
+
+def _remover_temporarios(caminhos):
+    """Remove arquivos temporários de upload"""
+    for caminho in caminhos:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+
+def _enfileirar_importacao(tarefa, temporarios):
+    """
+    Enfileira uma importação e responde 202 com o job
+    
+    Os temporários são removidos ao fim do job (ou já, se a fila estiver cheia).
+    """
+    try:
+        job = gerenciador_jobs.enviar(tarefa, ao_finalizar=lambda: _remover_temporarios(temporarios))
+    except FilaCheiaError as e:
+        _remover_temporarios(temporarios)
+        return jsonify({'sucesso': False, 'mensagem': str(e)}), 503
+    
+    return jsonify({
+        'sucesso': True,
+        'mensagem': 'Importação enfileirada',
+        'job': job.to_dict()
+    }), 202
+
+
+def _enfileirar_upload(arquivo, tamanho_bloco, modo):
+    """
+    Copia o upload para um arquivo temporário e enfileira a importação
+    
+    O stream da requisição não sobrevive à resposta, por isso a cópia.
+    """
+    caminho, hash_arquivo = _salvar_temporario(arquivo)
+    return _enfileirar_importacao(
+        lambda progresso: data_service.importar_excel(
+            caminho, tamanho_bloco=tamanho_bloco, progresso=progresso, modo=modo,
+            hash_arquivo=hash_arquivo
+        ),
+        [caminho]
+    )
+
+
+@bp.route('/upload/lote', methods=['POST'])
+def upload_lote():
+    """
+    Endpoint para upload de várias planilhas de uma vez
+    
+    Espera multipart/form-data com um ou mais arquivos na chave 'arquivos'
+    e, opcionalmente, o campo 'abas' com nomes separados por vírgula
+    ('*' = todas as abas de cada arquivo; padrão 'Projeções'). Cada par
+    arquivo/aba é processado em paralelo e o resultado substitui os dados,
+    na ordem dos arquivos e abas enviados. Aceita ?async=1 e ?modo=upsert
+    como /upload.
+    """
+    modo = request.args.get('modo', MODO_SUBSTITUIR)
+    if modo not in (MODO_SUBSTITUIR, MODO_UPSERT):
+        return jsonify({'sucesso': False, 'mensagem': f'Modo de importação não suportado: {modo}'}), 400
+    
+    temporarios = []
+    try:
+        arquivos = [a for a in request.files.getlist('arquivos') if a.filename]
+        if not arquivos:
+            return jsonify({'sucesso': False, 'mensagem': 'Nenhum arquivo enviado'}), 400
+        
+        abas = [a.strip() for a in request.form.get('abas', ABA_PADRAO).split(',') if a.strip()]
+        
+        planilhas = []
+        for arquivo in arquivos:
+            caminho, hash_arquivo = _salvar_temporario(arquivo)
+            temporarios.append(caminho)
+            abas_arquivo = listar_abas(caminho) if abas == ['*'] else abas
+            planilhas.extend({'arquivo': caminho, 'aba': aba, 'nome': arquivo.filename, 'hash': hash_arquivo}
+                             for aba in abas_arquivo)
+        
+        tamanho_bloco = current_app.config.get('UPLOAD_TAMANHO_BLOCO', TAMANHO_BLOCO_PADRAO)
+        max_processos = current_app.config.get('UPLOAD_LOTE_MAX_PROCESSOS')
+        
+        def importar(progresso=None):
+            return data_service.importar_lote(
+                planilhas, tamanho_bloco=tamanho_bloco,
+                max_processos=max_processos, progresso=progresso, modo=modo
+            )
+        
+        if request.args.get('async', '').lower() in ('1', 'true', 'sim'):
+            enfileirados, temporarios = temporarios, []
+            return _enfileirar_importacao(importar, enfileirados)
+        
+        resultado = importar()
+        return jsonify(resultado)
+        
+    except Exception as e:
+        return jsonify({'sucesso': False, 'mensagem': str(e)}), 500
+    finally:
+        _remover_temporarios(temporarios)
+
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def obter_job(job_id):
+    """
+    Endpoint para acompanhar uma importação assíncrona
+    
+    Retorna estado (na_fila, executando, concluido, erro), etapa atual,
+    linhas processadas, tempos e, ao final, os metadados da importação.
+    """
+    job = gerenciador_jobs.obter(job_id)
+    if job is None:
+        return jsonify({'sucesso': False, 'mensagem': 'Job não encontrado'}), 404
+    
+    return jsonify({'sucesso': True, 'job': job.to_dict()})
+
+
+FILTROS_DADOS = ['categoria', 'mes', 'ano', 'produto', 'tipo_cliente']
+
+
+def _ler_filtros_multivalorados(nomes):
+    """
+    Lê filtros da query string aceitando valores separados por vírgula
+    ou o parâmetro repetido
+    """
+    filtros = {}
+    for nome in nomes:
+        valores = [
+            v.strip()
+            for bruto in request.args.getlist(nome)
+            for v in bruto.split(',')
+            if v.strip()
+        ]
+        if valores:
+            filtros[nome] = valores
+    return filtros
+
+
 @bp.route('/dados', methods=['GET'])
+@com_etag
 def obter_dados():
     """
     Endpoint para obter dados
     
-    Query params opcionais: categoria, mes, ano
+    Query params opcionais: categoria, mes, ano, produto, tipo_cliente.
+    Cada filtro aceita vários valores separados por vírgula
+    (ex.: ?categoria=a,b&ano=2025,2026).
+    
+    Paginação opcional: ?limit=N&cursor=<proximo_cursor da página anterior>,
+    em ordem estável de inserção.
+    
+    Formato da resposta: JSON (padrão), NDJSON em streaming
+    (Accept: application/x-ndjson ou ?format=ndjson), Arrow IPC stream
+    (Accept: application/vnd.apache.arrow.stream ou ?format=arrow) ou
+    Parquet (?format=parquet). Nos formatos colunares, ?colunas=A,B
+    restringe as colunas enviadas.
     """
     try:
-        filtros = {
-            'categoria': request.args.get('categoria'),
-            'mes': request.args.get('mes'),
-            'ano': request.args.get('ano')
-        }
+        filtros = _ler_filtros_multivalorados(FILTROS_DADOS)
+        formato = _negociar_formato()
+        
+        if formato in ('arrow', 'parquet'):
+            return _resposta_colunar(formato, filtros)
+        
+        limite, apos = _ler_paginacao()
+        pagina, total, proximo = data_service.paginar_linhas(filtros, limite, apos)
+        proximo_cursor = _codificar_cursor(proximo) if proximo is not None else None
         
-        # Remover filtros None
-        filtros = {k: v for k, v in filtros.items() if v is not None}
+        if formato == 'ndjson':
+            headers = {'X-Total-Registros': str(total)}
+            if proximo_cursor:
+                headers['X-Proximo-Cursor'] = proximo_cursor
+            return Response(
+                serializacao.gerar_ndjson(pagina),
+                mimetype=serializacao.MIME_NDJSON,
+                headers=headers
+            )
         
-        dados = data_service.obter_dados(filtros)
+        if formato != 'json':
+            return jsonify({'sucesso': False, 'mensagem': f'Formato não suportado: {formato}'}), 406
+        
+        dados = pagina.to_records()
         
         return jsonify({
             'sucesso': True,
             'total': len(dados),
+            'total_filtrado': total,
+            'proximo_cursor': proximo_cursor,
             'dados': dados
         })
         
+    except ValueError as e:
+        return jsonify({'sucesso': False, 'mensagem': str(e)}), 400
+    except Exception as e:
+        return jsonify({'sucesso': False, 'mensagem': str(e)}), 500
+
+
+def _negociar_formato():
+    """
+    Escolhe o formato da resposta de /dados: ?format= tem precedência
+    sobre o cabeçalho Accept
+    """
+    formato = request.args.get('format')
+    if formato:
+        return formato.lower()
+    
+    melhor = request.accept_mimetypes.best_match(
+        ['application/json', serializacao.MIME_NDJSON,
+         serializacao.MIME_ARROW_STREAM, serializacao.MIME_PARQUET]
+    )
+    return {
+        serializacao.MIME_NDJSON: 'ndjson',
+        serializacao.MIME_ARROW_STREAM: 'arrow',
+        serializacao.MIME_PARQUET: 'parquet'
+    }.get(melhor, 'json')
+
+
+def _ler_paginacao():
+    """
+    Lê ?limit= e ?cursor= da query string
+    
+    Returns:
+        Tupla (limite ou None, id da última linha já enviada ou None)
+    
+    Raises:
+        ValueError: Se limit ou cursor forem inválidos
+    """
+    limite = request.args.get('limit')
+    if limite is not None:
+        try:
+            limite = int(limite)
+        except ValueError:
+            raise ValueError('Parâmetro limit deve ser um inteiro')
+        if limite <= 0:
+            raise ValueError('Parâmetro limit deve ser positivo')
+    
+    cursor = request.args.get('cursor')
+    return limite, _decodificar_cursor(cursor) if cursor else None
+
+
+def _codificar_cursor(id_linha):
+    """Cursor opaco a partir do id da última linha enviada"""
+    return base64.urlsafe_b64encode(str(id_linha).encode()).decode().rstrip('=')
+
+
+def _decodificar_cursor(cursor):
+    """Inverso de `_codificar_cursor`"""
+    try:
+        preenchido = cursor + '=' * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(preenchido.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Cursor inválido')
+
+
+def _resposta_colunar(formato, filtros):
+    """
+    Serializa o resultado filtrado direto das colunas do store
+    """
+    if formato not in ('arrow', 'parquet'):
+        return jsonify({'sucesso': False, 'mensagem': f'Formato não suportado: {formato}'}), 406
+    
+    if not serializacao.arrow_disponivel():
+        return jsonify({'sucesso': False, 'mensagem': 'pyarrow não está instalado no servidor'}), 406
+    
+    colunas = [c.strip() for c in request.args.get('colunas', '').split(',') if c.strip()] or None
+    tabela = serializacao.tabela_arrow(data_service.selecionar_linhas(filtros), colunas)
+    total = str(tabela.num_rows)
+    
+    if formato == 'parquet':
+        return Response(
+            serializacao.serializar_parquet(tabela),
+            mimetype=serializacao.MIME_PARQUET,
+            headers={'X-Total-Registros': total}
+        )
+    
+    return Response(
+        serializacao.gerar_arrow_stream(tabela),
+        mimetype=serializacao.MIME_ARROW_STREAM,
+        headers={'X-Total-Registros': total}
+    )
+
+
+def _ler_ano(nome):
+    """
+    Lê um ano inteiro opcional da query string
+    
+    Returns:
+        Ano ou None se o parâmetro não foi informado
+    
+    Raises:
+        ValueError: Se o valor não for um inteiro
+    """
+    valor = request.args.get(nome, '').strip()
+    if not valor:
+        return None
+    if not valor.isdigit():
+        raise ValueError(f'{nome} deve ser inteiro')
+    return int(valor)
+
+
+@bp.route('/agregados', methods=['GET'])
+@com_etag
+def obter_agregados():
+    """
+    Endpoint de curvas agregadas (12 meses do ano e do ano anterior)
+    
+    Query params opcionais: cliente, categoria, produto, ano,
+    agrupar (categoria | produto), ano_min (ignora anos anteriores),
+    realizados=1 (realizado mensal de cada ano) e mascarar_zeros=0
+    (mantém os zeros finais do realizado)
+    """
+    try:
+        agregados = data_service.obter_agregados(
+            cliente=request.args.get('cliente'),
+            categoria=request.args.get('categoria'),
+            produto=request.args.get('produto'),
+            ano=_ler_ano('ano'),
+            agrupar=request.args.get('agrupar'),
+            ano_min=_ler_ano('ano_min'),
+            realizados=request.args.get('realizados', '').lower() in ('1', 'true', 'sim'),
+            mascarar_zeros=request.args.get('mascarar_zeros', '1').lower() not in ('0', 'false', 'nao')
+        )
+        
+        return jsonify({'sucesso': True, **agregados})
+        
+    except ValueError as e:
+        return jsonify({'sucesso': False, 'mensagem': str(e)}), 400
+    except Exception as e:
+        return jsonify({'sucesso': False, 'mensagem': str(e)}), 500
+
+
+@bp.route('/agregados/anuais', methods=['GET'])
+@com_etag
+def obter_totais_anuais():
+    """
+    Endpoint de totais anuais por métrica
+    
+    Query param opcional: categoria
+    """
+    try:
+        totais = data_service.obter_totais_anuais(categoria=request.args.get('categoria'))
+        return jsonify({'sucesso': True, 'totais': totais})
+        
     except Exception as e:
         return jsonify({'sucesso': False, 'mensagem': str(e)}), 500
 
@@ -109,17 +501,81 @@ def criar_simulacao():
         return jsonify({'sucesso': False, 'mensagem': str(e)}), 500
 
 
+@bp.route('/simulacoes/batch', methods=['POST'])
+def criar_simulacoes_lote():
+    """
+    Endpoint para criar várias simulações em uma requisição
+    
+    Body JSON:
+    {
+        "usuario_id": "user_1",
+        "simulacoes": [
+            {
+                "nome": "Produto X +5%",
+                "selecao": {"categoria": "Renda Fixa", "produto": "X", "cliente": "Todos", "ano": 2025},
+                "curva_ajustada": [12 valores mensais]
+            },
+            ...
+        ]
+    }
+    
+    Cada curva é gravada como delta sobre a curva analítica da seleção no
+    conjunto de dados atual. Itens com `dados_ajustados` no lugar de
+    `selecao`/`curva_ajustada` são gravados como em /simulacao. Se algum
+    item for inválido, nenhum é gravado (400).
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('simulacoes'), list):
+        return jsonify({'sucesso': False, 'mensagem': 'Body deve ter a lista "simulacoes"'}), 400
+    
+    maximo = current_app.config['SIMULACOES_LOTE_MAX']
+    if len(payload['simulacoes']) > maximo:
+        return jsonify({'sucesso': False,
+                        'mensagem': f'Máximo de {maximo} simulações por requisição'}), 413
+    
+    try:
+        simulacoes = data_service.criar_simulacoes_lote(payload.get('usuario_id'), payload['simulacoes'])
+    except ValueError as e:
+        return jsonify({'sucesso': False, 'mensagem': str(e)}), 400
+    except Exception as e:
+        return jsonify({'sucesso': False, 'mensagem': str(e)}), 500
+    
+    return jsonify({
+        'sucesso': True,
+        'mensagem': f'{len(simulacoes)} simulações criadas com sucesso',
+        'total': len(simulacoes),
+        'simulacoes': simulacoes
+    })
+
+
 @bp.route('/simulacoes/<usuario_id>', methods=['GET'])
+@com_etag
 def obter_simulacoes(usuario_id):
     """
     Endpoint para obter simulações de um usuário
+    
+    Query params:
+    - limit: máximo de simulações (todas se ausente)
+    - offset: simulações a pular
+    - ordem: asc (padrão) ou desc por data de criação
+    - resumo: 1 para omitir dados_ajustados (e as curvas das simulações em lote)
     """
     try:
-        simulacoes = data_service.obter_simulacoes_usuario(usuario_id)
+        limite, deslocamento, decrescente, resumo = _ler_listagem_simulacoes()
+    except ValueError as e:
+        return jsonify({'sucesso': False, 'mensagem': str(e)}), 400
+    
+    try:
+        simulacoes = data_service.obter_simulacoes_usuario(
+            usuario_id, limite=limite, deslocamento=deslocamento,
+            decrescente=decrescente, resumo=resumo
+        )
         
         return jsonify({
             'sucesso': True,
             'total': len(simulacoes),
+            'total_usuario': data_service.contar_simulacoes_usuario(usuario_id),
+            'offset': deslocamento,
             'simulacoes': simulacoes
         })
         
@@ -127,14 +583,61 @@ def obter_simulacoes(usuario_id):
         return jsonify({'sucesso': False, 'mensagem': str(e)}), 500
 
 
+@bp.route('/simulacao/<simulacao_id>', methods=['GET'])
+@com_etag
+def obter_simulacao(simulacao_id):
+    """
+    Endpoint para obter uma simulação pelo id
+    """
+    simulacao = data_service.obter_simulacao(simulacao_id)
+    if simulacao is None:
+        return jsonify({'sucesso': False, 'mensagem': 'Simulação não encontrada'}), 404
+    
+    return jsonify({'sucesso': True, 'simulacao': simulacao})
+
+
+def _ler_listagem_simulacoes():
+    """
+    Lê ?limit=, ?offset=, ?ordem= e ?resumo= da query string
+    
+    Returns:
+        Tupla (limite ou None, deslocamento, decrescente, resumo)
+    
+    Raises:
+        ValueError: Se algum parâmetro for inválido
+    """
+    limite, _ = _ler_paginacao()
+    
+    try:
+        deslocamento = int(request.args.get('offset', 0))
+    except ValueError:
+        raise ValueError('Parâmetro offset deve ser um inteiro')
+    if deslocamento < 0:
+        raise ValueError('Parâmetro offset não pode ser negativo')
+    
+    ordem = request.args.get('ordem', 'asc').lower()
+    if ordem not in ('asc', 'desc'):
+        raise ValueError('Parâmetro ordem deve ser asc ou desc')
+    
+    resumo = request.args.get('resumo', '').lower() in ('1', 'true', 'sim')
+    return limite, deslocamento, ordem == 'desc', resumo
+
+
 @bp.route('/status', methods=['GET'])
 def status_backend():
     """
     Endpoint de status do backend
+    
+    Sem ETag: o corpo traz contadores dos caches, que mudam sem que a
+    versão dos dados mude.
     """
     return jsonify({
         'status': 'online',
         'versao': '1.0.0',
-        'dados_armazenados': len(data_service.dados_armazenados),
-        'simulacoes_totais': len(data_service.simulacoes)
+        'versao_dados': data_service.versao,
+        'dados_armazenados': data_service.total_registros,
+        'metadata': data_service.metadados_dataset(),
+        'simulacoes_totais': data_service.total_simulacoes,
+        'cache_filtros': data_service.cache_filtros.estatisticas(),
+        'cache_uploads': data_service.cache_uploads.estatisticas()
     })
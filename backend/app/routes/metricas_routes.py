@@ -0,0 +1,132 @@
+"""
+Instrumentação das requisições e endpoint /metrics (formato Prometheus)
+"""
+
+import time
+
+from flask import Blueprint, Response, g, request
+
+from app.routes.data_routes import data_service
+from app.services.metricas import CONTENT_TYPE, LIMITES_BYTES, MetricaColetada, RegistroMetricas
+
+bp = Blueprint('metricas', __name__)
+
+# Registro de métricas do processo (singleton, como o data_service)
+registro = RegistroMetricas()
+
+# Rótulo das requisições que não casam com nenhuma rota (404)
+ROTA_DESCONHECIDA = '<desconhecida>'
+
+_latencia = registro.histograma(
+    'uan_http_request_duration_seconds', 'Latência das requisições por rota',
+    ('metodo', 'rota', 'status')
+)
+_tamanho_requisicao = registro.histograma(
+    'uan_http_request_size_bytes', 'Tamanho do corpo das requisições por rota',
+    ('metodo', 'rota'), limites=LIMITES_BYTES
+)
+_tamanho_resposta = registro.histograma(
+    'uan_http_response_size_bytes', 'Tamanho do corpo das respostas por rota (respostas com tamanho conhecido)',
+    ('metodo', 'rota'), limites=LIMITES_BYTES
+)
+_em_andamento = registro.medidor('uan_http_requests_in_flight', 'Requisições em andamento')
+
+
+def _rota() -> str:
+    """Regra da rota (ex.: /api/data/simulacao/<simulacao_id>), com cardinalidade limitada"""
+    return request.url_rule.rule if request.url_rule is not None else ROTA_DESCONHECIDA
+
+
+def _iniciar_requisicao():
+    g.inicio_metricas = time.perf_counter()
+    _em_andamento.incrementar()
+
+
+def _registrar_resposta(resposta):
+    inicio = g.get('inicio_metricas')
+    if inicio is None:
+        return resposta
+    rota = _rota()
+    _latencia.observar(time.perf_counter() - inicio, metodo=request.method, rota=rota,
+                       status=str(resposta.status_code))
+    _tamanho_requisicao.observar(request.content_length or 0, metodo=request.method, rota=rota)
+    if resposta.content_length is not None:
+        _tamanho_resposta.observar(resposta.content_length, metodo=request.method, rota=rota)
+    return resposta
+
+
+def _finalizar_requisicao(_erro=None):
+    if g.pop('inicio_metricas', None) is not None:
+        _em_andamento.decrementar()
+
+
+def _coletar_data_service():
+    """Estado interno do DataService lido no momento da exportação"""
+    snapshot = data_service.snapshot
+    indices = snapshot.indices.indices
+    metricas = [
+        MetricaColetada('uan_dataset_rows', 'gauge', 'Registros do conjunto de dados ativo',
+                        [({}, len(snapshot.store))]),
+        MetricaColetada('uan_dataset_bytes', 'gauge', 'Bytes do store colunar ativo',
+                        [({}, snapshot.store.nbytes)]),
+        MetricaColetada('uan_dataset_version', 'gauge', 'Versão em que o conjunto ativo foi gravado',
+                        [({}, snapshot.versao_dataset)]),
+        MetricaColetada('uan_index_bytes', 'gauge', 'Bytes dos índices invertidos por coluna',
+                        [({'coluna': coluna}, indice.nbytes) for coluna, indice in indices.items()]),
+        MetricaColetada('uan_index_keys', 'gauge', 'Valores distintos dos índices invertidos por coluna',
+                        [({'coluna': coluna}, len(indice.entradas)) for coluna, indice in indices.items()]),
+    ]
+
+    caches = {'filtros': data_service.cache_filtros.estatisticas(),
+              'uploads': data_service.cache_uploads.estatisticas()}
+    for nome, campo, tipo, ajuda in (
+        ('uan_cache_hits_total', 'acertos', 'counter', 'Acertos do cache'),
+        ('uan_cache_misses_total', 'falhas', 'counter', 'Falhas do cache'),
+        ('uan_cache_evictions_total', 'remocoes', 'counter', 'Remoções por limite do cache'),
+        ('uan_cache_entries', 'entradas', 'gauge', 'Entradas no cache'),
+        ('uan_cache_bytes', 'bytes', 'gauge', 'Bytes ocupados no cache'),
+    ):
+        metricas.append(MetricaColetada(nome, tipo, ajuda,
+                                        [({'cache': cache}, e[campo]) for cache, e in caches.items()]))
+    metricas.append(MetricaColetada(
+        'uan_cache_hit_ratio', 'gauge', 'Taxa de acerto do cache desde o início',
+        [({'cache': cache}, e['taxa_acerto']) for cache, e in caches.items() if e['taxa_acerto'] is not None]
+    ))
+
+    ingestao = data_service.estatisticas_ingestao()
+    metricas += [
+        MetricaColetada('uan_ingestion_imports_total', 'counter', 'Importações de planilhas concluídas',
+                        [({}, ingestao['importacoes'])]),
+        MetricaColetada('uan_ingestion_rows_total', 'counter', 'Linhas lidas nas importações concluídas',
+                        [({}, ingestao['linhas'])]),
+        MetricaColetada('uan_ingestion_seconds_total', 'counter', 'Tempo gasto nas importações concluídas',
+                        [({}, ingestao['segundos'])]),
+        MetricaColetada('uan_ingestion_last_rows_per_second', 'gauge', 'Vazão da última importação',
+                        [({}, ingestao['ultima_linhas_por_segundo'])]
+                        if ingestao['ultima_linhas_por_segundo'] is not None else []),
+    ]
+    return metricas
+
+
+registro.coletor(_coletar_data_service)
+
+
+def instrumentar(app):
+    """
+    Mede todas as requisições da aplicação e registra o endpoint /metrics
+
+    Args:
+        app: Aplicação Flask
+    """
+    app.before_request(_iniciar_requisicao)
+    app.after_request(_registrar_resposta)
+    app.teardown_request(_finalizar_requisicao)
+    app.register_blueprint(bp)
+
+
+@bp.route('/metrics', methods=['GET'])
+def exportar_metricas():
+    """
+    Métricas do processo no formato de exposição em texto do Prometheus
+    """
+    return Response(registro.exportar(), content_type=CONTENT_TYPE)
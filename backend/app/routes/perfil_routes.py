@@ -0,0 +1,75 @@
+"""
+Perfil (cProfile) de requisições individuais, sob demanda
+"""
+
+import cProfile
+import os
+import time
+import uuid
+
+from flask import current_app, g, request
+
+# Cabeçalho e parâmetro de query que pedem o perfil da requisição
+CABECALHO_PERFIL = 'X-Profile'
+PARAMETRO_PERFIL = 'profile'
+# Cabeçalho da resposta com o id do perfil gravado
+CABECALHO_ID_PERFIL = 'X-Profile-Id'
+
+_VERDADEIROS = ('1', 'true', 'sim')
+
+
+def _perfil_pedido() -> bool:
+    """A requisição pediu perfil pelo cabeçalho ou pela query string"""
+    return (request.headers.get(CABECALHO_PERFIL, '').lower() in _VERDADEIROS
+            or request.args.get(PARAMETRO_PERFIL, '').lower() in _VERDADEIROS)
+
+
+def _iniciar_perfil():
+    if not request.path.startswith(current_app.config['PERFIL_PREFIXO']) or not _perfil_pedido():
+        return
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError:
+        # Outro profiler já ativo no interpretador: segue sem perfil
+        return
+    g.perfil = perfil
+
+
+def _gravar_perfil(resposta):
+    perfil = g.pop('perfil', None)
+    if perfil is None:
+        return resposta
+    perfil.disable()
+
+    perfil_id = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+    diretorio = current_app.config['PERFIL_DIRETORIO']
+    os.makedirs(diretorio, exist_ok=True)
+    perfil.dump_stats(os.path.join(diretorio, f'{perfil_id}.prof'))
+    resposta.headers[CABECALHO_ID_PERFIL] = perfil_id
+    return resposta
+
+
+def _descartar_perfil(_erro=None):
+    perfil = g.pop('perfil', None)
+    if perfil is not None:
+        perfil.disable()
+
+
+def instrumentar(app):
+    """
+    Registra os hooks de perfil na aplicação
+
+    Só é chamado com PERFIL_HABILITADO; sem ele nenhum hook existe e as
+    requisições não pagam nada. Com ele, requisições sob PERFIL_PREFIXO que
+    enviam `X-Profile: 1` ou `?profile=1` rodam sob o cProfile e o resultado
+    (pstats) é gravado em PERFIL_DIRETORIO/<id>.prof, com o id devolvido no
+    cabeçalho X-Profile-Id. Para ler: `python -m pstats <arquivo>` ou
+    snakeviz/gprof2dot.
+
+    Args:
+        app: Aplicação Flask
+    """
+    app.before_request(_iniciar_perfil)
+    app.after_request(_gravar_perfil)
+    app.teardown_request(_descartar_perfil)
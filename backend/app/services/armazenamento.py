@@ -0,0 +1,514 @@
+"""
+Camada de persistência plugável: memória (padrão) e SQLite em modo WAL
+
+O modo de memória compartilhada (arquivos mapeados) fica em
+`armazenamento_mmap`.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import nullcontext
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from app.services.columnar_store import COLUNAS_VALOR, ColumnarStore
+from app.services.indices import IndicesDados
+
+
+class TravaArquivo:
+    """
+    Exclusão mútua entre threads e processos por flock em um arquivo
+
+    Reentrante na mesma thread: só a entrada mais externa trava o arquivo.
+    Sem fcntl (Windows) vale apenas entre as threads do processo.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._lock = threading.RLock()
+        self._profundidade = 0
+        self._arquivo = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            if self._profundidade == 0 and fcntl is not None:
+                arquivo = open(self.caminho, 'a')
+                try:
+                    fcntl.flock(arquivo, fcntl.LOCK_EX)
+                except BaseException:
+                    arquivo.close()
+                    raise
+                self._arquivo = arquivo
+        except BaseException:
+            self._lock.release()
+            raise
+        self._profundidade += 1
+        return self
+
+    def __exit__(self, *excecao):
+        self._profundidade -= 1
+        if self._profundidade == 0 and self._arquivo is not None:
+            fcntl.flock(self._arquivo, fcntl.LOCK_UN)
+            self._arquivo.close()
+            self._arquivo = None
+        self._lock.release()
+
+
+class Armazenamento:
+    """
+    Interface de persistência usada pelo DataService
+
+    Guarda o conjunto de dados ativo, as simulações e a versão
+    monotônica compartilhada por todos os processos que usam o mesmo
+    armazenamento.
+    """
+
+    def versao(self) -> int:
+        """Versão atual (avança a cada upload ou simulação)"""
+        raise NotImplementedError
+
+    def versao_dataset(self) -> int:
+        """Versão em que o conjunto de dados ativo foi gravado"""
+        raise NotImplementedError
+
+    def incrementar_versao(self) -> int:
+        """Avança a versão e retorna o novo valor"""
+        raise NotImplementedError
+
+    def salvar_dados(self, store: ColumnarStore, indices: Optional[IndicesDados] = None) -> int:
+        """
+        Substitui o conjunto de dados e retorna a nova versão
+
+        `indices` são os índices já construídos para o store, gravados pelas
+        implementações que os compartilham entre processos.
+        """
+        raise NotImplementedError
+
+    def atualizar_dados(self, store: ColumnarStore, linhas: np.ndarray,
+                        indices: Optional[IndicesDados] = None) -> int:
+        """
+        Grava um store em que apenas `linhas` mudaram ou foram anexadas
+
+        As demais linhas mantêm posição e conteúdo. Por padrão regrava o
+        conjunto inteiro; implementações podem gravar só as linhas alteradas.
+
+        Returns:
+            Nova versão
+        """
+        return self.salvar_dados(store, indices)
+
+    def travar_escrita(self):
+        """
+        Contexto de exclusão mútua entre os escritores de todos os processos
+        que compartilham este armazenamento
+
+        Cobre leituras-modificações-escritas como o upsert: dentro dele
+        nenhum outro processo grava o conjunto. Em memória não há outros
+        processos, então o padrão não trava nada.
+        """
+        return nullcontext()
+
+    def carregar_dados(self) -> Optional[ColumnarStore]:
+        """Conjunto de dados persistido (None se não houver)"""
+        raise NotImplementedError
+
+    def carregar_conjunto(self) -> Tuple[Optional[ColumnarStore], Optional[IndicesDados], int]:
+        """
+        Conjunto de dados, índices persistidos (None = construir a partir
+        dos dados) e a versão em que foram gravados
+        """
+        versao_dataset = self.versao_dataset()
+        return self.carregar_dados(), None, versao_dataset
+
+    def salvar_simulacao(self, simulacao: Dict):
+        """Grava uma simulação"""
+        raise NotImplementedError
+
+    def salvar_simulacoes(self, simulacoes: List[Dict]):
+        """Grava várias simulações (implementações podem usar uma transação)"""
+        for simulacao in simulacoes:
+            self.salvar_simulacao(simulacao)
+
+    def salvar_curva_base(self, curva: Dict):
+        """
+        Grava uma curva base compartilhada por simulações em delta
+
+        Curvas base são imutáveis: gravar de novo o mesmo id não muda nada.
+
+        Args:
+            curva: {'id', 'versao_dataset', 'selecao', 'curva'}
+        """
+        raise NotImplementedError
+
+    def obter_curva_base(self, curva_id: str) -> Optional[Dict]:
+        """Curva base pelo id (None se não existir)"""
+        raise NotImplementedError
+
+    def obter_simulacao(self, simulacao_id: str) -> Optional[Dict]:
+        """Simulação pelo id (None se não existir)"""
+        raise NotImplementedError
+
+    def listar_simulacoes(self, usuario_id: Optional[str] = None, limite: Optional[int] = None,
+                          deslocamento: int = 0, decrescente: bool = False,
+                          resumo: bool = False) -> List[Dict]:
+        """
+        Simulações de um usuário (todas se None) ordenadas por data_criacao
+
+        Args:
+            usuario_id: Dono das simulações (todas se None)
+            limite: Máximo de itens (todos se None)
+            deslocamento: Itens a pular
+            decrescente: Mais recentes primeiro
+            resumo: Omite `dados_ajustados` e `delta`
+        """
+        raise NotImplementedError
+
+    def contar_simulacoes(self, usuario_id: Optional[str] = None) -> int:
+        """Total de simulações gravadas (de um usuário, se informado)"""
+        raise NotImplementedError
+
+
+# Campos com a curva da simulação, omitidos nas listagens resumidas
+CAMPOS_PAYLOAD_SIMULACAO = ('dados_ajustados', 'delta')
+
+
+def resumir_simulacao(simulacao: Dict) -> Dict:
+    """Simulação sem o payload (`dados_ajustados` ou `delta`)"""
+    return {chave: valor for chave, valor in simulacao.items() if chave not in CAMPOS_PAYLOAD_SIMULACAO}
+
+
+class ArmazenamentoMemoria(Armazenamento):
+    """
+    Persistência apenas em memória do processo (padrão e usado em testes)
+    """
+
+    def __init__(self):
+        self._versao = 0
+        self._versao_dataset = 0
+        self._store: Optional[ColumnarStore] = None
+        # Registro de simulações: id -> simulação e usuário -> ids
+        self._simulacoes: Dict[str, Dict] = {}
+        self._por_usuario: Dict[str, List[str]] = {}
+        self._curvas_base: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def versao(self) -> int:
+        return self._versao
+
+    def versao_dataset(self) -> int:
+        return self._versao_dataset
+
+    def incrementar_versao(self) -> int:
+        with self._lock:
+            self._versao += 1
+            return self._versao
+
+    def salvar_dados(self, store: ColumnarStore, indices: Optional[IndicesDados] = None) -> int:
+        with self._lock:
+            self._store = store
+            self._versao += 1
+            self._versao_dataset = self._versao
+            return self._versao
+
+    def carregar_dados(self) -> Optional[ColumnarStore]:
+        return self._store
+
+    def salvar_simulacao(self, simulacao: Dict):
+        with self._lock:
+            if simulacao['id'] not in self._simulacoes:
+                self._por_usuario.setdefault(simulacao['usuario_id'], []).append(simulacao['id'])
+            self._simulacoes[simulacao['id']] = simulacao
+
+    def obter_simulacao(self, simulacao_id: str) -> Optional[Dict]:
+        return self._simulacoes.get(simulacao_id)
+
+    def salvar_curva_base(self, curva: Dict):
+        with self._lock:
+            self._curvas_base.setdefault(curva['id'], curva)
+
+    def obter_curva_base(self, curva_id: str) -> Optional[Dict]:
+        return self._curvas_base.get(curva_id)
+
+    def listar_simulacoes(self, usuario_id: Optional[str] = None, limite: Optional[int] = None,
+                          deslocamento: int = 0, decrescente: bool = False,
+                          resumo: bool = False) -> List[Dict]:
+        # Ids ficam em ordem de criação, que é a ordem de data_criacao
+        ids = list(self._simulacoes) if usuario_id is None else self._por_usuario.get(usuario_id, [])
+        if decrescente:
+            fim = len(ids) - deslocamento
+            inicio = 0 if limite is None else max(fim - limite, 0)
+            pagina = ids[inicio:max(fim, 0)][::-1]
+        else:
+            pagina = ids[deslocamento:None if limite is None else deslocamento + limite]
+        simulacoes = [self._simulacoes[i] for i in pagina]
+        return [resumir_simulacao(s) for s in simulacoes] if resumo else simulacoes
+
+    def contar_simulacoes(self, usuario_id: Optional[str] = None) -> int:
+        if usuario_id is None:
+            return len(self._simulacoes)
+        return len(self._por_usuario.get(usuario_id, []))
+
+
+# Colunas do conjunto de dados -> colunas da tabela `projecoes`
+_COLUNAS_TEXTO = ['DATA_COMPLETA', 'MES', 'ANO', 'CATEGORIA', 'PRODUTO', 'TIPO_CLIENTE']
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+INSERT OR IGNORE INTO meta (chave, valor) VALUES ('versao', '0');
+INSERT OR IGNORE INTO meta (chave, valor) VALUES ('versao_dataset', '0');
+INSERT OR IGNORE INTO meta (chave, valor) VALUES ('colunas', '[]');
+
+CREATE TABLE IF NOT EXISTS projecoes (
+    id INTEGER PRIMARY KEY,
+    {', '.join(f'{c.lower()} TEXT' for c in _COLUNAS_TEXTO)},
+    {', '.join(f'{c.lower()} REAL NOT NULL' for c in COLUNAS_VALOR)}
+);
+
+CREATE TABLE IF NOT EXISTS simulacoes (
+    id TEXT PRIMARY KEY,
+    usuario_id TEXT NOT NULL,
+    nome TEXT,
+    data_criacao TEXT NOT NULL,
+    ativo INTEGER NOT NULL DEFAULT 1,
+    dados_ajustados TEXT NOT NULL,
+    curva_base TEXT,
+    selecao TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_simulacoes_usuario
+    ON simulacoes (usuario_id, data_criacao);
+
+CREATE TABLE IF NOT EXISTS curvas_base (
+    id TEXT PRIMARY KEY,
+    versao_dataset INTEGER NOT NULL,
+    selecao TEXT NOT NULL,
+    curva TEXT NOT NULL
+);
+"""
+
+LINHAS_POR_LOTE_SQLITE = 50_000
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """
+    Persistência em arquivo SQLite (WAL), compartilhável entre processos
+
+    Cada thread usa sua própria conexão. Uploads são gravados com
+    `executemany` em uma única transação; leituras usam consultas
+    parametrizadas (o módulo sqlite3 mantém os statements preparados em
+    cache). O conjunto de dados é lido inteiro na carga do snapshot, cujos
+    índices em memória atendem os filtros; simulações são lidas pelo
+    índice de (usuario_id, data_criacao).
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._local = threading.local()
+        # Arquivo ao lado do banco: serializa entre processos o upsert, cuja
+        # leitura (snapshot) acontece antes da transação de gravação
+        self._trava = TravaArquivo(f'{caminho}.trava')
+        with self._conexao() as conexao:
+            conexao.executescript(_ESQUEMA)
+
+    def travar_escrita(self):
+        return self._trava
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Conexão da thread atual (criada sob demanda)"""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=30, cached_statements=256)
+            conexao.row_factory = sqlite3.Row
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            conexao.execute('PRAGMA foreign_keys=ON')
+            self._local.conexao = conexao
+        return conexao
+
+    def fechar(self):
+        """Fecha a conexão da thread atual"""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is not None:
+            conexao.close()
+            self._local.conexao = None
+
+    def _ler_meta(self, chave: str) -> str:
+        linha = self._conexao().execute('SELECT valor FROM meta WHERE chave = ?', (chave,)).fetchone()
+        return linha['valor']
+
+    def versao(self) -> int:
+        return int(self._ler_meta('versao'))
+
+    def versao_dataset(self) -> int:
+        return int(self._ler_meta('versao_dataset'))
+
+    @staticmethod
+    def _incrementar(conexao: sqlite3.Connection) -> int:
+        conexao.execute("UPDATE meta SET valor = CAST(valor AS INTEGER) + 1 WHERE chave = 'versao'")
+        return int(conexao.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()['valor'])
+
+    def incrementar_versao(self) -> int:
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute('BEGIN IMMEDIATE')
+            return self._incrementar(conexao)
+
+    def salvar_dados(self, store: ColumnarStore, indices: Optional[IndicesDados] = None) -> int:
+        conexao = self._conexao()
+        colunas = [c for c in store.ordem_colunas]
+        colunas_texto = [c for c in _COLUNAS_TEXTO if c in store.categoricas]
+        nomes_sql = [c.lower() for c in colunas_texto] + [c.lower() for c in COLUNAS_VALOR]
+        sql = (f'INSERT INTO projecoes (id, {", ".join(nomes_sql)}) '
+               f'VALUES (?, {", ".join("?" for _ in nomes_sql)})')
+
+        with self._trava, conexao:
+            conexao.execute('BEGIN IMMEDIATE')
+            conexao.execute('DELETE FROM projecoes')
+            for lote in self._lotes_linhas(store, colunas_texto):
+                conexao.executemany(sql, lote)
+            versao = self._incrementar(conexao)
+            conexao.execute("UPDATE meta SET valor = ? WHERE chave = 'versao_dataset'", (str(versao),))
+            conexao.execute("UPDATE meta SET valor = ? WHERE chave = 'colunas'", (json.dumps(colunas),))
+        return versao
+
+    def atualizar_dados(self, store: ColumnarStore, linhas: np.ndarray,
+                        indices: Optional[IndicesDados] = None) -> int:
+        conexao = self._conexao()
+        colunas_texto = [c for c in _COLUNAS_TEXTO if c in store.categoricas]
+        nomes_sql = [c.lower() for c in colunas_texto] + [c.lower() for c in COLUNAS_VALOR]
+        sql = (f'INSERT OR REPLACE INTO projecoes (id, {", ".join(nomes_sql)}) '
+               f'VALUES (?, {", ".join("?" for _ in nomes_sql)})')
+
+        with self._trava, conexao:
+            conexao.execute('BEGIN IMMEDIATE')
+            for lote in self._lotes_linhas(store, colunas_texto, linhas):
+                conexao.executemany(sql, lote)
+            versao = self._incrementar(conexao)
+            conexao.execute("UPDATE meta SET valor = ? WHERE chave = 'versao_dataset'", (str(versao),))
+        return versao
+
+    @staticmethod
+    def _lotes_linhas(store: ColumnarStore, colunas_texto: List[str],
+                      linhas: Optional[np.ndarray] = None) -> Iterator[List[tuple]]:
+        """Tuplas de inserção geradas coluna a coluna, em lotes (todas as linhas se None)"""
+        total = len(store) if linhas is None else len(linhas)
+        for inicio in range(0, total, LINHAS_POR_LOTE_SQLITE):
+            ids = np.arange(inicio, min(inicio + LINHAS_POR_LOTE_SQLITE, total))
+            if linhas is not None:
+                ids = np.asarray(linhas[ids], dtype=np.int64)
+            colunas = [ids.tolist()]
+            colunas += [store.categoricas[c].decodificar(ids).tolist() for c in colunas_texto]
+            colunas += [store.valores[c][ids].tolist() if c in store.valores else [0.0] * len(ids)
+                        for c in COLUNAS_VALOR]
+            yield list(zip(*colunas))
+
+    def carregar_dados(self) -> Optional[ColumnarStore]:
+        colunas = json.loads(self._ler_meta('colunas'))
+        if not colunas:
+            return None
+
+        cursor = self._conexao().execute(
+            f'SELECT {", ".join(c.lower() for c in colunas)} FROM projecoes ORDER BY id'
+        )
+        blocos = []
+        while True:
+            linhas = cursor.fetchmany(LINHAS_POR_LOTE_SQLITE)
+            if not linhas:
+                break
+            blocos.append(ColumnarStore.from_frame(pd.DataFrame.from_records(linhas, columns=colunas)))
+        return ColumnarStore.concatenar(blocos) if blocos else None
+
+    def salvar_simulacao(self, simulacao: Dict):
+        self.salvar_simulacoes([simulacao])
+
+    def salvar_simulacoes(self, simulacoes: List[Dict]):
+        conexao = self._conexao()
+        with conexao:
+            conexao.executemany(
+                'INSERT OR REPLACE INTO simulacoes '
+                '(id, usuario_id, nome, data_criacao, ativo, dados_ajustados, curva_base, selecao) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [self._linha_simulacao(simulacao) for simulacao in simulacoes]
+            )
+
+    @staticmethod
+    def _linha_simulacao(simulacao: Dict) -> tuple:
+        """Valores da linha; simulações em delta guardam o delta em `dados_ajustados`"""
+        delta = 'curva_base' in simulacao
+        payload = simulacao['delta'] if delta else simulacao['dados_ajustados']
+        return (simulacao['id'], simulacao['usuario_id'], simulacao['nome'],
+                simulacao['data_criacao'], int(simulacao.get('ativo', True)),
+                json.dumps(payload, ensure_ascii=False, separators=(',', ':') if delta else None),
+                simulacao.get('curva_base'),
+                json.dumps(simulacao['selecao'], ensure_ascii=False) if delta else None)
+
+    @staticmethod
+    def _simulacao_de_linha(linha: sqlite3.Row) -> Dict:
+        simulacao = {
+            'id': linha['id'],
+            'usuario_id': linha['usuario_id'],
+            'nome': linha['nome'],
+            'data_criacao': linha['data_criacao'],
+            'ativo': bool(linha['ativo'])
+        }
+        delta = linha['curva_base'] is not None
+        if delta:
+            simulacao['curva_base'] = linha['curva_base']
+            simulacao['selecao'] = json.loads(linha['selecao'])
+        if 'dados_ajustados' in linha.keys():
+            simulacao['delta' if delta else 'dados_ajustados'] = json.loads(linha['dados_ajustados'])
+        return simulacao
+
+    def obter_simulacao(self, simulacao_id: str) -> Optional[Dict]:
+        linha = self._conexao().execute('SELECT * FROM simulacoes WHERE id = ?', (simulacao_id,)).fetchone()
+        return self._simulacao_de_linha(linha) if linha is not None else None
+
+    def listar_simulacoes(self, usuario_id: Optional[str] = None, limite: Optional[int] = None,
+                          deslocamento: int = 0, decrescente: bool = False,
+                          resumo: bool = False) -> List[Dict]:
+        colunas = ('id, usuario_id, nome, data_criacao, ativo, curva_base, selecao'
+                   + ('' if resumo else ', dados_ajustados'))
+        direcao = 'DESC' if decrescente else 'ASC'
+        sql = f'SELECT {colunas} FROM simulacoes'
+        parametros: list = []
+        if usuario_id is not None:
+            sql += ' WHERE usuario_id = ?'
+            parametros.append(usuario_id)
+        sql += f' ORDER BY data_criacao {direcao}, rowid {direcao} LIMIT ? OFFSET ?'
+        parametros += [-1 if limite is None else limite, deslocamento]
+        linhas = self._conexao().execute(sql, parametros).fetchall()
+        return [self._simulacao_de_linha(linha) for linha in linhas]
+
+    def contar_simulacoes(self, usuario_id: Optional[str] = None) -> int:
+        if usuario_id is None:
+            return self._conexao().execute('SELECT COUNT(*) FROM simulacoes').fetchone()[0]
+        return self._conexao().execute(
+            'SELECT COUNT(*) FROM simulacoes WHERE usuario_id = ?', (usuario_id,)
+        ).fetchone()[0]
+
+    def salvar_curva_base(self, curva: Dict):
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute(
+                'INSERT OR IGNORE INTO curvas_base (id, versao_dataset, selecao, curva) VALUES (?, ?, ?, ?)',
+                (curva['id'], curva['versao_dataset'], json.dumps(curva['selecao'], ensure_ascii=False),
+                 json.dumps(curva['curva']))
+            )
+
+    def obter_curva_base(self, curva_id: str) -> Optional[Dict]:
+        linha = self._conexao().execute('SELECT * FROM curvas_base WHERE id = ?', (curva_id,)).fetchone()
+        if linha is None:
+            return None
+        return {'id': linha['id'], 'versao_dataset': linha['versao_dataset'],
+                'selecao': json.loads(linha['selecao']), 'curva': json.loads(linha['curva'])}
@@ -0,0 +1,232 @@
+"""
+Conjunto de dados em arquivos colunares mapeados em memória
+
+Vários processos (workers do servidor) mapeiam os mesmos arquivos em modo
+somente leitura, de modo que as páginas ficam uma única vez no page cache
+do sistema operacional, independentemente do número de workers.
+"""
+
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.armazenamento import Armazenamento, ArmazenamentoSQLite, TravaArquivo
+from app.services.columnar_store import ColumnarStore, ColunaCategorica
+from app.services.indices import IndiceColuna, IndicesDados
+
+ARQUIVO_MANIFESTO = 'manifesto.json'
+ARQUIVO_META = 'meta.sqlite3'
+ARQUIVO_TRAVA = '.trava'
+_PREFIXO_GRAVANDO = '.gravando-'
+
+# Tentativas de carga quando a versão é trocada durante a leitura
+_TENTATIVAS_CARGA = 3
+
+
+def _mapear(caminho: str) -> np.ndarray:
+    """Array .npy mapeado somente leitura (ndarray comum sobre o mmap)"""
+    return np.asarray(np.load(caminho, mmap_mode='r'))
+
+
+class ArmazenamentoMmap(Armazenamento):
+    """
+    Persistência do conjunto de dados em arquivos .npy mapeados
+
+    Cada upload grava uma pasta `vNNNNNNNN/` com um .npy por coluna
+    (valores float64; códigos + tabela JSON nas categóricas) e os índices
+    invertidos (ids concatenados + limites + chaves). Só então avança a
+    versão global e grava o `manifesto.json` por troca atômica (os.replace). Os workers comparam o
+    inode/mtime do manifesto a cada leitura e, quando mudam, mapeiam a nova
+    pasta. Versão global e simulações ficam em `base`, por padrão
+    um SQLite no mesmo diretório, também compartilhado entre processos.
+    """
+
+    def __init__(self, diretorio: str, base: Optional[Armazenamento] = None):
+        """
+        Args:
+            diretorio: Diretório local dos arquivos (criado se não existir)
+            base: Persistência da versão global e das simulações
+        """
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        self.base = base or ArmazenamentoSQLite(os.path.join(diretorio, ARQUIVO_META))
+        self._caminho_manifesto = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+        # (assinatura do arquivo, conteúdo) do último manifesto lido
+        self._manifesto: Tuple[Optional[tuple], Optional[Dict]] = (None, None)
+        # Exclusão mútua entre escritores deste e de outros processos
+        self._trava = TravaArquivo(os.path.join(diretorio, ARQUIVO_TRAVA))
+
+    # Versão e simulações: delegados à base
+
+    def versao(self) -> int:
+        return self.base.versao()
+
+    def incrementar_versao(self) -> int:
+        return self.base.incrementar_versao()
+
+    def salvar_simulacao(self, simulacao: Dict):
+        self.base.salvar_simulacao(simulacao)
+
+    def salvar_simulacoes(self, simulacoes: List[Dict]):
+        self.base.salvar_simulacoes(simulacoes)
+
+    def obter_simulacao(self, simulacao_id: str) -> Optional[Dict]:
+        return self.base.obter_simulacao(simulacao_id)
+
+    def salvar_curva_base(self, curva: Dict):
+        self.base.salvar_curva_base(curva)
+
+    def obter_curva_base(self, curva_id: str) -> Optional[Dict]:
+        return self.base.obter_curva_base(curva_id)
+
+    def listar_simulacoes(self, usuario_id: Optional[str] = None, limite: Optional[int] = None,
+                          deslocamento: int = 0, decrescente: bool = False,
+                          resumo: bool = False) -> List[Dict]:
+        return self.base.listar_simulacoes(usuario_id, limite=limite, deslocamento=deslocamento,
+                                           decrescente=decrescente, resumo=resumo)
+
+    def contar_simulacoes(self, usuario_id: Optional[str] = None) -> int:
+        return self.base.contar_simulacoes(usuario_id)
+
+    # Conjunto de dados
+
+    def _ler_manifesto(self) -> Optional[Dict]:
+        """Manifesto atual, relido só quando o arquivo muda (stat)"""
+        try:
+            estado = os.stat(self._caminho_manifesto)
+        except FileNotFoundError:
+            return None
+        assinatura = (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+        lida, manifesto = self._manifesto
+        if assinatura != lida:
+            with open(self._caminho_manifesto, encoding='utf-8') as arquivo:
+                manifesto = json.load(arquivo)
+            self._manifesto = (assinatura, manifesto)
+        return manifesto
+
+    def versao_dataset(self) -> int:
+        manifesto = self._ler_manifesto()
+        return manifesto['versao_dataset'] if manifesto else 0
+
+    def travar_escrita(self):
+        return self._trava
+
+    def salvar_dados(self, store: ColumnarStore, indices: Optional[IndicesDados] = None) -> int:
+        indices = indices if indices is not None else IndicesDados.construir(store)
+        with self._trava:
+            # Arquivos gravados antes de a versão avançar: a nova versão só
+            # fica visível junto com a troca do manifesto
+            temporaria = os.path.join(self.diretorio, f'{_PREFIXO_GRAVANDO}{uuid.uuid4().hex}')
+            os.makedirs(temporaria)
+            self._gravar_store(temporaria, store)
+            self._gravar_indices(temporaria, indices)
+
+            versao = self.base.incrementar_versao()
+            pasta = f'v{versao:08d}'
+            os.replace(temporaria, os.path.join(self.diretorio, pasta))
+            anterior = self._ler_manifesto()
+            manifesto = {
+                'versao_dataset': versao,
+                'pasta': pasta,
+                'total': len(store),
+                'ordem_colunas': list(store.ordem_colunas),
+                'valores': list(store.valores),
+                'categoricas': list(store.categoricas),
+                'indices': list(indices.indices),
+            }
+            caminho_temporario = self._caminho_manifesto + '.tmp'
+            with open(caminho_temporario, 'w', encoding='utf-8') as arquivo:
+                json.dump(manifesto, arquivo)
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+            os.replace(caminho_temporario, self._caminho_manifesto)
+
+            self._remover_pastas_antigas({pasta, anterior['pasta'] if anterior else pasta})
+        return versao
+
+    @staticmethod
+    def _gravar_store(pasta: str, store: ColumnarStore):
+        """Um .npy por coluna; tabelas de valores das categóricas em JSON"""
+        for coluna, valores in store.valores.items():
+            np.save(os.path.join(pasta, f'{coluna}.npy'), np.ascontiguousarray(valores))
+        for coluna, categorica in store.categoricas.items():
+            np.save(os.path.join(pasta, f'{coluna}.codigos.npy'), np.ascontiguousarray(categorica.codigos))
+            with open(os.path.join(pasta, f'{coluna}.valores.json'), 'w', encoding='utf-8') as arquivo:
+                json.dump(categorica.valores, arquivo, ensure_ascii=False)
+
+    @staticmethod
+    def _gravar_indices(pasta: str, indices: IndicesDados):
+        """Entradas de cada índice como ids concatenados + limites + chaves"""
+        for filtro, indice in indices.indices.items():
+            chaves = list(indice.entradas)
+            partes = [indice.entradas[c] for c in chaves]
+            tamanhos = np.array([len(p) for p in partes], dtype=np.int64)
+            limites = np.concatenate(([0], np.cumsum(tamanhos)))
+            ids = np.concatenate(partes) if partes else np.empty(0, dtype=np.int32)
+            np.save(os.path.join(pasta, f'indice_{filtro}.ids.npy'), ids)
+            np.save(os.path.join(pasta, f'indice_{filtro}.limites.npy'), limites)
+            with open(os.path.join(pasta, f'indice_{filtro}.chaves.json'), 'w', encoding='utf-8') as arquivo:
+                json.dump(chaves, arquivo, ensure_ascii=False)
+
+    def _remover_pastas_antigas(self, manter: set):
+        """
+        Remove versões antigas, mantendo a atual e a anterior
+
+        Em sistemas POSIX arquivos ainda mapeados por outro processo
+        continuam válidos até serem desmapeados; falhas (ex.: Windows com
+        o arquivo em uso) são ignoradas e a pasta fica para a próxima limpeza.
+        """
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            antiga = nome.startswith('v') and nome not in manter
+            # Pastas temporárias de gravações interrompidas (escritores são serializados)
+            if (antiga or nome.startswith(_PREFIXO_GRAVANDO)) and os.path.isdir(caminho):
+                shutil.rmtree(caminho, ignore_errors=True)
+
+    def carregar_dados(self) -> Optional[ColumnarStore]:
+        return self.carregar_conjunto()[0]
+
+    def carregar_conjunto(self) -> Tuple[Optional[ColumnarStore], Optional[IndicesDados], int]:
+        for tentativa in range(_TENTATIVAS_CARGA):
+            manifesto = self._ler_manifesto()
+            if manifesto is None:
+                return None, None, 0
+            try:
+                pasta = os.path.join(self.diretorio, manifesto['pasta'])
+                return (self._mapear_store(pasta, manifesto), self._mapear_indices(pasta, manifesto),
+                        manifesto['versao_dataset'])
+            except FileNotFoundError:
+                # Pasta removida por uma gravação mais nova entre a leitura do
+                # manifesto e o mapeamento: relê o manifesto
+                if tentativa == _TENTATIVAS_CARGA - 1:
+                    raise
+        return None, None, 0
+
+    @staticmethod
+    def _mapear_store(pasta: str, manifesto: Dict) -> ColumnarStore:
+        """Store cujas colunas são views dos arquivos mapeados"""
+        valores = {coluna: _mapear(os.path.join(pasta, f'{coluna}.npy')) for coluna in manifesto['valores']}
+        categoricas = {}
+        for coluna in manifesto['categoricas']:
+            with open(os.path.join(pasta, f'{coluna}.valores.json'), encoding='utf-8') as arquivo:
+                tabela = json.load(arquivo)
+            categoricas[coluna] = ColunaCategorica(_mapear(os.path.join(pasta, f'{coluna}.codigos.npy')), tabela)
+        return ColumnarStore(valores, categoricas, manifesto['ordem_colunas'])
+
+    @staticmethod
+    def _mapear_indices(pasta: str, manifesto: Dict) -> IndicesDados:
+        """Índices cujas entradas são fatias do array de ids mapeado"""
+        indices = {}
+        for filtro in manifesto['indices']:
+            ids = _mapear(os.path.join(pasta, f'indice_{filtro}.ids.npy'))
+            limites = np.load(os.path.join(pasta, f'indice_{filtro}.limites.npy'))
+            with open(os.path.join(pasta, f'indice_{filtro}.chaves.json'), encoding='utf-8') as arquivo:
+                chaves = json.load(arquivo)
+            indices[filtro] = IndiceColuna({
+                chave: ids[limites[i]:limites[i + 1]] for i, chave in enumerate(chaves)
+            })
+        return IndicesDados(indices)
@@ -0,0 +1,111 @@
+"""
+Cache LRU limitado por número de entradas e por bytes
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def _tamanho_padrao(valor: Any) -> int:
+    """Bytes de um valor (arrays NumPy expõem `nbytes`)"""
+    return int(getattr(valor, 'nbytes', 0))
+
+
+class CacheLRU:
+    """
+    Cache LRU thread-safe com contadores de acertos, falhas e remoções
+    """
+
+    def __init__(self, max_entradas: int = 256, max_bytes: int = 64 * 1024 * 1024,
+                 tamanho: Callable[[Any], int] = _tamanho_padrao):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._tamanho = tamanho
+        self._entradas: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    def configurar(self, max_entradas: Optional[int] = None, max_bytes: Optional[int] = None):
+        """
+        Ajusta os limites, removendo entradas se necessário
+
+        Args:
+            max_entradas: Número máximo de entradas
+            max_bytes: Total máximo de bytes dos valores
+        """
+        with self._lock:
+            if max_entradas is not None:
+                self.max_entradas = max_entradas
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._remover_excedentes()
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """
+        Valor em cache para a chave, marcando-o como usado recentemente
+
+        Args:
+            chave: Chave da entrada
+
+        Returns:
+            Valor armazenado, ou None em caso de falha
+        """
+        with self._lock:
+            valor = self._entradas.get(chave)
+            if valor is None:
+                self.falhas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def inserir(self, chave: Hashable, valor: Any):
+        """
+        Insere um valor; valores maiores que o limite de bytes são ignorados
+
+        Args:
+            chave: Chave da entrada
+            valor: Valor a armazenar (não pode ser None)
+        """
+        tamanho = self._tamanho(valor)
+        with self._lock:
+            if tamanho > self.max_bytes or self.max_entradas <= 0:
+                return
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= self._tamanho(anterior)
+            self._entradas[chave] = valor
+            self._bytes += tamanho
+            self._remover_excedentes()
+
+    def limpar(self):
+        """Descarta todas as entradas (os contadores são mantidos)"""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def _remover_excedentes(self):
+        """Remove as entradas menos usadas até respeitar os limites"""
+        while self._entradas and (len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes):
+            _, valor = self._entradas.popitem(last=False)
+            self._bytes -= self._tamanho(valor)
+            self.remocoes += 1
+
+    def estatisticas(self) -> Dict:
+        """Contadores e ocupação atual do cache"""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'max_entradas': self.max_entradas,
+                'max_bytes': self.max_bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'remocoes': self.remocoes,
+                'taxa_acerto': round(self.acertos / consultas, 4) if consultas else None,
+            }
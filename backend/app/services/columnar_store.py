@@ -0,0 +1,250 @@
+"""
+Armazenamento colunar em memória para dados financeiros
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+COLUNAS_VALOR = [
+    'CURVA_REALIZADO', 'PROJETADO_ANALITICO',
+    'PROJETADO_MERCADO', 'PROJETADO_AJUSTADO'
+]
+
+
+def _dtype_codigos(total_valores: int) -> np.dtype:
+    """Menor tipo inteiro capaz de representar os códigos de uma coluna"""
+    if total_valores <= np.iinfo(np.uint8).max:
+        return np.dtype(np.uint8)
+    if total_valores <= np.iinfo(np.uint16).max:
+        return np.dtype(np.uint16)
+    return np.dtype(np.int32)
+
+
+class ColunaCategorica:
+    """
+    Coluna codificada por dicionário: códigos inteiros + tabela de valores
+    """
+
+    __slots__ = ('codigos', 'valores')
+
+    def __init__(self, codigos: np.ndarray, valores: Sequence[str]):
+        self.codigos = codigos
+        self.valores = list(valores)
+
+    @classmethod
+    def codificar(cls, valores: Sequence) -> 'ColunaCategorica':
+        """
+        Codifica uma sequência de valores em códigos + tabela
+
+        Args:
+            valores: Valores brutos da coluna
+
+        Returns:
+            Coluna categórica codificada
+        """
+        serie = pd.Series(valores, dtype=object).astype(str)
+        codigos, tabela = pd.factorize(serie, sort=False)
+        return cls(codigos.astype(_dtype_codigos(len(tabela))), tabela.tolist())
+
+    @classmethod
+    def concatenar(cls, colunas: Sequence['ColunaCategorica']) -> 'ColunaCategorica':
+        """
+        Concatena colunas unificando suas tabelas de valores
+
+        Args:
+            colunas: Colunas a concatenar, em ordem
+
+        Returns:
+            Nova coluna com tabela unificada
+        """
+        tabela: List[str] = []
+        posicoes: Dict[str, int] = {}
+        partes = []
+        for coluna in colunas:
+            remapeamento = np.empty(len(coluna.valores), dtype=np.int64)
+            for codigo, valor in enumerate(coluna.valores):
+                if valor not in posicoes:
+                    posicoes[valor] = len(tabela)
+                    tabela.append(valor)
+                remapeamento[codigo] = posicoes[valor]
+            partes.append(remapeamento[coluna.codigos] if len(coluna.codigos) else
+                          np.empty(0, dtype=np.int64))
+
+        codigos = np.concatenate(partes) if partes else np.empty(0, dtype=np.int64)
+        return cls(codigos.astype(_dtype_codigos(len(tabela))), tabela)
+
+    def decodificar(self, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Converte códigos de volta para valores
+
+        Args:
+            indices: Linhas a decodificar (todas se None)
+
+        Returns:
+            Array de objetos com os valores originais
+        """
+        tabela = np.asarray(self.valores, dtype=object)
+        codigos = self.codigos if indices is None else self.codigos[indices]
+        return tabela[codigos]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelos códigos e pela tabela de valores"""
+        return int(self.codigos.nbytes) + sum(len(v.encode('utf-8')) for v in self.valores)
+
+    def __len__(self) -> int:
+        return len(self.codigos)
+
+
+class ColumnarStore:
+    """
+    Conjunto de dados em layout colunar
+
+    Colunas monetárias ficam em arrays float64 e as demais colunas
+    (categoria, mês, ano, ...) são codificadas por dicionário. A instância
+    não é alterada depois de criada: operações de escrita produzem um novo
+    store.
+    """
+
+    def __init__(self, valores: Dict[str, np.ndarray], categoricas: Dict[str, ColunaCategorica],
+                 ordem_colunas: Optional[List[str]] = None):
+        self.valores = valores
+        self.categoricas = categoricas
+        self.ordem_colunas = ordem_colunas or list(categoricas) + list(valores)
+
+        tamanhos = {len(c) for c in valores.values()} | {len(c) for c in categoricas.values()}
+        if len(tamanhos) > 1:
+            raise ValueError(f'Colunas com tamanhos diferentes: {sorted(tamanhos)}')
+        self._total = tamanhos.pop() if tamanhos else 0
+
+    @classmethod
+    def vazio(cls) -> 'ColumnarStore':
+        """Store sem registros"""
+        return cls({}, {}, [])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'ColumnarStore':
+        """
+        Cria store a partir de um DataFrame já validado
+
+        Args:
+            df: DataFrame com colunas monetárias numéricas
+
+        Returns:
+            Store colunar
+        """
+        valores = {}
+        categoricas = {}
+        for coluna in df.columns:
+            if coluna in COLUNAS_VALOR:
+                valores[coluna] = df[coluna].to_numpy(dtype=np.float64, copy=True)
+            else:
+                categoricas[coluna] = ColunaCategorica.codificar(df[coluna].to_numpy(dtype=object))
+        return cls(valores, categoricas, list(df.columns))
+
+    @classmethod
+    def from_records(cls, registros: List[Dict]) -> 'ColumnarStore':
+        """
+        Cria store a partir de uma lista de dicionários
+
+        Args:
+            registros: Registros no formato de `DataService.obter_dados`
+
+        Returns:
+            Store colunar
+        """
+        if not registros:
+            return cls.vazio()
+        return cls.from_frame(pd.DataFrame.from_records(registros, columns=list(registros[0])))
+
+    @classmethod
+    def concatenar(cls, stores: Sequence['ColumnarStore']) -> 'ColumnarStore':
+        """
+        Concatena stores com as mesmas colunas, preservando a ordem
+
+        Args:
+            stores: Stores a concatenar
+
+        Returns:
+            Novo store com todas as linhas
+        """
+        stores = [s for s in stores if s.ordem_colunas]
+        if not stores:
+            return cls.vazio()
+
+        ordem = stores[0].ordem_colunas
+        valores = {
+            coluna: np.concatenate([s.valores[coluna] for s in stores])
+            for coluna in stores[0].valores
+        }
+        categoricas = {
+            coluna: ColunaCategorica.concatenar([s.categoricas[coluna] for s in stores])
+            for coluna in stores[0].categoricas
+        }
+        return cls(valores, categoricas, ordem)
+
+    def __len__(self) -> int:
+        return self._total
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelas colunas"""
+        return (sum(int(c.nbytes) for c in self.valores.values())
+                + sum(c.nbytes for c in self.categoricas.values()))
+
+    def selecionar(self, indices: np.ndarray) -> 'ColumnarStore':
+        """
+        Novo store apenas com as linhas indicadas (tabelas de valores mantidas)
+
+        Args:
+            indices: Linhas a manter, na ordem desejada
+
+        Returns:
+            Store com as linhas selecionadas
+        """
+        return ColumnarStore(
+            {coluna: arr[indices] for coluna, arr in self.valores.items()},
+            {coluna: ColunaCategorica(c.codigos[indices], c.valores) for coluna, c in self.categoricas.items()},
+            list(self.ordem_colunas)
+        )
+
+    def valores_unicos(self, coluna: str) -> List[str]:
+        """
+        Valores distintos presentes em uma coluna categórica
+
+        Args:
+            coluna: Nome da coluna
+
+        Returns:
+            Lista de valores, na ordem de primeira ocorrência
+        """
+        if coluna not in self.categoricas:
+            return []
+        return list(self.categoricas[coluna].valores)
+
+    def to_records(self, indices: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Materializa linhas como lista de dicionários (visão de compatibilidade)
+
+        Args:
+            indices: Linhas a materializar, em ordem (todas se None)
+
+        Returns:
+            Lista de dicionários
+        """
+        if not self.ordem_colunas:
+            return []
+
+        colunas = []
+        for coluna in self.ordem_colunas:
+            if coluna in self.valores:
+                arr = self.valores[coluna] if indices is None else self.valores[coluna][indices]
+                colunas.append(arr.tolist())
+            else:
+                colunas.append(self.categoricas[coluna].decodificar(indices).tolist())
+
+        nomes = self.ordem_colunas
+        return [dict(zip(nomes, linha)) for linha in zip(*colunas)]
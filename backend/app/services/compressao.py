@@ -0,0 +1,181 @@
+"""
+Compressão de respostas: gzip (zlib) e, se instalados, zstd e brotli
+"""
+
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional
+    brotli = None
+
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+BROTLI = 'br'
+
+# Ordem de preferência do servidor quando o cliente aceita várias
+PREFERENCIA_PADRAO = (ZSTD, BROTLI, GZIP)
+
+NIVEIS_PADRAO = {GZIP: 6, ZSTD: 3, BROTLI: 4}
+
+
+class CompressorFluxo:
+    """Compressão incremental de uma resposta em streaming"""
+
+    def comprimir(self, pedaco: bytes) -> bytes:
+        """Bytes comprimidos disponíveis após `pedaco` (descarregados para o cliente)"""
+        raise NotImplementedError
+
+    def finalizar(self) -> bytes:
+        """Bytes finais do fluxo"""
+        raise NotImplementedError
+
+
+class _FluxoGzip(CompressorFluxo):
+    def __init__(self, nivel: int):
+        self._objeto = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+
+    def comprimir(self, pedaco: bytes) -> bytes:
+        return self._objeto.compress(pedaco) + self._objeto.flush(zlib.Z_SYNC_FLUSH)
+
+    def finalizar(self) -> bytes:
+        return self._objeto.flush(zlib.Z_FINISH)
+
+
+class _FluxoZstd(CompressorFluxo):
+    def __init__(self, nivel: int):
+        self._objeto = zstandard.ZstdCompressor(level=nivel).compressobj()
+
+    def comprimir(self, pedaco: bytes) -> bytes:
+        return self._objeto.compress(pedaco) + self._objeto.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finalizar(self) -> bytes:
+        return self._objeto.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+class _FluxoBrotli(CompressorFluxo):
+    def __init__(self, nivel: int):
+        self._objeto = brotli.Compressor(quality=nivel)
+
+    def comprimir(self, pedaco: bytes) -> bytes:
+        return self._objeto.process(pedaco) + self._objeto.flush()
+
+    def finalizar(self) -> bytes:
+        return self._objeto.finish()
+
+
+def codificacoes_disponiveis() -> List[str]:
+    """Codificações suportadas neste ambiente, na ordem de preferência padrão"""
+    disponiveis = {GZIP: True, ZSTD: zstandard is not None, BROTLI: brotli is not None}
+    return [codificacao for codificacao in PREFERENCIA_PADRAO if disponiveis[codificacao]]
+
+
+def comprimir(dados: bytes, codificacao: str, nivel: int) -> bytes:
+    """
+    Comprime um corpo inteiro
+
+    Args:
+        dados: Corpo da resposta
+        codificacao: 'gzip', 'zstd' ou 'br'
+        nivel: Nível de compressão do codec
+
+    Returns:
+        Corpo comprimido
+    """
+    if codificacao == GZIP:
+        objeto = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+        return objeto.compress(dados) + objeto.flush()
+    if codificacao == ZSTD:
+        return zstandard.ZstdCompressor(level=nivel).compress(dados)
+    if codificacao == BROTLI:
+        return brotli.compress(dados, quality=nivel)
+    raise ValueError(f'Codificação não suportada: {codificacao}')
+
+
+def compressor_fluxo(codificacao: str, nivel: int) -> CompressorFluxo:
+    """Compressor incremental da codificação"""
+    classes = {GZIP: _FluxoGzip, ZSTD: _FluxoZstd, BROTLI: _FluxoBrotli}
+    if codificacao not in classes:
+        raise ValueError(f'Codificação não suportada: {codificacao}')
+    return classes[codificacao](nivel)
+
+
+def comprimir_fluxo(pedacos: Iterable[bytes], codificacao: str, nivel: int) -> Iterator[bytes]:
+    """
+    Comprime um corpo em streaming, pedaço a pedaço
+
+    Cada pedaço de entrada é descarregado ao ser comprimido, de modo que o
+    cliente recebe os dados à medida que são gerados.
+
+    Yields:
+        Pedaços comprimidos (não vazios)
+    """
+    compressor = compressor_fluxo(codificacao, nivel)
+    for pedaco in pedacos:
+        if isinstance(pedaco, str):
+            pedaco = pedaco.encode('utf-8')
+        saida = compressor.comprimir(pedaco)
+        if saida:
+            yield saida
+    yield compressor.finalizar()
+
+
+def _qualidades(accept_encoding: str) -> Dict[str, float]:
+    """Codificação -> q do cabeçalho Accept-Encoding"""
+    qualidades = {}
+    for parte in accept_encoding.split(','):
+        nome, _, parametros = parte.strip().partition(';')
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        q = 1.0
+        for parametro in parametros.split(';'):
+            chave, _, valor = parametro.strip().partition('=')
+            if chave.strip().lower() == 'q':
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        qualidades[nome] = q
+    return qualidades
+
+
+def negociar(accept_encoding: Optional[str], preferencia: Iterable[str] = PREFERENCIA_PADRAO) -> Optional[str]:
+    """
+    Codificação a usar para um cabeçalho Accept-Encoding
+
+    Entre as codificações aceitas (q > 0, diretamente ou por '*') e
+    disponíveis, escolhe a de maior q; empates seguem `preferencia`.
+
+    Returns:
+        'zstd', 'br', 'gzip' ou None (sem compressão)
+    """
+    if not accept_encoding:
+        return None
+    qualidades = _qualidades(accept_encoding)
+    disponiveis = codificacoes_disponiveis()
+    candidatas = []
+    for ordem, codificacao in enumerate(preferencia):
+        if codificacao not in disponiveis:
+            continue
+        q = qualidades.get(codificacao, qualidades.get('*', 0.0))
+        if q > 0:
+            candidatas.append((-q, ordem, codificacao))
+    return min(candidatas)[2] if candidatas else None
+
+
+def etag_comprimida(etag: str, codificacao: str) -> str:
+    """ETag da representação comprimida (cada codificação é uma representação)"""
+    return f'{etag}-{codificacao}'
+
+
+def variantes_etag(etag: str) -> List[str]:
+    """ETag sem compressão e de cada codificação disponível"""
+    return [etag] + [etag_comprimida(etag, codificacao) for codificacao in codificacoes_disponiveis()]
@@ -3,24 +3,281 @@ Serviço para manipulação de dados financeiros
 """
 
 import pandas as pd
+import numpy as np
 import json
-from typing import List, Dict, Optional
+import multiprocessing
+from typing import BinaryIO, Callable, List, Dict, Optional, Tuple, Union
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pyarrow é opcional
+    pa = None
+
+from app.models import ProjecaoBatch
+from app.services.columnar_store import COLUNAS_VALOR, ColumnarStore
+from app.services.indices import COLUNAS_INDEXADAS, IndicesDados, normalizar_valor
+from app.services.armazenamento import Armazenamento, ArmazenamentoMemoria, resumir_simulacao
+from app.services.cache import CacheLRU
+from app.services.delta_simulacao import (CAMPOS_SELECAO, aplicar_delta, codificar_delta,
+                                          id_curva_base, normalizar_selecao, validar_curva)
+from app.services.rollups import Rollups
+from app.services.snapshot import SnapshotDados
+from app.services.upsert import mesclar
+from app.services.ingestao import ABA_PADRAO, TAMANHO_BLOCO_PADRAO, hash_conteudo, ler_planilha_em_blocos
+
+
+CAMPOS_TEXTO = ['DATA_COMPLETA', 'MES', 'ANO', 'CATEGORIA']
+CAMPOS_OBRIGATORIOS = CAMPOS_TEXTO + COLUNAS_VALOR
+CAMPOS_OPCIONAIS = ['PRODUTO', 'TIPO_CLIENTE']
+LIMITE_REJEITADOS_REPORTADOS = 1000
+
+# Modos de importação: substitui o conjunto de dados ou mescla pela chave
+MODO_SUBSTITUIR = 'substituir'
+MODO_UPSERT = 'upsert'
+
+# Etapas reportadas pelo callback de progresso da importação
+ETAPA_LENDO = 'lendo'
+ETAPA_ARMAZENANDO = 'armazenando'
+
+# Curvas base em memória (imutáveis, lidas do armazenamento sob demanda)
+CACHE_CURVAS_BASE_MAX_ENTRADAS = 4096
+
+# 'R$ 1.234,56' -> '1234.56'
+_TABELA_MONETARIA = str.maketrans({'R': None, '$': None, ' ': None, '\xa0': None, '.': None, ',': '.'})
+_TIPOS_NUMERICOS = {'integer', 'floating', 'mixed-integer-float', 'decimal', 'boolean', 'empty'}
+
+
+def _tamanho_importacao(entrada: Dict) -> int:
+    """Bytes de uma importação em cache (store e, se houver, índices e agregados)"""
+    return sum(int(getattr(entrada.get(parte), 'nbytes', 0)) for parte in ('store', 'indices', 'rollups'))
+
+
+def _processar_planilha(arquivo: str, aba: str, tamanho_bloco: int) -> Tuple[ColumnarStore, Dict]:
+    """
+    Lê uma aba no worker do pool de importação em lote
+    
+    Função de módulo para poder ser enviada a outro processo.
+    
+    Returns:
+        Tupla (store, leitura com linhas, rejeitados e duração)
+    """
+    inicio = time.perf_counter()
+    store, leitura = DataService._ler_planilha_colunar(arquivo, aba, tamanho_bloco)
+    duracao = time.perf_counter() - inicio
+    return store, {
+        **leitura,
+        'total_registros': len(store),
+        'duracao_segundos': round(duracao, 3),
+        'linhas_por_segundo': round(leitura['linhas_lidas'] / duracao, 1) if duracao > 0 else None
+    }
+
 
 class DataService:
     """
     Serviço responsável por importação, processamento e armazenamento de dados
     """
     
-    def __init__(self):
-        """Inicializa o serviço de dados"""
-        # Armazenamento em memória (mock backend)
-        self.dados_armazenados = []
-        self.simulacoes = []
-        self.usuarios = []
+    def __init__(self, cache_max_entradas: int = 256, cache_max_bytes: int = 64 * 1024 * 1024,
+                 armazenamento: Optional[Armazenamento] = None,
+                 cache_uploads_max_entradas: int = 4, cache_uploads_max_bytes: int = 512 * 1024 * 1024):
+        """
+        Inicializa o serviço de dados
+        
+        Args:
+            cache_max_entradas: Limite de entradas do cache de filtros
+            cache_max_bytes: Limite de bytes do cache de filtros
+            armazenamento: Persistência (memória do processo se None)
+            cache_uploads_max_entradas: Limite de planilhas no cache de uploads
+            cache_uploads_max_bytes: Limite de bytes do cache de uploads
+        """
+        # Ids de linha por combinação de filtros, válidos para a versão atual
+        self.cache_filtros = CacheLRU(cache_max_entradas, cache_max_bytes)
+        # (hash do conteúdo, aba) -> store já validado, com índices e agregados
+        self.cache_uploads = CacheLRU(cache_uploads_max_entradas, cache_uploads_max_bytes,
+                                      tamanho=_tamanho_importacao)
+        # id -> curva base das simulações em delta
+        self.cache_curvas_base = CacheLRU(CACHE_CURVAS_BASE_MAX_ENTRADAS, 64 * 1024 * 1024,
+                                          tamanho=lambda curva: 1024)
+        # Escritores (uploads, upserts, recargas) são serializados; leitores
+        # só leem a referência de `_snapshot`, sem lock
+        self._lock_escrita = threading.RLock()
+        self._snapshot = SnapshotDados.vazio()
+        # Snapshot fixado pela leitura em andamento em cada thread
+        self._fixado = threading.local()
+        # Totais das importações de planilhas concluídas (métricas)
+        self._lock_ingestao = threading.Lock()
+        self._ingestao = {'importacoes': 0, 'linhas': 0, 'segundos': 0.0, 'ultima_linhas_por_segundo': None}
+        self.usar_armazenamento(armazenamento or ArmazenamentoMemoria())
+
+    def usar_armazenamento(self, armazenamento: Armazenamento):
+        """
+        Troca a camada de persistência e carrega o conjunto de dados gravado
+        
+        Args:
+            armazenamento: Nova camada de persistência
+        """
+        with self._lock_escrita:
+            self.armazenamento = armazenamento
+            self.cache_filtros.limpar()
+            store, indices, versao_dataset = armazenamento.carregar_conjunto()
+            self._ativar_dataset(store or ColumnarStore.vazio(), versao_dataset, indices=indices)
+
+    def _ativar_dataset(self, store: ColumnarStore, versao_dataset: int,
+                        indices: Optional[IndicesDados] = None, rollups: Optional[Rollups] = None):
+        """
+        Publica store, índices e agregados de uma versão do conjunto de dados
+        
+        O snapshot é montado por completo antes da troca da referência.
+        Índices e agregados são construídos a partir do store quando não
+        informados (o upsert os passa já atualizados de forma incremental).
+        """
+        self._snapshot = SnapshotDados(store, versao_dataset, indices=indices, rollups=rollups)
+
+    def _sincronizar(self):
+        """
+        Recarrega o conjunto de dados se outro processo gravou uma versão
+        mais nova no armazenamento compartilhado
         
+        Se outro thread já estiver escrevendo, o leitor segue com o snapshot
+        atual em vez de esperar.
+        """
+        if self.armazenamento.versao_dataset() == self._snapshot.versao_dataset:
+            return
+        if not self._lock_escrita.acquire(blocking=False):
+            return
+        try:
+            if self.armazenamento.versao_dataset() != self._snapshot.versao_dataset:
+                store, indices, versao_dataset = self.armazenamento.carregar_conjunto()
+                self._ativar_dataset(store or ColumnarStore.vazio(), versao_dataset, indices=indices)
+        finally:
+            self._lock_escrita.release()
+
+    @property
+    def snapshot(self) -> SnapshotDados:
+        """
+        Snapshot atual do conjunto de dados (o fixado, dentro de `fixar_snapshot`)
+        
+        Leitores devem obtê-lo uma vez e usar apenas ele durante a requisição.
+        """
+        fixado = getattr(self._fixado, 'snapshot', None)
+        if fixado is not None:
+            return fixado
+        self._sincronizar()
+        return self._snapshot
+    
+    @contextmanager
+    def fixar_snapshot(self):
+        """
+        Fixa o snapshot atual para as leituras deste thread até o fim do bloco
+        
+        Usado pelas rotas com ETag: a ETag e o corpo da resposta saem do mesmo
+        snapshot, mesmo que outro thread ou processo publique uma versão nova
+        durante a requisição.
+        
+        Yields:
+            Snapshot fixado
+        """
+        anterior = getattr(self._fixado, 'snapshot', None)
+        snapshot = self.snapshot
+        self._fixado.snapshot = snapshot
+        try:
+            yield snapshot
+        finally:
+            self._fixado.snapshot = anterior
+
+    @property
+    def store(self) -> ColumnarStore:
+        """Store do snapshot atual"""
+        return self._snapshot.store
+
+    @property
+    def indices(self) -> IndicesDados:
+        """Índices do snapshot atual"""
+        return self._snapshot.indices
+
+    @property
+    def rollups(self) -> Rollups:
+        """Agregados do snapshot atual"""
+        return self._snapshot.rollups
+
+    def _registrar_ingestao(self, linhas: int, duracao: float):
+        """Soma uma importação concluída aos totais de ingestão"""
+        with self._lock_ingestao:
+            self._ingestao['importacoes'] += 1
+            self._ingestao['linhas'] += linhas
+            self._ingestao['segundos'] += duracao
+            self._ingestao['ultima_linhas_por_segundo'] = linhas / duracao if duracao > 0 else None
+
+    def estatisticas_ingestao(self) -> Dict:
+        """Importações concluídas, linhas lidas, tempo total e vazão da última"""
+        with self._lock_ingestao:
+            return dict(self._ingestao)
+
+    @property
+    def versao(self) -> int:
+        """Versão monotônica do conjunto de dados (uploads e simulações)"""
+        return self.armazenamento.versao()
+
+    @property
+    def simulacoes(self) -> List[Dict]:
+        """Todas as simulações gravadas"""
+        return self.armazenamento.listar_simulacoes()
+
+    @property
+    def dados_armazenados(self) -> List[Dict]:
+        """Visão de compatibilidade do store colunar como lista de dicionários"""
+        return self.snapshot.store.to_records()
+
+    @dados_armazenados.setter
+    def dados_armazenados(self, dados: List[Dict]):
+        self.armazenar_dados(dados)
+
+    def _incrementar_versao(self) -> int:
+        """
+        Avança a versão dos dados após uma escrita
+        
+        O cache de filtros é chaveado pela versão do conjunto de dados, que
+        não muda aqui, então continua válido.
+        """
+        return self.armazenamento.incrementar_versao()
+
+    @property
+    def total_registros(self) -> int:
+        """Quantidade de registros armazenados, sem materializar linhas"""
+        return len(self.snapshot.store)
+
+    def metadados_dataset(self) -> Dict:
+        """
+        Metadados do conjunto atual, lidos do cubo da versão (sem percorrer linhas)
+        
+        Returns:
+            Dicionário com total de registros, versão, categorias, anos e período
+        """
+        snapshot = self.snapshot
+        return {
+            'total_registros': len(snapshot.store),
+            'versao_dataset': snapshot.versao_dataset,
+            **snapshot.rollups.metadados
+        }
+
+    @property
+    def total_simulacoes(self) -> int:
+        """Quantidade de simulações gravadas"""
+        return self.armazenamento.contar_simulacoes()
+
     def converter_excel_para_json(self, arquivo_path: str) -> Dict:
         """
         Converte arquivo Excel para estrutura JSON
@@ -35,11 +292,11 @@ class DataService:
             # Ler arquivo Excel
             df = pd.read_excel(arquivo_path, sheet_name='Projeções')
             
-            # Converter para lista de dicionários
-            dados_json = df.to_dict(orient='records')
-            
-            # Processar e validar dados
-            dados_processados = self._validar_e_processar_dados(dados_json)
+            # Processar e validar dados coluna a coluna
+            df_processado, rejeitados = self._validar_e_processar_frame(df)
+            dados_processados = df_processado.to_dict(orient='records')
+            # Categorias e período saem do cubo, montado em uma passada vetorizada
+            metadados = Rollups.construir(ColumnarStore.from_frame(df_processado)).metadados
             
             return {
                 'sucesso': True,
@@ -48,8 +305,9 @@ class DataService:
                 'metadata': {
                     'total_registros': len(dados_processados),
                     'data_importacao': datetime.now().isoformat(),
-                    'categorias': list(set([d['CATEGORIA'] for d in dados_processados])),
-                    'periodo': self._extrair_periodo(dados_processados)
+                    'categorias': metadados['categorias'],
+                    'periodo': metadados['periodo'],
+                    **self._resumo_rejeitados(rejeitados)
                 }
             }
             
@@ -60,6 +318,305 @@ class DataService:
                 'dados': []
             }
     
+    def importar_excel(self, arquivo: Union[str, BinaryIO], aba: str = ABA_PADRAO,
+                       tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+                       progresso: Optional[Callable[[str, int], None]] = None,
+                       modo: str = MODO_SUBSTITUIR, hash_arquivo: Optional[str] = None) -> Dict:
+        """
+        Importa planilha Excel em blocos e armazena o resultado
+        
+        Cada bloco é validado, convertido para o layout colunar e descartado
+        antes da leitura do próximo, de modo que o pico de memória não cresce
+        com o tamanho da planilha.
+        
+        O resultado fica no cache de uploads pelo SHA-256 do conteúdo: reenviar
+        o mesmo arquivo reativa o store, os índices e os agregados já prontos
+        (com nova versão), sem ler a planilha de novo.
+        
+        Args:
+            arquivo: Caminho ou arquivo binário (ex.: stream do upload)
+            aba: Nome da aba com os dados
+            tamanho_bloco: Linhas lidas por bloco
+            progresso: Callback (etapa, linhas lidas) chamado a cada bloco
+                e antes de armazenar ('lendo' e 'armazenando')
+            modo: 'substituir' (padrão) ou 'upsert' para mesclar pela chave
+            hash_arquivo: SHA-256 do conteúdo, se já calculado (ex.: na cópia
+                do upload); calculado aqui se None
+            
+        Returns:
+            Dicionário com resultado e metadados da importação (sem as linhas)
+        """
+        progresso = progresso or (lambda etapa, linhas: None)
+        inicio = time.perf_counter()
+        try:
+            hash_arquivo = hash_arquivo or hash_conteudo(arquivo)
+            chave = (hash_arquivo, aba)
+            entrada = self.cache_uploads.obter(chave)
+            reaproveitado = entrada is not None
+            if not reaproveitado:
+                store, leitura = self._ler_planilha_colunar(arquivo, aba, tamanho_bloco, progresso)
+                entrada = {'store': store, 'leitura': leitura}
+            
+            progresso(ETAPA_ARMAZENANDO, entrada['leitura']['linhas_lidas'])
+            with self._lock_escrita:
+                gravacao = self._gravar(entrada['store'], modo, entrada.get('indices'), entrada.get('rollups'))
+                snapshot = self._snapshot
+            if modo == MODO_SUBSTITUIR and 'indices' not in entrada:
+                entrada = {**entrada, 'indices': snapshot.indices, 'rollups': snapshot.rollups}
+                self.cache_uploads.inserir(chave, entrada)
+            elif not reaproveitado:
+                self.cache_uploads.inserir(chave, entrada)
+            leitura = entrada['leitura']
+            store = snapshot.store
+            metadados = snapshot.rollups.metadados
+            
+        except Exception as e:
+            return {
+                'sucesso': False,
+                'mensagem': f'Erro ao processar arquivo: {str(e)}'
+            }
+        
+        duracao = time.perf_counter() - inicio
+        linhas_lidas = leitura['linhas_lidas']
+        self._registrar_ingestao(linhas_lidas, duracao)
+        return {
+            'sucesso': True,
+            'mensagem': f'Dados importados com sucesso. Total: {len(store)} registros',
+            'metadata': {
+                'total_registros': len(store),
+                'linhas_lidas': linhas_lidas,
+                'data_importacao': datetime.now().isoformat(),
+                'categorias': metadados['categorias'],
+                'periodo': metadados['periodo'],
+                'duracao_segundos': round(duracao, 3),
+                'linhas_por_segundo': round(linhas_lidas / duracao, 1) if duracao > 0 else None,
+                'memoria_pico_processo_mb': self._memoria_pico_processo_mb(),
+                'total_rejeitados': leitura['total_rejeitados'],
+                'linhas_rejeitadas': leitura['linhas_rejeitadas'],
+                'hash_conteudo': hash_arquivo,
+                'reaproveitado': reaproveitado,
+                'versao_dataset': snapshot.versao_dataset,
+                **gravacao
+            }
+        }
+    
+    def importar_lote(self, planilhas: List[Dict], tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+                      max_processos: Optional[int] = None,
+                      progresso: Optional[Callable[[str, int], None]] = None,
+                      modo: str = MODO_SUBSTITUIR) -> Dict:
+        """
+        Importa várias planilhas/abas em paralelo e armazena a união
+        
+        Cada item é lido e validado em um processo do pool; os stores
+        colunares voltam ao processo principal e são concatenados na ordem
+        recebida, independentemente da ordem de conclusão. Se algum item
+        falhar, nada é armazenado.
+        
+        Args:
+            planilhas: Itens {'arquivo': caminho, 'aba': nome, 'nome': rótulo opcional,
+                'hash': SHA-256 opcional do arquivo, chave do cache de uploads}
+            tamanho_bloco: Linhas lidas por bloco em cada item
+            max_processos: Processos simultâneos (núcleos da máquina se None)
+            progresso: Callback (etapa, linhas lidas) chamado a cada item concluído
+            modo: 'substituir' (padrão) ou 'upsert' para mesclar pela chave
+            
+        Returns:
+            Dicionário com resultado, metadados totais e tempos por item
+        """
+        progresso = progresso or (lambda etapa, linhas: None)
+        inicio = time.perf_counter()
+        try:
+            if not planilhas:
+                raise ValueError('Nenhuma planilha informada')
+            
+            progresso(ETAPA_LENDO, 0)
+            resultados: List[Optional[Tuple[ColumnarStore, Dict]]] = [None] * len(planilhas)
+            linhas_lidas = 0
+            
+            # Itens já lidos antes (mesmo conteúdo e aba) vêm do cache de uploads
+            pendentes = []
+            for posicao, item in enumerate(planilhas):
+                entrada = self.cache_uploads.obter((item['hash'], item['aba'])) if item.get('hash') else None
+                if entrada is None:
+                    pendentes.append(posicao)
+                    continue
+                resultados[posicao] = (entrada['store'], {
+                    **entrada['leitura'], 'total_registros': len(entrada['store']),
+                    'duracao_segundos': 0.0, 'linhas_por_segundo': None, 'reaproveitado': True
+                })
+                linhas_lidas += entrada['leitura']['linhas_lidas']
+            
+            processos = max(1, min(len(pendentes), max_processos or os.cpu_count() or 1))
+            if processos == 1:
+                for posicao in pendentes:
+                    item = planilhas[posicao]
+                    resultados[posicao] = _processar_planilha(item['arquivo'], item['aba'], tamanho_bloco)
+                    linhas_lidas += resultados[posicao][1]['linhas_lidas']
+                    progresso(ETAPA_LENDO, linhas_lidas)
+            else:
+                contexto = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as pool:
+                    futuros = {
+                        pool.submit(_processar_planilha, planilhas[posicao]['arquivo'],
+                                    planilhas[posicao]['aba'], tamanho_bloco): posicao
+                        for posicao in pendentes
+                    }
+                    for futuro in as_completed(futuros):
+                        posicao = futuros[futuro]
+                        try:
+                            resultados[posicao] = futuro.result()
+                        except Exception as e:
+                            item = planilhas[posicao]
+                            raise ValueError(f"{item.get('nome') or item['arquivo']} "
+                                             f"(aba {item['aba']}): {e}") from e
+                        linhas_lidas += resultados[posicao][1]['linhas_lidas']
+                        progresso(ETAPA_LENDO, linhas_lidas)
+            
+            for posicao in pendentes:
+                item = planilhas[posicao]
+                if item.get('hash'):
+                    store_item, leitura = resultados[posicao]
+                    self.cache_uploads.inserir((item['hash'], item['aba']), {
+                        'store': store_item,
+                        'leitura': {chave: leitura[chave] for chave in
+                                    ('linhas_lidas', 'total_rejeitados', 'linhas_rejeitadas')}
+                    })
+            
+            progresso(ETAPA_ARMAZENANDO, linhas_lidas)
+            inicio_merge = time.perf_counter()
+            store = ColumnarStore.concatenar([store_item for store_item, _ in resultados])
+            duracao_merge = time.perf_counter() - inicio_merge
+            with self._lock_escrita:
+                gravacao = self._gravar(store, modo)
+                store = self._snapshot.store
+                metadados = self._snapshot.rollups.metadados
+            
+        except Exception as e:
+            return {
+                'sucesso': False,
+                'mensagem': f'Erro ao processar lote: {str(e)}'
+            }
+        
+        duracao = time.perf_counter() - inicio
+        self._registrar_ingestao(linhas_lidas, duracao)
+        itens = [
+            {'nome': item.get('nome') or os.path.basename(item['arquivo']), 'aba': item['aba'],
+             'reaproveitado': False, **leitura}
+            for item, (_, leitura) in zip(planilhas, resultados)
+        ]
+        return {
+            'sucesso': True,
+            'mensagem': f'Lote importado com sucesso. Total: {len(store)} registros',
+            'metadata': {
+                'total_registros': len(store),
+                'linhas_lidas': linhas_lidas,
+                'data_importacao': datetime.now().isoformat(),
+                'categorias': metadados['categorias'],
+                'periodo': metadados['periodo'],
+                'processos': processos,
+                'duracao_segundos': round(duracao, 3),
+                'duracao_merge_segundos': round(duracao_merge, 3),
+                'linhas_por_segundo': round(linhas_lidas / duracao, 1) if duracao > 0 else None,
+                'total_rejeitados': sum(i['total_rejeitados'] for i in itens),
+                'planilhas': itens,
+                **gravacao
+            }
+        }
+    
+    def _gravar(self, store: ColumnarStore, modo: str, indices: Optional[IndicesDados] = None,
+                rollups: Optional[Rollups] = None) -> Dict:
+        """
+        Substitui ou mescla o store importado conforme o modo
+        
+        Índices e agregados já construídos para o store (cache de uploads)
+        são reaproveitados na substituição.
+        
+        Returns:
+            Metadados da gravação (modo e, no upsert, as contagens)
+        
+        Raises:
+            ValueError: Se o modo for desconhecido
+        """
+        if modo == MODO_SUBSTITUIR:
+            self.armazenar_dados(store, indices=indices, rollups=rollups)
+            return {'modo': modo}
+        if modo == MODO_UPSERT:
+            resultado = self.upsert_dados(store)
+            return {
+                'modo': modo,
+                'upsert': {chave: resultado[chave] for chave in
+                           ('inseridos', 'atualizados', 'inalterados', 'duplicados', 'versao_alterada')}
+            }
+        raise ValueError(f'Modo de importação não suportado: {modo}')
+    
+    @classmethod
+    def _ler_planilha_colunar(cls, arquivo: Union[str, BinaryIO], aba: str, tamanho_bloco: int,
+                              progresso: Optional[Callable[[str, int], None]] = None
+                              ) -> Tuple[ColumnarStore, Dict]:
+        """
+        Lê, valida e converte uma aba para o layout colunar, bloco a bloco
+        
+        Args:
+            arquivo: Caminho ou arquivo binário
+            aba: Nome da aba com os dados
+            tamanho_bloco: Linhas lidas por bloco
+            progresso: Callback (etapa, linhas lidas) chamado a cada bloco
+            
+        Returns:
+            Tupla (store, {linhas_lidas, total_rejeitados, linhas_rejeitadas})
+        """
+        progresso = progresso or (lambda etapa, linhas: None)
+        progresso(ETAPA_LENDO, 0)
+        blocos = []
+        rejeitados = []
+        total_rejeitados = 0
+        linhas_lidas = 0
+        for df in ler_planilha_em_blocos(arquivo, aba=aba, tamanho_bloco=tamanho_bloco):
+            processados, rejeitados_bloco = cls._validar_e_processar_frame(df)
+            total_rejeitados += len(rejeitados_bloco)
+            rejeitados.extend(linhas_lidas + i for i in
+                              rejeitados_bloco[:LIMITE_REJEITADOS_REPORTADOS - len(rejeitados)])
+            linhas_lidas += len(df)
+            blocos.append(ColumnarStore.from_frame(processados))
+            del df, processados
+            progresso(ETAPA_LENDO, linhas_lidas)
+        
+        store = ColumnarStore.concatenar(blocos)
+        return store, {
+            'linhas_lidas': linhas_lidas,
+            **cls._resumo_rejeitados(rejeitados, total_rejeitados)
+        }
+    
+    @staticmethod
+    def _resumo_rejeitados(rejeitados: List[int], total: Optional[int] = None) -> Dict:
+        """
+        Resumo das linhas rejeitadas na validação
+        
+        As posições contam a partir da primeira linha de dados (0 = linha
+        logo abaixo do cabeçalho) e a lista é truncada em
+        LIMITE_REJEITADOS_REPORTADOS entradas.
+        """
+        return {
+            'total_rejeitados': len(rejeitados) if total is None else total,
+            'linhas_rejeitadas': rejeitados[:LIMITE_REJEITADOS_REPORTADOS]
+        }
+    
+    @staticmethod
+    def _memoria_pico_processo_mb() -> Optional[float]:
+        """
+        Pico de memória residente do processo desde o início (None se
+        indisponível)
+        
+        Não é a memória desta importação: depois de um upload grande, os
+        seguintes reportam o mesmo valor enquanto não o superarem.
+        """
+        if resource is None:
+            return None
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta em KiB, macOS em bytes
+        divisor = 1024 * 1024 if os.uname().sysname == 'Darwin' else 1024
+        return round(pico / divisor, 1)
+    
     def _validar_e_processar_dados(self, dados: List[Dict]) -> List[Dict]:
         """
         Valida e processa dados brutos
@@ -70,90 +627,213 @@ class DataService:
         Returns:
             Lista de dados processados e validados
         """
-        campos_obrigatorios = [
-            'DATA_COMPLETA', 'MES', 'ANO', 'CATEGORIA',
-            'CURVA_REALIZADO', 'PROJETADO_ANALITICO', 
-            'PROJETADO_MERCADO', 'PROJETADO_AJUSTADO'
-        ]
+        if not dados:
+            return []
         
-        dados_processados = []
-        
-        for registro in dados:
-            # Validar campos obrigatórios
-            if all(campo in registro for campo in campos_obrigatorios):
-                # Processar valores monetários
-                registro_processado = {
-                    'DATA_COMPLETA': str(registro['DATA_COMPLETA']),
-                    'MES': str(registro['MES']).lower(),
-                    'ANO': str(registro['ANO']),
-                    'CATEGORIA': str(registro['CATEGORIA']),
-                    'CURVA_REALIZADO': self._converter_valor_monetario(registro['CURVA_REALIZADO']),
-                    'PROJETADO_ANALITICO': self._converter_valor_monetario(registro['PROJETADO_ANALITICO']),
-                    'PROJETADO_MERCADO': self._converter_valor_monetario(registro['PROJETADO_MERCADO']),
-                    'PROJETADO_AJUSTADO': self._converter_valor_monetario(registro['PROJETADO_AJUSTADO']),
-                }
-                
-                dados_processados.append(registro_processado)
+        df, _ = self._validar_e_processar_frame(pd.DataFrame.from_records(dados))
+        return df.to_dict(orient='records')
+    
+    @classmethod
+    def _validar_e_processar_frame(cls, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[int]]:
+        """
+        Valida e processa um DataFrame bruto coluna a coluna
+        
+        Linhas com campo de identificação vazio ou valor monetário que não
+        pode ser convertido são rejeitadas e reportadas pela posição.
+        
+        Args:
+            df: DataFrame com dados brutos
+            
+        Returns:
+            Tupla (DataFrame processado, posições das linhas rejeitadas)
+        
+        Raises:
+            ValueError: Se faltar alguma coluna obrigatória
+        """
+        ausentes = [c for c in CAMPOS_OBRIGATORIOS if c not in df.columns]
+        if ausentes:
+            raise ValueError(f'Colunas obrigatórias ausentes: {", ".join(ausentes)}')
+        
+        # Colunas montadas como arrays e o DataFrame criado uma única vez,
+        # sem consolidar blocos nem copiar no reset do índice
+        colunas = {}
+        rejeitar = np.zeros(len(df), dtype=bool)
+        
+        for campo in CAMPOS_TEXTO:
+            colunas[campo], nulos = cls._converter_coluna_texto(df[campo], minusculo=(campo == 'MES'))
+            rejeitar |= nulos
+        
+        for coluna in COLUNAS_VALOR:
+            colunas[coluna], invalidos = cls._converter_valores_monetarios(df[coluna])
+            rejeitar |= invalidos
+        
+        for campo in CAMPOS_OPCIONAIS:
+            if campo in df.columns:
+                colunas[campo], _ = cls._converter_coluna_texto(df[campo])
+        
+        rejeitados = np.flatnonzero(rejeitar)
+        if len(rejeitados):
+            colunas = {coluna: valores[~rejeitar] for coluna, valores in colunas.items()}
         
-        return dados_processados
+        return pd.DataFrame(colunas, copy=False), rejeitados.tolist()
     
     @staticmethod
-    def _converter_valor_monetario(valor: str) -> float:
+    def _converter_coluna_texto(serie: pd.Series, minusculo: bool = False) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Converte valor em formato R$ para float
+        Converte uma coluna para texto operando sobre os valores distintos
         
         Args:
-            valor: String com valor monetário
+            serie: Coluna bruta
+            minusculo: Se True, converte o texto para minúsculas
             
         Returns:
-            Valor em formato float
+            Tupla (array de strings, máscara de células vazias)
         """
-        try:
-            # Remove 'R$' e espaços
-            valor_limpo = valor.replace('R$', '').strip()
-            # Remove ponto de milhar e substitui vírgula por ponto
-            valor_limpo = valor_limpo.replace('.', '').replace(',', '.')
-            return float(valor_limpo)
-        except:
-            return 0.0
+        codigos, unicos = pd.factorize(serie)
+        textos = unicos.astype(str)
+        if minusculo:
+            textos = textos.str.lower()
+        # Código -1 (célula vazia) aponta para o sentinela no fim da tabela
+        tabela = np.append(np.asarray(textos, dtype=object), 'nan')
+        return tabela[codigos], codigos == -1
     
     @staticmethod
-    def _extrair_periodo(dados: List[Dict]) -> Dict:
+    def _converter_valores_monetarios(serie: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Extrai período de dados
+        Converte uma coluna de valores em formato R$ para float64
+        
+        Colunas já numéricas são apenas convertidas de tipo. Colunas só de
+        texto usam os kernels de string do pyarrow (quando instalado) direto
+        sobre um array arrow, sem passar pelo acessor .str do pandas, com
+        conversão direta para float. Colunas mistas ou com valores fora do
+        padrão caem em um `str.translate` que remove 'R$', espaços e pontos
+        de milhar e troca a vírgula decimal por ponto. Células vazias valem 0.0.
         
         Args:
-            dados: Lista de dados
+            serie: Coluna com valores monetários
             
         Returns:
-            Dicionário com período inicial e final
+            Tupla (valores float64, máscara de valores não conversíveis)
         """
-        if not dados:
-            return {'inicio': None, 'fim': None}
+        if pd.api.types.is_numeric_dtype(serie.dtype):
+            return serie.astype(np.float64).fillna(0.0).to_numpy(), np.zeros(len(serie), dtype=bool)
         
-        anos = sorted(set([int(d['ANO']) for d in dados]))
+        tipo = pd.api.types.infer_dtype(serie, skipna=True)
+        if tipo in _TIPOS_NUMERICOS:
+            valores = pd.to_numeric(serie, errors='coerce')
+        else:
+            if tipo == 'string' and pa is not None:
+                try:
+                    texto = pa.array(serie.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+                    texto = pc.utf8_ltrim(texto, characters='R$ \xa0')
+                    texto = pc.replace_substring(texto, '.', '')
+                    texto = pc.replace_substring(texto, ',', '.')
+                    valores = pc.fill_null(pc.cast(texto, pa.float64()), 0.0)
+                    valores = valores.to_numpy(zero_copy_only=False, writable=True)
+                    # A conversão só tem sucesso se todo texto for válido
+                    return valores, np.zeros(len(serie), dtype=bool)
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    pass
+            
+            # Entradas que não são texto viram NaN no acessor .str
+            texto = pd.to_numeric(serie.str.translate(_TABELA_MONETARIA), errors='coerce')
+            numerico = pd.to_numeric(serie.where(texto.isna()), errors='coerce')
+            valores = texto.fillna(numerico)
         
-        return {
-            'inicio': f'{anos[0]}',
-            'fim': f'{anos[-1] if len(anos) > 1 else anos[0]}'
-        }
+        invalidos = (serie.notna() & valores.isna()).to_numpy()
+        return valores.fillna(0.0).to_numpy(dtype=np.float64), invalidos
+    
+    @staticmethod
+    def _como_store(dados: Union[List[Dict], ColumnarStore, ProjecaoBatch]) -> ColumnarStore:
+        """Store colunar de uma lista de dicionários, store ou batch"""
+        if isinstance(dados, ColumnarStore):
+            return dados
+        if isinstance(dados, ProjecaoBatch):
+            return dados.para_store()
+        return ColumnarStore.from_records(dados)
     
-    def armazenar_dados(self, dados: List[Dict]) -> Dict:
+    def armazenar_dados(self, dados: Union[List[Dict], ColumnarStore, ProjecaoBatch],
+                        indices: Optional[IndicesDados] = None, rollups: Optional[Rollups] = None) -> Dict:
         """
         Armazena dados processados
         
         Args:
-            dados: Dados a serem armazenados
+            dados: Dados a serem armazenados (lista de dicionários, store
+                colunar ou batch)
+            indices: Índices já construídos para o store (reuso do cache de uploads)
+            rollups: Agregados já construídos para o store
             
         Returns:
             Confirmação de armazenamento
         """
-        self.dados_armazenados = dados
+        store = self._como_store(dados)
+        
+        # Índices e agregados são montados fora do lock; leitores continuam
+        # no snapshot anterior até a troca
+        indices = indices if indices is not None else IndicesDados.construir(store)
+        rollups = rollups if rollups is not None else Rollups.construir(store)
+        with self._lock_escrita:
+            versao = self.armazenamento.salvar_dados(store, indices)
+            self._ativar_dataset(store, versao, indices=indices, rollups=rollups)
+            self.cache_filtros.limpar()
+        
+        return {
+            'sucesso': True,
+            'mensagem': f'{len(store)} registros armazenados com sucesso',
+            'total_armazenado': len(store)
+        }
+    
+    def upsert_dados(self, dados: Union[List[Dict], ColumnarStore, ProjecaoBatch]) -> Dict:
+        """
+        Mescla dados processados no conjunto atual pela chave
+        (ANO, MES, CATEGORIA, PRODUTO, TIPO_CLIENTE)
+        
+        Só as linhas inseridas ou alteradas são gravadas, indexadas e
+        somadas aos agregados. A versão só avança se algo mudou. Com
+        armazenamento compartilhado (SQLite, mmap), a mescla roda sob a
+        trava de escrita do armazenamento, então upserts de processos
+        diferentes não se sobrescrevem.
+        
+        Args:
+            dados: Dados a mesclar (lista de dicionários, store colunar ou batch)
+            
+        Returns:
+            Confirmação com contagens de inseridos, atualizados, inalterados
+            e duplicados no upload, e se a versão mudou
+        
+        Raises:
+            ValueError: Se as colunas diferirem das do conjunto atual
+        """
+        novo = self._como_store(dados)
+        
+        # Leitura-modificação-escrita: o lock cobre da mescla até a troca e a
+        # trava do armazenamento impede que outro processo grave no meio
+        with self._lock_escrita, self.armazenamento.travar_escrita():
+            self._sincronizar()
+            atual = self._snapshot
+            if not len(atual.store):
+                self.armazenar_dados(novo)
+                contagens = {'inseridos': len(novo), 'atualizados': 0, 'inalterados': 0, 'duplicados': 0}
+                alterado = bool(len(novo))
+            else:
+                resultado = mesclar(atual.store, novo)
+                contagens = resultado.contagens()
+                alterado = resultado.alterado
+                if alterado:
+                    indices = atual.indices.anexar(resultado.store, resultado.inicio_insercao)
+                    rollups = atual.rollups.combinar(Rollups.construir(resultado.delta))
+                    versao = self.armazenamento.atualizar_dados(resultado.store, resultado.linhas_alteradas,
+                                                                indices)
+                    self._ativar_dataset(resultado.store, versao, indices=indices, rollups=rollups)
+                    self.cache_filtros.limpar()
+            total = len(self._snapshot.store)
         
         return {
             'sucesso': True,
-            'mensagem': f'{len(dados)} registros armazenados com sucesso',
-            'total_armazenado': len(self.dados_armazenados)
+            'mensagem': f'{contagens["inseridos"]} inseridos, {contagens["atualizados"]} atualizados',
+            'total_armazenado': total,
+            'versao_alterada': alterado,
+            **contagens
         }
     
     def obter_dados(self, filtros: Optional[Dict] = None) -> List[Dict]:
@@ -161,27 +841,135 @@ class DataService:
         Obtém dados armazenados com filtros opcionais
         
         Args:
-            filtros: Dicionário com filtros (categoria, mes, ano)
+            filtros: Dicionário com filtros (categoria, mes, ano, produto,
+                tipo_cliente). Cada filtro aceita um valor ou uma lista de
+                valores (união).
             
         Returns:
             Lista de dados filtrados
         """
-        dados = self.dados_armazenados
+        return self.selecionar_linhas(filtros).to_records()
+    
+    def selecionar_linhas(self, filtros: Optional[Dict] = None) -> ProjecaoBatch:
+        """
+        Resolve filtros sem materializar linhas
+        
+        Args:
+            filtros: Mesmos filtros de `obter_dados`
+            
+        Returns:
+            Batch sobre o store do snapshot atual (ids de linha ordenados ou
+            None para todas as linhas)
+        """
+        snapshot = self.snapshot
         
+        filtros = self._normalizar_filtros(filtros)
         if not filtros:
-            return dados
+            return ProjecaoBatch(snapshot.store)
         
-        # Aplicar filtros
-        if 'categoria' in filtros:
-            dados = [d for d in dados if d['CATEGORIA'].lower() == filtros['categoria'].lower()]
+        # Store, índices e versão vêm do mesmo snapshot: os ids nunca são
+        # associados a outra versão dos dados
+        chave = (snapshot.versao_dataset, self._chave_filtros(filtros))
+        ids = self.cache_filtros.obter(chave)
+        if ids is None:
+            ids = snapshot.indices.filtrar(filtros)
+            ids.flags.writeable = False
+            self.cache_filtros.inserir(chave, ids)
         
-        if 'mes' in filtros:
-            dados = [d for d in dados if d['MES'].lower() == filtros['mes'].lower()]
+        return ProjecaoBatch(snapshot.store, ids)
+    
+    def paginar_linhas(self, filtros: Optional[Dict] = None, limite: Optional[int] = None,
+                       apos: Optional[int] = None) -> Tuple[ProjecaoBatch, int, Optional[int]]:
+        """
+        Resolve filtros e recorta uma página em ordem estável (id de linha)
+        
+        Args:
+            filtros: Mesmos filtros de `obter_dados`
+            limite: Máximo de linhas na página (todas se None)
+            apos: Id da última linha da página anterior (início se None)
+            
+        Returns:
+            Tupla (batch da página, total filtrado, id da última linha da
+            página se houver próxima página, senão None)
+        """
+        selecao = self.selecionar_linhas(filtros)
+        ids = np.arange(len(selecao.store)) if selecao.ids is None else selecao.ids
+        
+        total = len(ids)
+        inicio = 0 if apos is None else int(np.searchsorted(ids, apos, side='right'))
+        fim = total if limite is None else min(total, inicio + limite)
+        pagina = ids[inicio:fim]
+        proximo = int(pagina[-1]) if fim < total and len(pagina) else None
+        
+        return ProjecaoBatch(selecao.store, pagina), total, proximo
+    
+    @staticmethod
+    def _chave_filtros(filtros: Dict[str, List[str]]) -> Tuple:
+        """Chave canônica (independe de ordem e caixa) de um conjunto de filtros"""
+        return tuple(sorted(
+            (filtro, tuple(sorted({normalizar_valor(v) for v in valores})))
+            for filtro, valores in filtros.items()
+        ))
+    
+    @staticmethod
+    def _normalizar_filtros(filtros: Optional[Dict]) -> Dict[str, List[str]]:
+        """
+        Converte filtros em listas de valores, descartando os não suportados
+        """
+        normalizados = {}
+        for filtro, valor in (filtros or {}).items():
+            if filtro not in COLUNAS_INDEXADAS or valor is None:
+                continue
+            valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+            normalizados[filtro] = [str(v) for v in valores]
+        return normalizados
+    
+    def obter_agregados(self, cliente: Optional[str] = None, categoria: Optional[str] = None,
+                        produto: Optional[str] = None, ano: Optional[int] = None,
+                        agrupar: Optional[str] = None, ano_min: Optional[int] = None,
+                        realizados: bool = False, mascarar_zeros: bool = True) -> Dict:
+        """
+        Curvas mensais analítica/mercado/ajustada/realizado de uma seleção
+        
+        Servidas do cubo materializado no armazenamento dos dados, sem
+        percorrer as linhas.
+        
+        Args:
+            cliente: Tipo de cliente ('Todos' ou None = sem filtro)
+            categoria: Categoria (None = todas)
+            produto: Produto (None = todos)
+            ano: Ano de projeção (None = último ano da seleção)
+            agrupar: 'categoria' ou 'produto' para curvas por grupo
+            ano_min: Ignora anos anteriores (None = todos)
+            realizados: Inclui o realizado mensal de cada ano
+            mascarar_zeros: Troca zeros finais do realizado por None
+            
+        Returns:
+            Dicionário com ano, ano_anterior, curvas, versao_dataset e (se
+            pedidos) grupos e realizados por ano
+        """
+        snapshot = self.snapshot
+        agregados = snapshot.rollups.consultar(
+            cliente=cliente, categoria=categoria, produto=produto, ano=ano, agrupar=agrupar,
+            mascarar_zeros=mascarar_zeros, ano_min=ano_min, realizados=realizados
+        )
+        return {**agregados, 'versao_dataset': snapshot.versao_dataset}
+    
+    def obter_totais_anuais(self, categoria: Optional[str] = None) -> List[Dict]:
+        """
+        Totais por ano de realizado/analítico/mercado/ajustado
         
-        if 'ano' in filtros:
-            dados = [d for d in dados if d['ANO'] == str(filtros['ano'])]
+        Servidos do nível (ano, categoria) do cubo.
         
-        return dados
+        Args:
+            categoria: Categoria (None = todas)
+            
+        Returns:
+            Lista ordenada por ano de {'ano': ..., 'ana': ..., 'mer': ...,
+            'ajs': ..., 'rlzd': ...}
+        """
+        totais = self.snapshot.rollups.totais_anuais(categoria)
+        return [{'ano': ano, **metricas} for ano, metricas in totais.items()]
     
     def criar_simulacao(self, usuario_id: str, nome: str, dados_ajustados: List[Dict]) -> Dict:
         """
@@ -196,7 +984,7 @@ class DataService:
             Dados da simulação criada
         """
         simulacao = {
-            'id': f'sim_{len(self.simulacoes) + 1}',
+            'id': f'sim_{uuid.uuid4().hex}',
             'usuario_id': usuario_id,
             'nome': nome,
             'data_criacao': datetime.now().isoformat(),
@@ -204,18 +992,157 @@ class DataService:
             'ativo': True
         }
         
-        self.simulacoes.append(simulacao)
+        self.armazenamento.salvar_simulacao(simulacao)
+        self._incrementar_versao()
         
         return simulacao
     
-    def obter_simulacoes_usuario(self, usuario_id: str) -> List[Dict]:
+    def criar_simulacoes_lote(self, usuario_id: str, simulacoes: List[Dict]) -> List[Dict]:
+        """
+        Cria várias simulações de uma vez, com as curvas em delta
+        
+        Cada item traz `selecao` ({cliente, categoria, produto, ano}, como em
+        /agregados) e `curva_ajustada` (12 valores mensais). A curva é
+        gravada como as diferenças em relação à curva analítica da seleção no
+        conjunto de dados atual; essa curva base é gravada uma vez e
+        compartilhada por todas as simulações da mesma seleção e versão dos
+        dados, de modo que continua reconstruível após novos uploads. Itens
+        com `dados_ajustados` (formato de /simulacao) são gravados como estão.
+        
+        Todas as curvas são calculadas sobre o mesmo snapshot, e as
+        simulações são gravadas juntas, com um único avanço de versão.
+        
+        Args:
+            usuario_id: ID do usuário (itens podem informar outro)
+            simulacoes: Itens {'nome', 'selecao', 'curva_ajustada'} ou
+                {'nome', 'dados_ajustados'}
+            
+        Returns:
+            Simulações criadas, resumidas (sem curva)
+            
+        Raises:
+            ValueError: Se algum item for inválido (nada é gravado)
+        """
+        snapshot = self.snapshot
+        agora = datetime.now().isoformat()
+        bases: Dict[tuple, Dict] = {}
+        criadas = []
+        for posicao, item in enumerate(simulacoes):
+            try:
+                criadas.append(self._simulacao_do_lote(item, usuario_id, agora, snapshot, bases))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f'Simulação {posicao}: {e}') from e
+        
+        for base in {b['id']: b for b in bases.values()}.values():
+            self.armazenamento.salvar_curva_base(base)
+            self.cache_curvas_base.inserir(base['id'], base)
+        self.armazenamento.salvar_simulacoes(criadas)
+        self._incrementar_versao()
+        return [resumir_simulacao(simulacao) for simulacao in criadas]
+
+    def _simulacao_do_lote(self, item: Dict, usuario_id: str, data_criacao: str,
+                           snapshot: SnapshotDados, bases: Dict[str, Dict]) -> Dict:
+        """Simulação a gravar para um item do lote, registrando a curva base usada"""
+        if not isinstance(item, dict):
+            raise ValueError('item deve ser um objeto')
+        simulacao = {
+            'id': f'sim_{uuid.uuid4().hex}',
+            'usuario_id': item.get('usuario_id') or usuario_id,
+            'nome': item.get('nome'),
+            'data_criacao': data_criacao,
+            'ativo': True
+        }
+        if not simulacao['usuario_id']:
+            raise ValueError('usuario_id é obrigatório')
+        if 'curva_ajustada' not in item:
+            if 'dados_ajustados' not in item:
+                raise ValueError('informe curva_ajustada ou dados_ajustados')
+            return {**simulacao, 'dados_ajustados': item['dados_ajustados']}
+        
+        curva = validar_curva(item['curva_ajustada'])
+        selecao = normalizar_selecao(item.get('selecao'))
+        # Seleções repetidas no lote reaproveitam a curva base já consultada
+        chave = tuple(sorted(selecao.items()))
+        base = bases.get(chave)
+        if base is None:
+            filtros = {campo: selecao.get(campo) for campo in (*CAMPOS_SELECAO, 'ano')}
+            # Valor inexistente em qualquer dimensão (ou ano sem linhas) não
+            # vira delta sobre uma curva base zerada
+            if not snapshot.rollups.contar_celulas(**filtros):
+                raise ValueError('seleção sem dados no conjunto atual')
+            agregados = snapshot.rollups.consultar(**filtros, mascarar_zeros=False)
+            selecao_base = {**selecao, 'ano': agregados['ano']}
+            base_id = id_curva_base(snapshot.versao_dataset, selecao_base)
+            base = bases[chave] = {'id': base_id, 'versao_dataset': snapshot.versao_dataset,
+                                   'selecao': selecao_base, 'curva': agregados['curvas']['ana']}
+        return {**simulacao, 'selecao': base['selecao'], 'curva_base': base['id'],
+                'delta': codificar_delta(curva, base['curva'])}
+
+    def _curva_base(self, curva_id: str) -> Optional[Dict]:
+        """Curva base pelo id, do cache ou do armazenamento"""
+        curva = self.cache_curvas_base.obter(curva_id)
+        if curva is None:
+            curva = self.armazenamento.obter_curva_base(curva_id)
+            if curva is not None:
+                self.cache_curvas_base.inserir(curva_id, curva)
+        return curva
+
+    def _expandir_simulacao(self, simulacao: Optional[Dict]) -> Optional[Dict]:
+        """
+        Simulação em delta com `curva_ajustada` (base + delta) e
+        `curva_analitica` (base) no lugar do delta; outras ficam como estão
+        """
+        if simulacao is None or 'delta' not in simulacao:
+            return simulacao
+        base = self._curva_base(simulacao['curva_base'])
+        expandida = {chave: valor for chave, valor in simulacao.items() if chave != 'delta'}
+        if base is not None:
+            expandida['curva_analitica'] = list(base['curva'])
+            expandida['curva_ajustada'] = aplicar_delta(base['curva'], simulacao['delta'])
+        return expandida
+
+    def obter_simulacoes_usuario(self, usuario_id: str, limite: Optional[int] = None,
+                                 deslocamento: int = 0, decrescente: bool = False,
+                                 resumo: bool = False) -> List[Dict]:
+        """
+        Obtém as simulações de um usuário, ordenadas por data de criação
+        
+        Args:
+            usuario_id: ID do usuário
+            limite: Máximo de simulações (todas se None)
+            deslocamento: Simulações a pular (paginação)
+            decrescente: Mais recentes primeiro
+            resumo: Omite o payload (`dados_ajustados` ou curvas)
+            
+        Returns:
+            Lista de simulações (as em delta com as curvas reconstruídas)
+        """
+        simulacoes = self.armazenamento.listar_simulacoes(
+            usuario_id, limite=limite, deslocamento=deslocamento,
+            decrescente=decrescente, resumo=resumo
+        )
+        return [self._expandir_simulacao(s) for s in simulacoes]
+    
+    def contar_simulacoes_usuario(self, usuario_id: str) -> int:
         """
-        Obtém todas as simulações de um usuário
+        Quantidade de simulações de um usuário
         
         Args:
             usuario_id: ID do usuário
             
         Returns:
-            Lista de simulações
+            Total de simulações
+        """
+        return self.armazenamento.contar_simulacoes(usuario_id)
+    
+    def obter_simulacao(self, simulacao_id: str) -> Optional[Dict]:
+        """
+        Obtém uma simulação pelo id
+        
+        Args:
+            simulacao_id: ID da simulação
+            
+        Returns:
+            Simulação, ou None se não existir
         """
-        return [s for s in self.simulacoes if s['usuario_id'] == usuario_id]
+        return self._expandir_simulacao(self.armazenamento.obter_simulacao(simulacao_id))
@@ -0,0 +1,90 @@
+"""
+Codificação das curvas de simulação como delta sobre a curva analítica
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.rollups import TODOS, normalizar_texto
+
+MESES_CURVA = 12
+
+# Diferenças menores que isto (em valor monetário) não são gravadas
+TOLERANCIA_DELTA = 1e-6
+
+# Dimensões da seleção de uma simulação (mesmas de /agregados)
+CAMPOS_SELECAO = ('cliente', 'categoria', 'produto')
+
+
+def normalizar_selecao(selecao: Optional[Dict]) -> Dict:
+    """
+    Seleção com só as dimensões filtradas, em texto normalizado
+
+    'Todos', vazio e None significam sem filtro e são omitidos; `ano`
+    é mantido como inteiro quando informado.
+
+    Raises:
+        ValueError: Se `ano` não for um inteiro (ou texto só com dígitos)
+    """
+    selecao = selecao or {}
+    normalizada = {}
+    for campo in CAMPOS_SELECAO:
+        valor = normalizar_texto(selecao.get(campo))
+        if valor not in ('', TODOS):
+            normalizada[campo] = valor
+    ano = selecao.get('ano')
+    if ano is not None:
+        if isinstance(ano, int) and not isinstance(ano, bool):
+            normalizada['ano'] = ano
+        elif isinstance(ano, str) and ano.strip().isdigit():
+            normalizada['ano'] = int(ano)
+        else:
+            raise ValueError('ano deve ser inteiro')
+    return normalizada
+
+
+def id_curva_base(versao_dataset: int, selecao: Dict) -> str:
+    """Id determinístico da curva base de uma seleção em uma versão dos dados"""
+    chave = json.dumps([versao_dataset, selecao], sort_keys=True, ensure_ascii=False)
+    return f'base_{hashlib.sha1(chave.encode("utf-8")).hexdigest()[:20]}'
+
+
+def validar_curva(curva) -> np.ndarray:
+    """
+    Curva de 12 valores numéricos
+
+    Raises:
+        ValueError: Se não for uma lista de 12 números finitos
+    """
+    if not isinstance(curva, (list, tuple)) or len(curva) != MESES_CURVA:
+        raise ValueError(f'curva_ajustada deve ser uma lista com {MESES_CURVA} valores')
+    try:
+        valores = np.array(curva, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError('curva_ajustada deve conter apenas números')
+    if not np.isfinite(valores).all():
+        raise ValueError('curva_ajustada deve conter apenas números finitos')
+    return valores
+
+
+def codificar_delta(curva: np.ndarray, base: Sequence[float]) -> Dict[str, float]:
+    """
+    Diferenças não nulas da curva em relação à base, por mês (1-12)
+
+    Returns:
+        Dicionário esparso {'<mês>': diferença}; vazio se a curva for a base
+    """
+    diferencas = curva - np.asarray(base, dtype=np.float64)
+    meses = np.flatnonzero(np.abs(diferencas) > TOLERANCIA_DELTA)
+    return {str(int(m) + 1): float(diferencas[m]) for m in meses}
+
+
+def aplicar_delta(base: Sequence[float], delta: Dict[str, float]) -> List[float]:
+    """Curva reconstruída: base + delta"""
+    curva = [float(v) for v in base]
+    for mes, diferenca in delta.items():
+        curva[int(mes) - 1] += diferenca
+    return curva
@@ -0,0 +1,182 @@
+"""
+Índices por coluna para filtros do store colunar
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.services.columnar_store import ColumnarStore, ColunaCategorica
+
+
+# Filtro da API -> coluna indexada
+COLUNAS_INDEXADAS = {
+    'categoria': 'CATEGORIA',
+    'mes': 'MES',
+    'ano': 'ANO',
+    'produto': 'PRODUTO',
+    'tipo_cliente': 'TIPO_CLIENTE',
+}
+
+_VAZIO = np.empty(0, dtype=np.int64)
+
+
+def normalizar_valor(valor) -> str:
+    """Forma canônica usada como chave dos índices"""
+    return str(valor).strip().lower()
+
+
+class IndiceColuna:
+    """
+    Índice invertido de uma coluna: valor normalizado -> ids de linha ordenados
+    """
+
+    __slots__ = ('entradas',)
+
+    def __init__(self, entradas: Dict[str, np.ndarray]):
+        self.entradas = entradas
+
+    @classmethod
+    def construir(cls, coluna: ColunaCategorica) -> 'IndiceColuna':
+        """
+        Constrói o índice a partir dos códigos da coluna
+
+        Um único argsort estável agrupa as linhas por código mantendo os ids
+        em ordem crescente dentro de cada grupo.
+
+        Args:
+            coluna: Coluna categórica do store
+
+        Returns:
+            Índice da coluna
+        """
+        codigos = coluna.codigos
+        dtype_ids = np.int32 if len(codigos) < np.iinfo(np.int32).max else np.int64
+        ordem = np.argsort(codigos, kind='stable').astype(dtype_ids)
+        limites = np.concatenate(([0], np.cumsum(np.bincount(codigos, minlength=len(coluna.valores)))))
+
+        grupos: Dict[str, List[np.ndarray]] = {}
+        for codigo, valor in enumerate(coluna.valores):
+            ids = ordem[limites[codigo]:limites[codigo + 1]]
+            grupos.setdefault(normalizar_valor(valor), []).append(ids)
+
+        entradas = {
+            chave: partes[0] if len(partes) == 1 else np.sort(np.concatenate(partes))
+            for chave, partes in grupos.items()
+        }
+        return cls(entradas)
+
+    def buscar(self, valores: Iterable[str]) -> np.ndarray:
+        """
+        Ids das linhas que correspondem a qualquer um dos valores
+
+        Args:
+            valores: Valores aceitos (união)
+
+        Returns:
+            Array ordenado de ids de linha
+        """
+        partes = [self.entradas[c] for c in {normalizar_valor(v) for v in valores} if c in self.entradas]
+        if not partes:
+            return _VAZIO
+        if len(partes) == 1:
+            return partes[0]
+        # Entradas de chaves distintas são disjuntas: basta ordenar
+        return np.sort(np.concatenate(partes))
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelos arrays de ids"""
+        return sum(int(ids.nbytes) for ids in self.entradas.values())
+
+
+class IndicesDados:
+    """
+    Conjunto de índices de um store, construído no armazenamento dos dados
+    """
+
+    def __init__(self, indices: Dict[str, IndiceColuna]):
+        self.indices = indices
+
+    @classmethod
+    def construir(cls, store: ColumnarStore) -> 'IndicesDados':
+        """
+        Indexa todas as colunas filtráveis presentes no store
+
+        Args:
+            store: Store colunar
+
+        Returns:
+            Índices do store
+        """
+        return cls({
+            filtro: IndiceColuna.construir(store.categoricas[coluna])
+            for filtro, coluna in COLUNAS_INDEXADAS.items()
+            if coluna in store.categoricas
+        })
+
+    def anexar(self, store: ColumnarStore, inicio: int) -> 'IndicesDados':
+        """
+        Novos índices para um store que só ganhou linhas a partir de `inicio`
+
+        Apenas as linhas anexadas são indexadas; como seus ids são maiores
+        que todos os existentes, cada entrada afetada é a concatenação da
+        entrada atual com os novos ids, sem reordenar. Linhas anteriores a
+        `inicio` podem ter mudado de valor desde que a forma normalizada das
+        colunas indexadas seja a mesma. Os índices atuais não são alterados.
+
+        Args:
+            store: Store completo (linhas antigas + anexadas)
+            inicio: Primeira linha anexada
+
+        Returns:
+            Índices do store
+        """
+        dtype_ids = np.int32 if len(store) < np.iinfo(np.int32).max else np.int64
+        indices = {}
+        for filtro, indice in self.indices.items():
+            coluna = store.categoricas[COLUNAS_INDEXADAS[filtro]]
+            parcial = IndiceColuna.construir(ColunaCategorica(coluna.codigos[inicio:], coluna.valores))
+            entradas = dict(indice.entradas)
+            for chave, ids in parcial.entradas.items():
+                if not len(ids):
+                    continue
+                ids = ids.astype(dtype_ids) + inicio
+                atuais = entradas.get(chave)
+                entradas[chave] = ids if atuais is None else np.concatenate((atuais.astype(dtype_ids), ids))
+            indices[filtro] = IndiceColuna(entradas)
+        return IndicesDados(indices)
+
+    def filtrar(self, filtros: Dict[str, List[str]]) -> Optional[np.ndarray]:
+        """
+        Resolve filtros pela interseção das entradas dos índices
+
+        Args:
+            filtros: Filtro -> lista de valores aceitos
+
+        Returns:
+            Ids de linha ordenados, ou None se não houver filtros
+        """
+        if not filtros:
+            return None
+
+        candidatos = []
+        for filtro, valores in filtros.items():
+            indice = self.indices.get(filtro)
+            if indice is None:
+                return _VAZIO
+            candidatos.append(indice.buscar(valores))
+
+        # Intersecta a partir do menor conjunto
+        candidatos.sort(key=len)
+        resultado = candidatos[0]
+        for ids in candidatos[1:]:
+            if not len(resultado):
+                break
+            resultado = np.intersect1d(resultado, ids, assume_unique=True)
+        return resultado
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados por todos os índices"""
+        return sum(indice.nbytes for indice in self.indices.values())
@@ -0,0 +1,122 @@
+"""
+Leitura de planilhas Excel em blocos de tamanho fixo
+"""
+
+import hashlib
+from typing import BinaryIO, Iterator, List, Union
+
+import pandas as pd
+from openpyxl import load_workbook
+
+
+ABA_PADRAO = 'Projeções'
+TAMANHO_BLOCO_PADRAO = 50_000
+
+# Bytes lidos por vez ao calcular o hash do conteúdo
+TAMANHO_LEITURA_HASH = 1024 * 1024
+
+
+def ler_planilha_em_blocos(arquivo: Union[str, BinaryIO], aba: str = ABA_PADRAO,
+                           tamanho_bloco: int = TAMANHO_BLOCO_PADRAO) -> Iterator[pd.DataFrame]:
+    """
+    Lê uma aba de planilha em modo somente-leitura, bloco a bloco
+
+    O openpyxl em modo read-only percorre o XML da aba sob demanda, então
+    apenas um bloco de linhas fica materializado por vez.
+
+    Args:
+        arquivo: Caminho ou arquivo binário (precisa permitir seek)
+        aba: Nome da aba com os dados
+        tamanho_bloco: Linhas por bloco
+
+    Yields:
+        DataFrames com no máximo `tamanho_bloco` linhas
+    """
+    workbook = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        if aba not in workbook.sheetnames:
+            raise ValueError(f"Worksheet named '{aba}' not found")
+
+        linhas = workbook[aba].iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+
+        colunas = [str(c).strip() if c is not None else f'COLUNA_{i}' for i, c in enumerate(cabecalho)]
+        bloco = []
+        for linha in linhas:
+            if all(v is None for v in linha):
+                continue
+            bloco.append(linha)
+            if len(bloco) >= tamanho_bloco:
+                yield pd.DataFrame.from_records(bloco, columns=colunas)
+                bloco = []
+
+        if bloco:
+            yield pd.DataFrame.from_records(bloco, columns=colunas)
+    finally:
+        workbook.close()
+
+
+def listar_abas(arquivo: Union[str, BinaryIO]) -> List[str]:
+    """
+    Nomes das abas de uma planilha, na ordem do arquivo
+
+    Args:
+        arquivo: Caminho ou arquivo binário
+
+    Returns:
+        Lista de nomes de abas
+    """
+    workbook = load_workbook(arquivo, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def hash_conteudo(arquivo: Union[str, BinaryIO]) -> str:
+    """
+    SHA-256 do conteúdo de um arquivo, lido em pedaços
+
+    Para arquivos binários a leitura começa na posição atual, que é
+    restaurada ao final (o arquivo precisa permitir seek).
+
+    Args:
+        arquivo: Caminho ou arquivo binário
+
+    Returns:
+        Digest hexadecimal
+    """
+    digest = hashlib.sha256()
+    if isinstance(arquivo, str):
+        with open(arquivo, 'rb') as origem:
+            for pedaco in iter(lambda: origem.read(TAMANHO_LEITURA_HASH), b''):
+                digest.update(pedaco)
+        return digest.hexdigest()
+
+    posicao = arquivo.tell()
+    try:
+        for pedaco in iter(lambda: arquivo.read(TAMANHO_LEITURA_HASH), b''):
+            digest.update(pedaco)
+    finally:
+        arquivo.seek(posicao)
+    return digest.hexdigest()
+
+
+def copiar_com_hash(origem: BinaryIO, destino: BinaryIO) -> str:
+    """
+    Copia um arquivo em pedaços calculando o SHA-256 na mesma passada
+
+    Args:
+        origem: Arquivo binário de leitura
+        destino: Arquivo binário de escrita
+
+    Returns:
+        Digest hexadecimal do conteúdo copiado
+    """
+    digest = hashlib.sha256()
+    for pedaco in iter(lambda: origem.read(TAMANHO_LEITURA_HASH), b''):
+        digest.update(pedaco)
+        destino.write(pedaco)
+    return digest.hexdigest()
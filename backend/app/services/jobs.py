@@ -0,0 +1,181 @@
+"""
+Execução assíncrona de importações em um pool limitado de workers
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+
+# Estados de um job
+NA_FILA = 'na_fila'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+
+MAX_WORKERS_PADRAO = max(1, min(2, (os.cpu_count() or 1) - 1))
+MAX_PENDENTES_PADRAO = 8
+MAX_JOBS_RETIDOS_PADRAO = 100
+
+
+class FilaCheiaError(RuntimeError):
+    """Há jobs demais na fila ou em execução"""
+
+
+class Job:
+    """
+    Estado observável de uma importação assíncrona
+    """
+
+    __slots__ = ('id', 'estado', 'etapa', 'linhas_processadas', 'criado_em',
+                 'iniciado_em', 'concluido_em', 'resultado', 'mensagem', '_lock')
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.estado = NA_FILA
+        self.etapa = NA_FILA
+        self.linhas_processadas = 0
+        self.criado_em = time.time()
+        self.iniciado_em: Optional[float] = None
+        self.concluido_em: Optional[float] = None
+        self.resultado: Optional[Dict] = None
+        self.mensagem: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def progresso(self, etapa: str, linhas_processadas: int):
+        """Callback de progresso repassado à importação"""
+        with self._lock:
+            self.etapa = etapa
+            self.linhas_processadas = linhas_processadas
+
+    @property
+    def finalizado(self) -> bool:
+        """Job concluído ou com erro"""
+        return self.estado in (CONCLUIDO, ERRO)
+
+    def to_dict(self) -> Dict:
+        """Representação JSON do job"""
+        with self._lock:
+            agora = self.concluido_em or time.time()
+            return {
+                'id': self.id,
+                'estado': self.estado,
+                'etapa': self.etapa,
+                'linhas_processadas': self.linhas_processadas,
+                'criado_em': datetime.fromtimestamp(self.criado_em).isoformat(),
+                'espera_segundos': round((self.iniciado_em or agora) - self.criado_em, 3),
+                'decorrido_segundos': round(agora - self.iniciado_em, 3) if self.iniciado_em else 0.0,
+                'resultado': self.resultado,
+                'mensagem': self.mensagem,
+            }
+
+
+class GerenciadorJobs:
+    """
+    Fila de importações sobre um ThreadPoolExecutor limitado
+
+    O número de workers limita quantas planilhas são processadas ao mesmo
+    tempo; os demais jobs aguardam na fila do executor. Acima de
+    `max_pendentes` jobs não finalizados, novos envios são recusados.
+    Apenas os `max_retidos` jobs mais recentes são mantidos para consulta.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS_PADRAO,
+                 max_pendentes: int = MAX_PENDENTES_PADRAO,
+                 max_retidos: int = MAX_JOBS_RETIDOS_PADRAO):
+        self.max_workers = max_workers
+        self.max_pendentes = max_pendentes
+        self.max_retidos = max_retidos
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configurar(self, max_workers: Optional[int] = None, max_pendentes: Optional[int] = None,
+                   max_retidos: Optional[int] = None):
+        """
+        Ajusta os limites; o pool é recriado no próximo envio
+
+        Args:
+            max_workers: Importações simultâneas
+            max_pendentes: Jobs não finalizados aceitos (na fila + executando)
+            max_retidos: Jobs mantidos para consulta
+        """
+        with self._lock:
+            if max_workers is not None and max_workers != self.max_workers:
+                self.max_workers = max_workers
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+            if max_pendentes is not None:
+                self.max_pendentes = max_pendentes
+            if max_retidos is not None:
+                self.max_retidos = max_retidos
+
+    def enviar(self, tarefa: Callable[[Callable[[str, int], None]], Dict],
+               ao_finalizar: Optional[Callable[[], None]] = None) -> Job:
+        """
+        Enfileira uma tarefa
+
+        Args:
+            tarefa: Função que recebe o callback de progresso e retorna o
+                resultado da importação ({'sucesso': bool, ...})
+            ao_finalizar: Limpeza executada após a tarefa (ex.: remover
+                arquivo temporário), com sucesso ou erro
+
+        Returns:
+            Job criado
+
+        Raises:
+            FilaCheiaError: Se já houver `max_pendentes` jobs não finalizados
+        """
+        with self._lock:
+            pendentes = sum(1 for job in self._jobs.values() if not job.finalizado)
+            if pendentes >= self.max_pendentes:
+                raise FilaCheiaError(f'Fila de importação cheia ({pendentes} jobs pendentes)')
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='importacao')
+            job = Job(uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self._descartar_antigos()
+            self._executor.submit(self._executar, job, tarefa, ao_finalizar)
+        return job
+
+    def obter(self, job_id: str) -> Optional[Job]:
+        """Job pelo id (None se não existir ou já descartado)"""
+        return self._jobs.get(job_id)
+
+    def _descartar_antigos(self):
+        """Remove os jobs finalizados mais antigos acima de `max_retidos`"""
+        excedentes = len(self._jobs) - self.max_retidos
+        for job_id in [j.id for j in self._jobs.values() if j.finalizado][:max(excedentes, 0)]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _executar(job: Job, tarefa: Callable, ao_finalizar: Optional[Callable[[], None]]):
+        """Roda a tarefa no worker registrando estado e resultado"""
+        with job._lock:
+            job.estado = EXECUTANDO
+            job.iniciado_em = time.time()
+        try:
+            resultado = tarefa(job.progresso)
+            sucesso = resultado.get('sucesso', False)
+            with job._lock:
+                job.resultado = resultado.get('metadata')
+                job.mensagem = resultado.get('mensagem')
+                job.estado = CONCLUIDO if sucesso else ERRO
+                job.etapa = CONCLUIDO if sucesso else ERRO
+        except Exception as e:
+            with job._lock:
+                job.mensagem = str(e)
+                job.estado = job.etapa = ERRO
+        finally:
+            with job._lock:
+                job.concluido_em = time.time()
+            if ao_finalizar is not None:
+                ao_finalizar()
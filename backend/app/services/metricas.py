@@ -0,0 +1,222 @@
+"""
+Métricas do processo no formato de exposição em texto do Prometheus
+"""
+
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Limites (segundos) dos histogramas de latência
+LIMITES_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Limites (bytes) dos histogramas de tamanho: 256 B a 64 MiB, potências de 4
+LIMITES_BYTES = tuple(float(256 * 4 ** i) for i in range(10))
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# (rótulos, valor) de uma amostra coletada
+Amostra = Tuple[Dict[str, str], float]
+
+
+def _escapar(valor: str) -> str:
+    """Escapa o valor de um rótulo (barra invertida, aspas e quebra de linha)"""
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatar_rotulos(rotulos: Dict[str, str]) -> str:
+    if not rotulos:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos.items()) + '}'
+
+
+def _formatar_valor(valor: float) -> str:
+    if math.isinf(valor):
+        return '+Inf' if valor > 0 else '-Inf'
+    if math.isnan(valor):
+        return 'NaN'
+    valor = float(valor)
+    return str(int(valor)) if valor.is_integer() else repr(valor)
+
+
+class _Metrica:
+    """Base das métricas com rótulos fixos por nome"""
+
+    tipo = ''
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+
+    def _chave(self, rotulos: Dict[str, str]) -> tuple:
+        return tuple(str(rotulos.get(nome, '')) for nome in self.rotulos)
+
+    def _rotulos(self, chave: tuple) -> Dict[str, str]:
+        return dict(zip(self.rotulos, chave))
+
+    def amostras(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Linhas (sufixo do nome, rótulos, valor) para a exposição"""
+        raise NotImplementedError
+
+
+class Contador(_Metrica):
+    """Valor que só cresce"""
+
+    tipo = 'counter'
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        super().__init__(nome, ajuda, rotulos)
+        self._valores: Dict[tuple, float] = {}
+
+    def incrementar(self, valor: float = 1.0, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+    def amostras(self):
+        with self._lock:
+            return [('', self._rotulos(chave), valor) for chave, valor in self._valores.items()]
+
+
+class Medidor(_Metrica):
+    """Valor que sobe e desce (ex.: requisições em andamento)"""
+
+    tipo = 'gauge'
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        super().__init__(nome, ajuda, rotulos)
+        self._valores: Dict[tuple, float] = {}
+
+    def incrementar(self, valor: float = 1.0, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+    def decrementar(self, valor: float = 1.0, **rotulos):
+        self.incrementar(-valor, **rotulos)
+
+    def definir(self, valor: float, **rotulos):
+        with self._lock:
+            self._valores[self._chave(rotulos)] = valor
+
+    def amostras(self):
+        with self._lock:
+            return [('', self._rotulos(chave), valor) for chave, valor in self._valores.items()]
+
+
+class Histograma(_Metrica):
+    """
+    Distribuição de observações em faixas cumulativas (le = limite superior)
+    """
+
+    tipo = 'histogram'
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = (),
+                 limites: Sequence[float] = LIMITES_LATENCIA):
+        super().__init__(nome, ajuda, rotulos)
+        self.limites = tuple(sorted(limites))
+        # chave -> [contagens por faixa (+Inf no fim), soma]
+        self._series: Dict[tuple, list] = {}
+
+    def observar(self, valor: float, **rotulos):
+        chave = self._chave(rotulos)
+        faixa = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * (len(self.limites) + 1), 0.0]
+            serie[0][faixa] += 1
+            serie[1] += valor
+
+    def amostras(self):
+        with self._lock:
+            series = [(chave, list(contagens), soma) for chave, (contagens, soma) in self._series.items()]
+        linhas = []
+        for chave, contagens, soma in series:
+            rotulos = self._rotulos(chave)
+            acumulado = 0
+            for limite, contagem in zip(self.limites + (math.inf,), contagens):
+                acumulado += contagem
+                linhas.append(('_bucket', {**rotulos, 'le': _formatar_valor(limite)}, acumulado))
+            linhas.append(('_sum', rotulos, soma))
+            linhas.append(('_count', rotulos, acumulado))
+        return linhas
+
+
+class MetricaColetada:
+    """
+    Métrica lida de outro objeto no momento da exportação
+
+    Usada para estado que já é mantido em outro lugar (tamanho do store,
+    contadores do cache), evitando duplicar a contabilidade.
+    """
+
+    def __init__(self, nome: str, tipo: str, ajuda: str, amostras: Iterable[Amostra]):
+        self.nome = nome
+        self.tipo = tipo
+        self.ajuda = ajuda
+        self._amostras = list(amostras)
+
+    def amostras(self):
+        return [('', rotulos, valor) for rotulos, valor in self._amostras]
+
+
+class RegistroMetricas:
+    """
+    Conjunto de métricas do processo e coletores chamados na exportação
+    """
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+        self._coletores: List[Callable[[], Iterable[MetricaColetada]]] = []
+        self._lock = threading.Lock()
+
+    def _registrar(self, classe, nome: str, *args, **kwargs):
+        with self._lock:
+            metrica = self._metricas.get(nome)
+            if metrica is None:
+                metrica = self._metricas[nome] = classe(nome, *args, **kwargs)
+            elif not isinstance(metrica, classe):
+                raise ValueError(f'Métrica {nome} já registrada como {metrica.tipo}')
+            return metrica
+
+    def contador(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Contador:
+        """Contador registrado com este nome (criado na primeira chamada)"""
+        return self._registrar(Contador, nome, ajuda, rotulos)
+
+    def medidor(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Medidor:
+        """Medidor registrado com este nome (criado na primeira chamada)"""
+        return self._registrar(Medidor, nome, ajuda, rotulos)
+
+    def histograma(self, nome: str, ajuda: str, rotulos: Sequence[str] = (),
+                   limites: Sequence[float] = LIMITES_LATENCIA) -> Histograma:
+        """Histograma registrado com este nome (criado na primeira chamada)"""
+        return self._registrar(Histograma, nome, ajuda, rotulos, limites=limites)
+
+    def coletor(self, funcao: Callable[[], Iterable[MetricaColetada]]):
+        """Registra uma função chamada a cada exportação"""
+        with self._lock:
+            self._coletores.append(funcao)
+
+    def exportar(self) -> str:
+        """
+        Todas as métricas, incluindo as dos coletores, no formato de texto
+
+        Returns:
+            Texto com HELP, TYPE e amostras de cada métrica
+        """
+        with self._lock:
+            metricas = list(self._metricas.values())
+            funcoes = list(self._coletores)
+        for funcao in funcoes:
+            metricas.extend(funcao())
+
+        linhas = []
+        for metrica in metricas:
+            linhas.append(f'# HELP {metrica.nome} {metrica.ajuda}')
+            linhas.append(f'# TYPE {metrica.nome} {metrica.tipo}')
+            for sufixo, rotulos, valor in metrica.amostras():
+                linhas.append(f'{metrica.nome}{sufixo}{_formatar_rotulos(rotulos)} {_formatar_valor(valor)}')
+        return '\n'.join(linhas) + '\n'
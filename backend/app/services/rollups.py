@@ -0,0 +1,471 @@
+"""
+Agregados mensais materializados no armazenamento dos dados
+"""
+
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.columnar_store import ColumnarStore, ColunaCategorica
+
+
+# Métrica da API -> coluna do store
+METRICAS = {
+    'ana': 'PROJETADO_ANALITICO',
+    'mer': 'PROJETADO_MERCADO',
+    'ajs': 'PROJETADO_AJUSTADO',
+    'rlzd': 'CURVA_REALIZADO',
+}
+
+# Dimensão da API -> coluna do store
+DIMENSOES = {
+    'cliente': 'TIPO_CLIENTE',
+    'categoria': 'CATEGORIA',
+    'produto': 'PRODUTO',
+}
+
+_MESES = {'JAN': 1, 'FEV': 2, 'MAR': 3, 'ABR': 4, 'MAI': 5, 'JUN': 6,
+          'JUL': 7, 'AGO': 8, 'SET': 9, 'OUT': 10, 'NOV': 11, 'DEZ': 12}
+
+TODOS = 'todos'
+
+
+def normalizar_texto(valor) -> str:
+    """Texto sem acentos, minúsculo e sem espaços nas pontas (igual ao frontend)"""
+    if valor is None:
+        return ''
+    texto = unicodedata.normalize('NFKD', str(valor))
+    texto = ''.join(ch for ch in texto if not unicodedata.combining(ch))
+    return texto.strip().lower()
+
+
+def mes_para_numero(valor) -> int:
+    """Número do mês (1-12) a partir de nome ou número; 0 se inválido"""
+    texto = str(valor).strip()
+    try:
+        numero = int(float(texto))
+        return numero if 1 <= numero <= 12 else 0
+    except ValueError:
+        return _MESES.get(texto.upper()[:3], 0)
+
+
+def ano_para_numero(valor) -> int:
+    """Ano como inteiro; 0 se inválido"""
+    try:
+        return int(float(str(valor).strip()))
+    except ValueError:
+        return 0
+
+
+class Dimensao:
+    """
+    Agrupamento dos valores de uma coluna pelo texto normalizado
+    """
+
+    __slots__ = ('rotulos', 'posicoes')
+
+    def __init__(self, rotulos: List[str], posicoes: Dict[str, int]):
+        self.rotulos = rotulos
+        self.posicoes = posicoes
+
+    @classmethod
+    def construir(cls, coluna: Optional[ColunaCategorica], total_linhas: int) -> Tuple['Dimensao', np.ndarray]:
+        """
+        Mapeia cada linha para o id do grupo do seu valor normalizado
+
+        Args:
+            coluna: Coluna categórica (None se a coluna não existe no store)
+            total_linhas: Linhas do store
+
+        Returns:
+            Tupla (dimensão, id do grupo por linha)
+        """
+        if coluna is None:
+            return cls([''], {'': 0}), np.zeros(total_linhas, dtype=np.int64)
+
+        rotulos: List[str] = []
+        posicoes: Dict[str, int] = {}
+        remapeamento = np.empty(len(coluna.valores), dtype=np.int64)
+        for codigo, valor in enumerate(coluna.valores):
+            chave = normalizar_texto(valor)
+            if chave not in posicoes:
+                posicoes[chave] = len(rotulos)
+                rotulos.append(valor)
+            remapeamento[codigo] = posicoes[chave]
+        return cls(rotulos, posicoes), remapeamento[coluna.codigos]
+
+    def buscar(self, valor: str) -> Optional[int]:
+        """Id do grupo correspondente ao valor, se existir"""
+        return self.posicoes.get(normalizar_texto(valor))
+
+
+def _serie_12(valores) -> List[float]:
+    """Converte um array de 12 posições para lista de floats"""
+    return [float(v) for v in valores]
+
+
+def mascarar_zeros_finais(valores: List[float]) -> List[Optional[float]]:
+    """Troca por None os zeros após o último valor não nulo (quebra a linha no gráfico)"""
+    ultimo = max((i for i, v in enumerate(valores) if v != 0.0), default=-1)
+    if ultimo < 0:
+        return valores
+    return valores[:ultimo + 1] + [None if v == 0.0 else v for v in valores[ultimo + 1:]]
+
+
+class NivelRollup:
+    """
+    Células de um nível do cubo: chave por dimensão + soma por métrica
+    """
+
+    __slots__ = ('chaves', 'somas')
+
+    def __init__(self, chaves: Dict[str, np.ndarray], somas: Dict[str, np.ndarray]):
+        self.chaves = chaves
+        self.somas = somas
+
+    @classmethod
+    def agregar(cls, chaves: Dict[str, np.ndarray], somas: Dict[str, np.ndarray],
+                nomes: Tuple[str, ...]) -> 'NivelRollup':
+        """
+        Soma as células de um nível mais fino mantendo só as chaves `nomes`
+
+        Args:
+            chaves: Chaves das células do nível mais fino
+            somas: Somas das células do nível mais fino
+            nomes: Dimensões mantidas no novo nível
+
+        Returns:
+            Nível agregado (custo proporcional ao número de células)
+        """
+        if not len(chaves[nomes[0]]):
+            return cls({n: np.empty(0, dtype=np.int64) for n in nomes}, {m: np.empty(0) for m in METRICAS})
+
+        # Chave linear (base mista) sobre os valores distintos de cada dimensão
+        distintos = []
+        chave = np.zeros(len(chaves[nomes[0]]), dtype=np.int64)
+        for nome in nomes:
+            valores, posicao = np.unique(chaves[nome], return_inverse=True)
+            distintos.append(valores)
+            chave = chave * len(valores) + posicao.ravel()
+        celulas, inverso = np.unique(chave, return_inverse=True)
+        partes = np.unravel_index(celulas, [len(valores) for valores in distintos])
+        return cls(
+            {nome: distintos[i][partes[i]].astype(np.int64) for i, nome in enumerate(nomes)},
+            {m: np.bincount(inverso.ravel(), weights=somas[m], minlength=len(celulas)) for m in METRICAS}
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelas chaves e somas do nível"""
+        return (sum(int(a.nbytes) for a in self.chaves.values())
+                + sum(int(a.nbytes) for a in self.somas.values()))
+
+
+class Rollups:
+    """
+    Cubo de somas por (cliente, categoria, produto, ano, mês)
+
+    Construído uma vez por versão dos dados; as consultas agregam apenas as
+    células do cubo, cujo tamanho independe do número de linhas enviadas.
+    Junto com o cubo ficam materializados os níveis (ano, mês, categoria) e
+    (ano, categoria), usados quando a seleção não filtra cliente nem
+    produto, e os metadados do conjunto (categorias e período).
+    """
+
+    def __init__(self, dimensoes: Dict[str, Dimensao], chaves: Dict[str, np.ndarray],
+                 somas: Dict[str, np.ndarray]):
+        self.dimensoes = dimensoes
+        self.chaves = chaves
+        self.somas = somas
+        # Níveis derivados das células (não das linhas), então construir e
+        # combinar continuam proporcionais ao tamanho do cubo
+        self.por_categoria_mes = NivelRollup.agregar(chaves, somas, ('categoria', 'ano', 'mes'))
+        self.por_categoria_ano = NivelRollup.agregar(chaves, somas, ('categoria', 'ano'))
+        self.metadados = self._extrair_metadados()
+
+    def _extrair_metadados(self) -> Dict:
+        """Categorias presentes (rótulo da primeira ocorrência), anos e período"""
+        categorias = np.unique(self.por_categoria_ano.chaves['categoria'])
+        anos = [int(a) for a in np.unique(self.por_categoria_ano.chaves['ano'])]
+        rotulos = self.dimensoes['categoria'].rotulos
+        return {
+            'categorias': [rotulos[c] for c in categorias],
+            'anos': anos,
+            'periodo': {
+                'inicio': f'{anos[0]}' if anos else None,
+                'fim': f'{anos[-1]}' if anos else None
+            }
+        }
+
+    @classmethod
+    def construir(cls, store: ColumnarStore) -> 'Rollups':
+        """
+        Agrega o store no nível mais fino usado pelo frontend
+
+        Args:
+            store: Store colunar
+
+        Returns:
+            Cubo de agregados
+        """
+        total = len(store)
+        dimensoes = {}
+        grupos = {}
+        for dimensao, coluna in DIMENSOES.items():
+            dimensoes[dimensao], grupos[dimensao] = Dimensao.construir(store.categoricas.get(coluna), total)
+
+        if total == 0 or 'MES' not in store.categoricas or 'ANO' not in store.categoricas:
+            vazio = np.empty(0, dtype=np.int64)
+            return cls(dimensoes, {d: vazio for d in (*DIMENSOES, 'ano', 'mes')},
+                       {m: np.empty(0) for m in METRICAS})
+
+        mes_col = store.categoricas['MES']
+        ano_col = store.categoricas['ANO']
+        meses = np.array([mes_para_numero(v) for v in mes_col.valores], dtype=np.int64)[mes_col.codigos]
+        anos = np.array([ano_para_numero(v) for v in ano_col.valores], dtype=np.int64)[ano_col.codigos]
+
+        validas = (meses >= 1) & (anos > 0)
+        anos_unicos, ano_idx = np.unique(anos[validas], return_inverse=True)
+
+        # Chave linear das células do cubo
+        chave = np.zeros(int(validas.sum()), dtype=np.int64)
+        tamanhos = []
+        for dimensao in DIMENSOES:
+            n = len(dimensoes[dimensao].rotulos)
+            chave = chave * n + grupos[dimensao][validas]
+            tamanhos.append(n)
+        chave = (chave * len(anos_unicos) + ano_idx) * 12 + (meses[validas] - 1)
+        tamanhos += [len(anos_unicos), 12]
+
+        celulas, inverso = np.unique(chave, return_inverse=True)
+        somas = {
+            metrica: np.bincount(inverso, weights=store.valores[coluna][validas], minlength=len(celulas))
+            if coluna in store.valores else np.zeros(len(celulas))
+            for metrica, coluna in METRICAS.items()
+        }
+
+        partes = np.unravel_index(celulas, tamanhos)
+        chaves = {dimensao: partes[i].astype(np.int64) for i, dimensao in enumerate(DIMENSOES)}
+        chaves['ano'] = anos_unicos[partes[-2]]
+        chaves['mes'] = partes[-1].astype(np.int64) + 1
+        return cls(dimensoes, chaves, somas)
+
+    def combinar(self, delta: 'Rollups') -> 'Rollups':
+        """
+        Novo cubo somando as células de outro cubo a este
+
+        Usado em upserts: `delta` é o cubo das diferenças (valor novo menos
+        antigo nas linhas atualizadas e valor cheio nas inseridas), então o
+        custo depende do número de células, não de linhas. Rótulos novos são
+        acrescentados às dimensões; este cubo não é alterado.
+
+        Args:
+            delta: Cubo com as diferenças
+
+        Returns:
+            Cubo combinado
+        """
+        if delta.total_celulas == 0:
+            return self
+
+        dimensoes = {}
+        chaves_delta = {}
+        for dimensao in DIMENSOES:
+            base = self.dimensoes[dimensao]
+            rotulos, posicoes = list(base.rotulos), dict(base.posicoes)
+            remapeamento = np.empty(len(delta.dimensoes[dimensao].rotulos), dtype=np.int64)
+            for grupo, rotulo in enumerate(delta.dimensoes[dimensao].rotulos):
+                chave = normalizar_texto(rotulo)
+                if chave not in posicoes:
+                    posicoes[chave] = len(rotulos)
+                    rotulos.append(rotulo)
+                remapeamento[grupo] = posicoes[chave]
+            dimensoes[dimensao] = Dimensao(rotulos, posicoes)
+            chaves_delta[dimensao] = remapeamento[delta.chaves[dimensao]]
+        chaves_delta['ano'] = delta.chaves['ano']
+        chaves_delta['mes'] = delta.chaves['mes']
+
+        nomes = (*DIMENSOES, 'ano', 'mes')
+        empilhadas = np.stack([np.concatenate((self.chaves[n], chaves_delta[n])) for n in nomes], axis=1)
+        celulas, inverso = np.unique(empilhadas, axis=0, return_inverse=True)
+        inverso = inverso.ravel()
+        somas = {
+            metrica: np.bincount(inverso, weights=np.concatenate((self.somas[metrica], delta.somas[metrica])),
+                                 minlength=len(celulas))
+            for metrica in METRICAS
+        }
+        chaves = {nome: celulas[:, i].astype(np.int64) for i, nome in enumerate(nomes)}
+        return Rollups(dimensoes, chaves, somas)
+
+    @property
+    def total_celulas(self) -> int:
+        """Número de células não vazias do cubo"""
+        return len(self.chaves['mes'])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados pelas chaves e somas do cubo e dos níveis derivados"""
+        return (sum(int(a.nbytes) for a in self.chaves.values())
+                + sum(int(a.nbytes) for a in self.somas.values())
+                + self.por_categoria_mes.nbytes + self.por_categoria_ano.nbytes)
+
+    def anos(self) -> List[int]:
+        """Anos presentes no cubo, ordenados"""
+        return list(self.metadados['anos'])
+
+    def totais_anuais(self, categoria: Optional[str] = None) -> Dict[int, Dict[str, float]]:
+        """
+        Totais por ano de cada métrica, do nível (ano, categoria)
+
+        Args:
+            categoria: Categoria (None ou 'Todos' = todas)
+
+        Returns:
+            Dicionário ano -> {métrica: total}
+        """
+        nivel = self.por_categoria_ano
+        mascara = self._mascara(nivel, {'categoria': categoria})
+        anos = nivel.chaves['ano'][mascara]
+        unicos, inverso = np.unique(anos, return_inverse=True)
+        somas = {m: np.bincount(inverso, weights=nivel.somas[m][mascara], minlength=len(unicos))
+                 for m in METRICAS}
+        return {int(ano): {m: float(somas[m][i]) for m in METRICAS} for i, ano in enumerate(unicos)}
+
+    def _mascara(self, nivel, filtros: Dict[str, Optional[str]]) -> np.ndarray:
+        """Células do nível que atendem aos filtros por dimensão"""
+        mascara = np.ones(len(nivel.chaves['ano']), dtype=bool)
+        for dimensao, valor in filtros.items():
+            if valor is None or normalizar_texto(valor) in ('', TODOS):
+                continue
+            grupo = self.dimensoes[dimensao].buscar(valor)
+            if grupo is None:
+                mascara[:] = False
+                break
+            mascara &= nivel.chaves[dimensao] == grupo
+        return mascara
+
+    def contar_celulas(self, cliente: Optional[str] = None, categoria: Optional[str] = None,
+                       produto: Optional[str] = None, ano: Optional[int] = None) -> int:
+        """
+        Número de células do cubo que atendem a uma seleção
+
+        Args:
+            cliente: Tipo de cliente ('Todos' ou None = sem filtro)
+            categoria: Categoria (None = todas)
+            produto: Produto (None = todos)
+            ano: Ano (None = todos)
+
+        Returns:
+            Células com a seleção (0 se algum valor não existe no conjunto)
+        """
+        mascara = self._mascara(self, {'cliente': cliente, 'categoria': categoria, 'produto': produto})
+        if ano is not None:
+            mascara &= self.chaves['ano'] == ano
+        return int(mascara.sum())
+
+    def consultar(self, cliente: Optional[str] = None, categoria: Optional[str] = None,
+                  produto: Optional[str] = None, ano: Optional[int] = None,
+                  agrupar: Optional[str] = None, mascarar_zeros: bool = True,
+                  ano_min: Optional[int] = None, realizados: bool = False) -> Dict:
+        """
+        Curvas mensais (ano e ano anterior) de uma seleção
+
+        Args:
+            cliente: Tipo de cliente ('Todos' ou None = sem filtro)
+            categoria: Categoria (None = todas)
+            produto: Produto (None = todos)
+            ano: Ano de projeção (None = último ano da seleção)
+            agrupar: 'categoria' ou 'produto' para curvas por grupo
+            mascarar_zeros: Troca zeros finais do realizado por None
+            ano_min: Ignora as células de anos anteriores (None = todos)
+            realizados: Inclui o realizado mensal de cada ano da seleção
+
+        Returns:
+            Dicionário com ano, ano_anterior, curvas e (se pedidos) grupos
+            e realizados por ano
+        """
+        if agrupar and agrupar not in ('categoria', 'produto'):
+            raise ValueError(f'Agrupamento não suportado: {agrupar}')
+
+        # Sem filtro de cliente/produto, o nível (ano, mês, categoria) basta
+        filtros = {'cliente': cliente, 'categoria': categoria, 'produto': produto}
+        fino = agrupar == 'produto' or any(
+            valor is not None and normalizar_texto(valor) not in ('', TODOS)
+            for valor in (cliente, produto)
+        )
+        nivel = self if fino else self.por_categoria_mes
+        if not fino:
+            del filtros['cliente'], filtros['produto']
+        mascara = self._mascara(nivel, filtros)
+        if ano_min is not None:
+            mascara &= nivel.chaves['ano'] >= ano_min
+
+        if ano is None:
+            anos_sel = nivel.chaves['ano'][mascara]
+            ano = int(anos_sel.max()) if len(anos_sel) else None
+
+        resultado = {
+            'ano': ano,
+            'ano_anterior': ano - 1 if ano is not None else None,
+            'curvas': self._curvas(nivel, mascara, ano, None, 0, mascarar_zeros)
+        }
+
+        if agrupar:
+            rotulos = self.dimensoes[agrupar].rotulos
+            resultado['grupos'] = {
+                rotulos[g]: self._curvas(nivel, mascara, ano, agrupar, g, mascarar_zeros)
+                for g in self._grupos_presentes(nivel, mascara, ano, agrupar)
+            }
+
+        if realizados:
+            resultado['realizados'] = self._realizados_por_ano(nivel, mascara, mascarar_zeros)
+
+        return resultado
+
+    @staticmethod
+    def _realizados_por_ano(nivel, mascara: np.ndarray, mascarar_zeros: bool) -> Dict[int, List]:
+        """Série de 12 meses do realizado para cada ano com células na seleção"""
+        anos = nivel.chaves['ano'][mascara]
+        unicos, inverso = np.unique(anos, return_inverse=True)
+        posicoes = inverso.ravel() * 12 + nivel.chaves['mes'][mascara] - 1
+        somas = np.bincount(posicoes, weights=nivel.somas['rlzd'][mascara],
+                            minlength=len(unicos) * 12).reshape(-1, 12)
+        resultado = {}
+        for i, ano in enumerate(unicos):
+            serie = _serie_12(somas[i])
+            resultado[int(ano)] = mascarar_zeros_finais(serie) if mascarar_zeros else serie
+        return resultado
+
+    @staticmethod
+    def _grupos_presentes(nivel, mascara: np.ndarray, ano: Optional[int], dimensao: str) -> List[int]:
+        """Grupos com células no ano ou no ano anterior, na ordem de primeira ocorrência"""
+        if ano is None:
+            return []
+        anos = nivel.chaves['ano']
+        sel = mascara & ((anos == ano) | (anos == ano - 1))
+        grupos = nivel.chaves[dimensao][sel]
+        _, primeiros = np.unique(grupos, return_index=True)
+        return [int(g) for g in grupos[np.sort(primeiros)]]
+
+    @staticmethod
+    def _curvas(nivel, mascara: np.ndarray, ano: Optional[int], dimensao: Optional[str],
+                grupo: int, mascarar_zeros: bool) -> Dict:
+        """Séries de 12 meses das métricas para o ano e o ano anterior"""
+        if dimensao is not None:
+            mascara = mascara & (nivel.chaves[dimensao] == grupo)
+
+        def series(alvo: Optional[int]) -> Dict[str, List[float]]:
+            if alvo is None:
+                return {m: [0.0] * 12 for m in METRICAS}
+            sel = mascara & (nivel.chaves['ano'] == alvo)
+            meses = nivel.chaves['mes'][sel] - 1
+            return {
+                m: _serie_12(np.bincount(meses, weights=nivel.somas[m][sel], minlength=12))
+                for m in METRICAS
+            }
+
+        atual = series(ano)
+        if mascarar_zeros:
+            atual['rlzd'] = mascarar_zeros_finais(atual['rlzd'])
+        return {**atual, 'prev': series(ano - 1 if ano is not None else None)}
@@ -0,0 +1,119 @@
+"""
+Serialização de resultados (Arrow IPC, Parquet, NDJSON) a partir do store
+"""
+
+import io
+import json
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional
+    pa = None
+    pq = None
+
+from app.models import ProjecaoBatch
+
+
+MIME_ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+MIME_PARQUET = 'application/vnd.apache.parquet'
+MIME_NDJSON = 'application/x-ndjson'
+LINHAS_POR_LOTE = 64 * 1024
+LINHAS_POR_BLOCO_NDJSON = 1000
+
+
+def arrow_disponivel() -> bool:
+    """Indica se o pyarrow está instalado"""
+    return pa is not None
+
+
+def tabela_arrow(batch: ProjecaoBatch, colunas: Optional[List[str]] = None) -> 'pa.Table':
+    """
+    Monta uma tabela Arrow direto das colunas do batch
+
+    Colunas categóricas viram arrays de dicionário reaproveitando códigos e
+    tabela de valores; nenhuma linha é materializada como dicionário Python.
+
+    Args:
+        batch: Linhas selecionadas
+        colunas: Colunas a incluir (todas se None)
+
+    Returns:
+        Tabela Arrow
+    """
+    nomes = [c for c in batch.colunas if colunas is None or c in colunas]
+    arrays = []
+    for nome in nomes:
+        if nome in batch.store.valores:
+            arrays.append(pa.array(batch.valores(nome), type=pa.float64()))
+        else:
+            categorica = batch.categorica(nome)
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(categorica.codigos.astype(np.int32, copy=False)),
+                pa.array(categorica.valores, type=pa.string())
+            ))
+    return pa.Table.from_arrays(arrays, names=nomes)
+
+
+def gerar_arrow_stream(tabela: 'pa.Table', linhas_por_lote: int = LINHAS_POR_LOTE) -> Iterator[bytes]:
+    """
+    Serializa a tabela no formato Arrow IPC stream, lote a lote
+
+    Args:
+        tabela: Tabela Arrow
+        linhas_por_lote: Linhas por record batch
+
+    Yields:
+        Pedaços de bytes do stream (schema, lotes e marcador de fim)
+    """
+    buffer = io.BytesIO()
+
+    def esvaziar() -> bytes:
+        pedaco = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return pedaco
+
+    with pa.ipc.new_stream(buffer, tabela.schema) as escritor:
+        yield esvaziar()
+        for lote in tabela.to_batches(max_chunksize=linhas_por_lote):
+            escritor.write_batch(lote)
+            yield esvaziar()
+    yield esvaziar()
+
+
+def serializar_parquet(tabela: 'pa.Table') -> bytes:
+    """
+    Serializa a tabela em Parquet (o rodapé exige o arquivo completo)
+
+    Args:
+        tabela: Tabela Arrow
+
+    Returns:
+        Bytes do arquivo Parquet
+    """
+    sink = pa.BufferOutputStream()
+    pq.write_table(tabela, sink, compression='snappy')
+    return sink.getvalue().to_pybytes()
+
+
+def gerar_ndjson(batch: ProjecaoBatch, linhas_por_bloco: int = LINHAS_POR_BLOCO_NDJSON) -> Iterator[bytes]:
+    """
+    Serializa linhas como NDJSON (um objeto JSON por linha), bloco a bloco
+
+    Só um bloco de linhas é materializado por vez, então memória e tempo
+    até o primeiro byte não dependem do tamanho do resultado.
+
+    Args:
+        batch: Linhas a enviar
+        linhas_por_bloco: Linhas materializadas por iteração
+
+    Yields:
+        Pedaços de bytes com linhas completas
+    """
+    for inicio in range(0, len(batch), linhas_por_bloco):
+        registros = batch.fatiar(inicio, inicio + linhas_por_bloco).to_records()
+        yield ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in registros).encode('utf-8')
@@ -0,0 +1,47 @@
+"""
+Versão imutável do conjunto de dados publicada para os leitores
+"""
+
+from typing import Optional
+
+from app.services.columnar_store import ColumnarStore
+from app.services.indices import IndicesDados
+from app.services.rollups import Rollups
+
+
+class SnapshotDados:
+    """
+    Store, índices e agregados de uma mesma versão do conjunto de dados
+
+    Os leitores pegam a referência do snapshot atual uma vez por requisição
+    e usam só ela; escritores constroem um snapshot novo e trocam a
+    referência de uma vez (atribuição atômica). Assim nenhuma leitura mistura
+    partes de versões diferentes. Os arrays do store são marcados como
+    somente leitura para que nenhum caminho altere um snapshot publicado.
+    """
+
+    __slots__ = ('store', 'indices', 'rollups', 'versao_dataset')
+
+    def __init__(self, store: ColumnarStore, versao_dataset: int,
+                 indices: Optional[IndicesDados] = None, rollups: Optional[Rollups] = None):
+        """
+        Args:
+            store: Store colunar (não deve ser alterado depois)
+            versao_dataset: Versão em que o conjunto de dados foi gravado
+            indices: Índices do store (construídos se None)
+            rollups: Agregados do store (construídos se None)
+        """
+        for arr in store.valores.values():
+            arr.flags.writeable = False
+        for coluna in store.categoricas.values():
+            coluna.codigos.flags.writeable = False
+
+        self.store = store
+        self.indices = indices if indices is not None else IndicesDados.construir(store)
+        self.rollups = rollups if rollups is not None else Rollups.construir(store)
+        self.versao_dataset = versao_dataset
+
+    @classmethod
+    def vazio(cls) -> 'SnapshotDados':
+        """Snapshot sem registros (versão 0)"""
+        return cls(ColumnarStore.vazio(), 0)
@@ -0,0 +1,177 @@
+"""
+Mesclagem incremental (upsert) de um upload no store colunar atual
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.services.columnar_store import ColumnarStore, ColunaCategorica
+from app.services.indices import normalizar_valor
+
+
+# Colunas que identificam uma linha no upsert
+CHAVE_UPSERT = ['ANO', 'MES', 'CATEGORIA', 'PRODUTO', 'TIPO_CLIENTE']
+
+# Acima desta cardinalidade a chave linear é recompactada com np.unique
+_LIMITE_CHAVE_LINEAR = 1 << 40
+
+
+class ResultadoUpsert:
+    """
+    Resultado de `mesclar`: novo store, linhas alteradas e contagens
+    """
+
+    __slots__ = ('store', 'delta', 'inicio_insercao', 'linhas_alteradas',
+                 'inseridos', 'atualizados', 'inalterados', 'duplicados')
+
+    def __init__(self, store: ColumnarStore, delta: Optional[ColumnarStore], inicio_insercao: int,
+                 linhas_alteradas: np.ndarray, inseridos: int, atualizados: int,
+                 inalterados: int, duplicados: int):
+        self.store = store
+        self.delta = delta
+        self.inicio_insercao = inicio_insercao
+        self.linhas_alteradas = linhas_alteradas
+        self.inseridos = inseridos
+        self.atualizados = atualizados
+        self.inalterados = inalterados
+        self.duplicados = duplicados
+
+    @property
+    def alterado(self) -> bool:
+        """Alguma linha foi inserida ou atualizada"""
+        return bool(self.inseridos or self.atualizados)
+
+    def contagens(self) -> Dict[str, int]:
+        """Contagens no formato da API"""
+        return {
+            'inseridos': self.inseridos,
+            'atualizados': self.atualizados,
+            'inalterados': self.inalterados,
+            'duplicados': self.duplicados,
+        }
+
+
+def _chaves(atual: ColumnarStore, novo: ColumnarStore) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Chave inteira por linha dos dois stores, comparando texto normalizado
+
+    Returns:
+        Tupla (chaves do store atual, chaves do store novo)
+    """
+    total_atual = len(atual)
+    chave = np.zeros(total_atual + len(novo), dtype=np.int64)
+    cardinalidade = 1
+    for coluna in CHAVE_UPSERT:
+        if coluna not in atual.categoricas:
+            continue
+        posicoes = {}
+        partes = []
+        for categorica in (atual.categoricas[coluna], novo.categoricas[coluna]):
+            remapeamento = np.array(
+                [posicoes.setdefault(normalizar_valor(v), len(posicoes)) for v in categorica.valores],
+                dtype=np.int64
+            )
+            partes.append(remapeamento[categorica.codigos] if len(categorica.codigos) else
+                          np.empty(0, dtype=np.int64))
+        chave = chave * len(posicoes) + np.concatenate(partes)
+        cardinalidade *= max(len(posicoes), 1)
+        if cardinalidade > _LIMITE_CHAVE_LINEAR:
+            _, chave = np.unique(chave, return_inverse=True)
+            chave = chave.ravel().astype(np.int64)
+            cardinalidade = int(chave.max()) + 1 if len(chave) else 1
+    return chave[:total_atual], chave[total_atual:]
+
+
+def _ultima_ocorrencia(chaves: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Chaves distintas ordenadas e a posição da última linha de cada uma
+    """
+    invertidas = chaves[::-1]
+    unicas, primeira_invertida = np.unique(invertidas, return_index=True)
+    return unicas, len(chaves) - 1 - primeira_invertida
+
+
+def mesclar(atual: ColumnarStore, novo: ColumnarStore) -> ResultadoUpsert:
+    """
+    Mescla as linhas de `novo` em `atual` pela chave CHAVE_UPSERT
+
+    Linhas cuja chave não existe são anexadas ao fim; linhas com chave
+    existente atualizam a última linha atual com essa chave, se algum valor
+    mudou. Se a chave se repete no upload, vale a última ocorrência. Nenhum
+    store é alterado: o resultado traz um store novo em que as linhas
+    antigas mantêm a posição, o que permite atualizar índices e agregados
+    de forma incremental.
+
+    Args:
+        atual: Store ativo
+        novo: Store validado do upload
+
+    Returns:
+        Resultado com store, store de diferenças para os agregados e contagens
+
+    Raises:
+        ValueError: Se as colunas do upload diferirem das do store atual
+    """
+    if set(novo.ordem_colunas) != set(atual.ordem_colunas):
+        raise ValueError(
+            'Colunas do upload diferem do conjunto atual: '
+            f'{", ".join(sorted(set(novo.ordem_colunas) ^ set(atual.ordem_colunas)))}'
+        )
+
+    total = len(atual)
+    chaves_atual, chaves_novo = _chaves(atual, novo)
+
+    # Última ocorrência de cada chave no upload, na ordem do arquivo
+    _, linhas_novo = _ultima_ocorrencia(chaves_novo)
+    linhas_novo = np.sort(linhas_novo)
+    duplicados = len(novo) - len(linhas_novo)
+
+    unicas_atual, ultima_atual = _ultima_ocorrencia(chaves_atual)
+    chaves_sel = chaves_novo[linhas_novo]
+    posicao = np.searchsorted(unicas_atual, chaves_sel)
+    existe = posicao < len(unicas_atual)
+    existe[existe] = unicas_atual[posicao[existe]] == chaves_sel[existe]
+
+    candidatos = linhas_novo[existe]
+    alvos = ultima_atual[posicao[existe]]
+    mudou = np.zeros(len(candidatos), dtype=bool)
+    for coluna, valores in atual.valores.items():
+        mudou |= valores[alvos] != novo.valores[coluna][candidatos]
+    for coluna, categorica in atual.categoricas.items():
+        mudou |= categorica.decodificar(alvos) != novo.categoricas[coluna].decodificar(candidatos)
+
+    atualizar_novo, atualizar_alvo = candidatos[mudou], alvos[mudou]
+    inserir = linhas_novo[~existe]
+    inalterados = int(len(candidatos) - mudou.sum())
+
+    if not len(atualizar_novo) and not len(inserir):
+        return ResultadoUpsert(atual, None, total, np.empty(0, dtype=np.int64),
+                               0, 0, inalterados, duplicados)
+
+    # Anexa atualizadas + inseridas (unificando tabelas), copia as
+    # atualizadas para suas posições e descarta o trecho auxiliar
+    mudancas = novo.selecionar(np.concatenate((atualizar_novo, inserir)))
+    combinado = ColumnarStore.concatenar([atual, mudancas])
+    qtd_atualizar = len(atualizar_novo)
+    manter = np.concatenate((np.arange(total), np.arange(total + qtd_atualizar, len(combinado))))
+
+    def reposicionar(arr: np.ndarray) -> np.ndarray:
+        arr[atualizar_alvo] = arr[total:total + qtd_atualizar]
+        return arr[manter]
+
+    valores = {coluna: reposicionar(arr) for coluna, arr in combinado.valores.items()}
+    categoricas = {
+        coluna: ColunaCategorica(reposicionar(c.codigos), c.valores)
+        for coluna, c in combinado.categoricas.items()
+    }
+    store = ColumnarStore(valores, categoricas, list(atual.ordem_colunas))
+
+    # Diferenças para os agregados: novo - antigo nas atualizadas, valor cheio nas inseridas
+    linhas_alteradas = np.concatenate((atualizar_alvo, np.arange(total, len(store))))
+    delta = store.selecionar(linhas_alteradas)
+    for coluna, arr in delta.valores.items():
+        arr[:qtd_atualizar] -= atual.valores[coluna][atualizar_alvo]
+
+    return ResultadoUpsert(store, delta, total, linhas_alteradas,
+                           len(inserir), qtd_atualizar, inalterados, duplicados)
@@ -0,0 +1,229 @@
+"""
+Latência, vazão e memória das rotas principais pelo cliente de teste do Flask
+
+Gera um conjunto com data/raw/generate_mock_data.py, envia a planilha por
+/api/data/upload e mede, por cenário, p50/p95/p99, vazão e o pico de RSS do
+processo:
+
+- upload_dados: POST /upload da planilha (cache de uploads limpo a cada envio)
+- obter_dados: GET /dados com uma mistura de filtros típicos
+- criar_simulacao: POST /simulacao com uma curva ajustada por categoria
+- criar_simulacoes_lote: as mesmas curvas em lotes de 200 por POST /simulacoes/batch
+- obter_simulacoes_usuario: GET /simulacoes/<usuario> (primeira página, resumo)
+
+O resultado vai para um JSON (por padrão em benchmarks/resultados/, fora do
+controle de versão); com --comparar, imprime a variação de cada cenário em
+relação a um resultado anterior.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_api --categorias 8 --produtos 20 --tipos-cliente 4 --anos 3 \\
+        --saida resultado.json --comparar base.json
+"""
+
+import argparse
+import importlib.util
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from app import create_app
+from app.routes.data_routes import data_service
+
+# Diretório padrão dos resultados (ignorado pelo git)
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+
+_GERADOR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'raw', 'generate_mock_data.py')
+
+
+def carregar_gerador():
+    """Módulo data/raw/generate_mock_data.py (fora do pacote do backend)"""
+    spec = importlib.util.spec_from_file_location('generate_mock_data', _GERADOR)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def pico_rss_mb():
+    """Pico de RSS do processo até agora, em MB (Linux: ru_maxrss em KB)"""
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def medir(requisicoes, executar) -> dict:
+    """
+    Executa as requisições em sequência e resume as latências
+
+    Args:
+        requisicoes: Argumentos de cada requisição
+        executar: Função que recebe os argumentos e devolve a resposta
+
+    Returns:
+        Dicionário com contagem, erros, percentis (ms), vazão e pico de RSS
+    """
+    latencias = []
+    erros = 0
+    inicio = time.perf_counter()
+    for argumentos in requisicoes:
+        antes = time.perf_counter()
+        resposta = executar(argumentos)
+        latencias.append((time.perf_counter() - antes) * 1000)
+        erros += resposta.status_code >= 400 or not (resposta.get_json(silent=True) or {}).get('sucesso', True)
+    duracao = time.perf_counter() - inicio
+
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+    return {
+        'requisicoes': len(latencias),
+        'erros': int(erros),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'media_ms': round(float(np.mean(latencias)), 3),
+        'vazao_rps': round(len(latencias) / duracao, 1) if duracao > 0 else None,
+        'pico_rss_mb': pico_rss_mb(),
+    }
+
+
+def misturar_filtros(df, quantidade: int, seed: int = 0) -> list:
+    """Query strings de /dados: sem filtro, uma categoria, categoria + ano, várias categorias + mês..."""
+    rng = np.random.default_rng(seed)
+    categorias = sorted(df['CATEGORIA'].unique())
+    anos = sorted(df['ANO'].unique())
+    meses = list(df['MES'].unique())
+    produtos = sorted(df['PRODUTO'].unique()) if 'PRODUTO' in df else []
+    modelos = [
+        lambda: 'limit=100',
+        lambda: f'categoria={rng.choice(categorias)}&limit=500',
+        lambda: f'categoria={rng.choice(categorias)}&ano={rng.choice(anos)}',
+        lambda: f'categoria={",".join(rng.choice(categorias, 2, replace=False))}&mes={rng.choice(meses)}',
+    ]
+    if produtos:
+        modelos.append(lambda: f'categoria={rng.choice(categorias)}&produto={rng.choice(produtos)}')
+    return [modelos[i % len(modelos)]() for i in range(quantidade)]
+
+
+def comparar(atual: dict, anterior: dict):
+    """Imprime a variação de p50/p95/vazão por cenário"""
+    print('\nvariação em relação ao resultado anterior:')
+    for cenario, medidas in atual['cenarios'].items():
+        base = anterior.get('cenarios', {}).get(cenario)
+        if not base:
+            continue
+        partes = []
+        for chave in ('p50_ms', 'p95_ms', 'vazao_rps'):
+            if base.get(chave) and medidas.get(chave) is not None:
+                partes.append(f'{chave} {(medidas[chave] / base[chave] - 1) * 100:+.1f}%')
+        print(f'  {cenario:26s} {", ".join(partes)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--categorias', type=int, default=8)
+    parser.add_argument('--produtos', type=int, default=20)
+    parser.add_argument('--tipos-cliente', type=int, default=4)
+    parser.add_argument('--anos', type=int, default=3)
+    parser.add_argument('--uploads', type=int, default=3)
+    parser.add_argument('--consultas', type=int, default=500)
+    parser.add_argument('--simulacoes', type=int, default=500)
+    parser.add_argument('--usuarios', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--saida', default=os.path.join(DIRETORIO_RESULTADOS, 'bench_api.json'))
+    parser.add_argument('--comparar', default=None, help='JSON de uma execução anterior')
+    args = parser.parse_args()
+
+    gerador = carregar_gerador()
+    df = gerador.gerar_dados(args.categorias, args.produtos, args.tipos_cliente, args.anos, seed=args.seed)
+
+    app = create_app('testing')
+    cliente = app.test_client()
+    cenarios = {}
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        planilha = os.path.join(diretorio, 'projecoes.xlsx')
+        gerador.salvar(df, planilha)
+        with open(planilha, 'rb') as arquivo:
+            conteudo = arquivo.read()
+
+    def enviar(_):
+        data_service.cache_uploads.limpar()
+        return cliente.post('/api/data/upload', data={'arquivo': (io.BytesIO(conteudo), 'projecoes.xlsx')},
+                            content_type='multipart/form-data')
+
+    cenarios['upload_dados'] = medir(range(args.uploads), enviar)
+    cenarios['upload_dados']['linhas'] = len(df)
+    cenarios['upload_dados']['bytes_arquivo'] = len(conteudo)
+
+    consultas = misturar_filtros(df, args.consultas, args.seed)
+    cenarios['obter_dados'] = medir(consultas, lambda query: cliente.get(f'/api/data/dados?{query}'))
+
+    categorias = sorted(df['CATEGORIA'].unique())
+    curva = [{'DATA_COMPLETA': f'01/{mes:02d}/2024', 'PROJETADO_AJUSTADO': 1000.0 + mes} for mes in range(1, 13)]
+    corpos = [{
+        'usuario_id': f'usuario_{i % args.usuarios}',
+        'nome': f'Simulação {i}',
+        'dados_ajustados': [{**ponto, 'CATEGORIA': categorias[i % len(categorias)]} for ponto in curva],
+    } for i in range(args.simulacoes)]
+    cenarios['criar_simulacao'] = medir(corpos, lambda corpo: cliente.post('/api/data/simulacao', json=corpo))
+
+    # Mesmas curvas em lotes de 200 por /simulacoes/batch (delta sobre a curva analítica)
+    def curva_analitica(categoria):
+        return cliente.get(f'/api/data/agregados?categoria={categoria}').get_json()['curvas']['ana']
+
+    bases = {categoria: curva_analitica(categoria) for categoria in categorias}
+    itens = [{
+        'nome': corpo['nome'],
+        'selecao': {'categoria': corpo['dados_ajustados'][0]['CATEGORIA']},
+        'curva_ajustada': [v * 1.05 if m < 3 else v
+                           for m, v in enumerate(bases[corpo['dados_ajustados'][0]['CATEGORIA']])],
+    } for corpo in corpos]
+    lotes = [itens[i:i + 200] for i in range(0, len(itens), 200)]
+    cenarios['criar_simulacoes_lote'] = medir(
+        lotes, lambda lote: cliente.post('/api/data/simulacoes/batch',
+                                         json={'usuario_id': 'usuario_lote', 'simulacoes': lote})
+    )
+    cenarios['criar_simulacoes_lote']['simulacoes_por_requisicao'] = 200
+
+    usuarios = [f'usuario_{i % args.usuarios}' for i in range(args.consultas)]
+    cenarios['obter_simulacoes_usuario'] = medir(
+        usuarios, lambda usuario: cliente.get(f'/api/data/simulacoes/{usuario}?limit=20&resumo=1')
+    )
+
+    resultado = {
+        'data': datetime.now().isoformat(),
+        'ambiente': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'parametros': {**vars(args), 'linhas': len(df)},
+        'cenarios': cenarios,
+        'pico_rss_mb': pico_rss_mb(),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+    for cenario, medidas in cenarios.items():
+        print(f'{cenario:26s} p50 {medidas["p50_ms"]:9.2f} ms  p95 {medidas["p95_ms"]:9.2f} ms  '
+              f'p99 {medidas["p99_ms"]:9.2f} ms  {medidas["vazao_rps"]:8.1f} req/s  '
+              f'{medidas["erros"]} erros')
+    print(f'pico de RSS: {resultado["pico_rss_mb"]} MB -> {args.saida}')
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            comparar(resultado, json.load(arquivo))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Comparação de memória e latência: lista de dicionários x store colunar
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_armazenamento --linhas 300000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.services.columnar_store import ColumnarStore
+from app.services.data_service import DataService
+
+
+MESES = ['janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho',
+         'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro']
+
+
+def gerar_registros(total: int, categorias: int = 8, seed: int = 42):
+    """Gera registros sintéticos no formato processado pelo DataService"""
+    rng = np.random.default_rng(seed)
+    valores = rng.uniform(1000, 5000, size=(total, 4)).round(2)
+    registros = []
+    for i in range(total):
+        mes = i % 12
+        ano = 2024 + (i // 12) % 3
+        registros.append({
+            'DATA_COMPLETA': f'01/{mes + 1:02d}/{ano}',
+            'MES': MESES[mes],
+            'ANO': str(ano),
+            'CATEGORIA': f'Categoria {i % categorias}',
+            'CURVA_REALIZADO': float(valores[i, 0]),
+            'PROJETADO_ANALITICO': float(valores[i, 1]),
+            'PROJETADO_MERCADO': float(valores[i, 2]),
+            'PROJETADO_AJUSTADO': float(valores[i, 3]),
+        })
+    return registros
+
+
+def medir_memoria(construir):
+    """Bytes alocados (líquidos) pela estrutura retornada por `construir`"""
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.take_snapshot()
+    estrutura = construir()
+    depois = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in depois.compare_to(antes, 'filename'))
+    return estrutura, total
+
+
+def medir_latencia(funcao, repeticoes: int) -> float:
+    """Mediana do tempo de execução em milissegundos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return float(np.median(tempos))
+
+
+def filtrar_lista(registros, filtros):
+    """Implementação original de `obter_dados` sobre lista de dicionários"""
+    dados = registros
+    if 'categoria' in filtros:
+        dados = [d for d in dados if d['CATEGORIA'].lower() == filtros['categoria'].lower()]
+    if 'mes' in filtros:
+        dados = [d for d in dados if d['MES'].lower() == filtros['mes'].lower()]
+    if 'ano' in filtros:
+        dados = [d for d in dados if d['ANO'] == str(filtros['ano'])]
+    return dados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=300_000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    base = gerar_registros(args.linhas)
+
+    lista, mem_lista = medir_memoria(lambda: [dict(r) for r in base])
+    store, mem_store = medir_memoria(lambda: ColumnarStore.from_records(base))
+    del base
+
+    service = DataService()
+    service.armazenar_dados(store)
+
+    print(f'Linhas: {args.linhas}')
+    print(f'{"":32s} {"lista de dicts":>16s} {"colunar":>16s}')
+    print(f'{"memória (MB)":32s} {mem_lista / 1e6:16.1f} {mem_store / 1e6:16.1f}')
+
+    cenarios = [
+        {'categoria': 'categoria 3'},
+        {'categoria': 'categoria 3', 'ano': '2025'},
+        {'categoria': 'categoria 3', 'mes': 'março', 'ano': '2025'},
+    ]
+    for filtros in cenarios:
+        t_lista = medir_latencia(lambda: filtrar_lista(lista, filtros), args.repeticoes)
+        t_store = medir_latencia(lambda: service.obter_dados(filtros), args.repeticoes)
+        rotulo = 'obter_dados ' + ','.join(filtros) + ' (ms)'
+        print(f'{rotulo:32s} {t_lista:16.1f} {t_store:16.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Bytes trafegados e custo de CPU da compressão por tamanho de resposta
+
+Obtém corpos reais de /api/data/dados (JSON e NDJSON) e de
+/api/data/simulacoes/<usuario> em vários tamanhos e, para cada codificação
+disponível (gzip sempre; zstd e brotli se instalados) e nível, mede o
+tamanho comprimido, a razão e o tempo de CPU por resposta. Também mede a
+latência ponta a ponta pelo cliente de teste com e sem Accept-Encoding.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_compressao --linhas 200000 --saida compressao.json
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app import create_app
+from app.routes.data_routes import data_service
+from app.services import compressao
+from app.services.columnar_store import ColumnarStore
+from benchmarks.bench_armazenamento import gerar_registros
+
+NIVEIS = {compressao.GZIP: (1, 6, 9), compressao.ZSTD: (1, 3, 9), compressao.BROTLI: (1, 4, 9)}
+
+
+def cpu_por_resposta(funcao, minimo_segundos: float = 0.2) -> float:
+    """Tempo de CPU médio (ms) de `funcao`, repetida até somar `minimo_segundos`"""
+    repeticoes = 0
+    inicio = time.process_time()
+    while True:
+        funcao()
+        repeticoes += 1
+        decorrido = time.process_time() - inicio
+        if decorrido >= minimo_segundos:
+            return decorrido / repeticoes * 1000
+
+
+def latencia_ms(cliente, url: str, cabecalhos: dict, repeticoes: int) -> float:
+    """Mediana da latência (ms) de GET `url` pelo cliente de teste"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resposta = cliente.get(url, headers=cabecalhos)
+        resposta.get_data()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return float(np.median(tempos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=200_000)
+    parser.add_argument('--repeticoes', type=int, default=10)
+    parser.add_argument('--saida', default=None, help='Arquivo JSON com os resultados')
+    args = parser.parse_args()
+
+    app = create_app('testing', config={'COMPRESSAO_MINIMO_BYTES': 0})
+    cliente = app.test_client()
+    data_service.armazenar_dados(ColumnarStore.from_records(gerar_registros(args.linhas)))
+    curva = [{'DATA_COMPLETA': f'01/{m:02d}/2024', 'CATEGORIA': 'Categoria 1', 'PROJETADO_AJUSTADO': 1000.0 + m}
+             for m in range(1, 13)]
+    for i in range(500):
+        data_service.criar_simulacao('usuario_bench', f'Simulação {i}', curva)
+
+    corpos = {}
+    for limite in (10, 100, 1_000, 10_000, 100_000):
+        if limite <= args.linhas:
+            corpos[f'dados json {limite} linhas'] = f'/api/data/dados?limit={limite}'
+    corpos['dados ndjson (streaming)'] = '/api/data/dados?format=ndjson&limit=100000'
+    corpos['simulacoes 500'] = '/api/data/simulacoes/usuario_bench'
+
+    print(f'codificações disponíveis: {", ".join(compressao.codificacoes_disponiveis())}')
+    resultados = []
+    for nome, url in corpos.items():
+        dados = cliente.get(url).get_data()
+        print(f'\n{nome}: {len(dados):,} bytes')
+        for codificacao in compressao.codificacoes_disponiveis():
+            for nivel in NIVEIS[codificacao]:
+                comprimido = compressao.comprimir(dados, codificacao, nivel)
+                cpu_ms = cpu_por_resposta(lambda: compressao.comprimir(dados, codificacao, nivel))
+                resultados.append({
+                    'resposta': nome, 'bytes': len(dados), 'codificacao': codificacao, 'nivel': nivel,
+                    'bytes_comprimidos': len(comprimido), 'razao': round(len(dados) / len(comprimido), 2),
+                    'cpu_ms': round(cpu_ms, 3), 'mb_por_segundo': round(len(dados) / 1e6 / (cpu_ms / 1000), 1),
+                })
+                r = resultados[-1]
+                print(f'  {codificacao:>4} nível {nivel}: {r["bytes_comprimidos"]:>10,} bytes '
+                      f'({r["razao"]:5.1f}x)  CPU {r["cpu_ms"]:8.3f} ms  {r["mb_por_segundo"]:7.1f} MB/s')
+
+    print('\nlatência ponta a ponta (cliente de teste, mediana):')
+    ponta_a_ponta = []
+    for nome, url in corpos.items():
+        sem = latencia_ms(cliente, url, {}, args.repeticoes)
+        linha = {'resposta': nome, 'identity_ms': round(sem, 3)}
+        for codificacao in compressao.codificacoes_disponiveis():
+            linha[f'{codificacao}_ms'] = round(latencia_ms(cliente, url, {'Accept-Encoding': codificacao},
+                                                           args.repeticoes), 3)
+        ponta_a_ponta.append(linha)
+        print('  ' + '  '.join(f'{chave}={valor}' for chave, valor in linha.items()))
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump({'codecs': resultados, 'ponta_a_ponta': ponta_a_ponta}, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Memória por worker com o conjunto de dados em SQLite vs. arquivos mapeados
+
+Grava um conjunto sintético uma vez e sobe N processos que, como workers do
+servidor, carregam o conjunto pelo armazenamento e percorrem todas as
+colunas. Com todos vivos ao mesmo tempo, cada um lê RSS e PSS de
+/proc/self/smaps_rollup (Linux). A soma dos PSS é a memória realmente
+ocupada: no modo 'sqlite' cada worker tem sua cópia; no modo 'mmap' as
+páginas do conjunto ficam uma vez no page cache e são divididas entre eles.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_mmap --linhas 1000000 --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+
+from app.services.armazenamento import ArmazenamentoSQLite
+from app.services.armazenamento_mmap import ArmazenamentoMmap
+from app.services.columnar_store import ColumnarStore
+from benchmarks.bench_armazenamento import gerar_registros
+
+
+def criar_armazenamento(modo: str, diretorio: str):
+    if modo == 'mmap':
+        return ArmazenamentoMmap(os.path.join(diretorio, 'mmap'))
+    return ArmazenamentoSQLite(os.path.join(diretorio, 'bench.sqlite3'))
+
+
+def memoria_processo() -> dict:
+    """RSS e PSS do processo atual, em MB"""
+    medidas = {}
+    with open('/proc/self/smaps_rollup', encoding='ascii') as arquivo:
+        for linha in arquivo:
+            campo, _, resto = linha.partition(':')
+            if campo in ('Rss', 'Pss'):
+                medidas[campo.lower()] = int(resto.split()[0]) / 1024
+    return medidas
+
+
+def worker(modo: str, diretorio: str, barreira, fila):
+    """Carrega o conjunto como um worker e mede a memória com todos vivos"""
+    from app.services.data_service import DataService
+
+    servico = DataService(armazenamento=criar_armazenamento(modo, diretorio))
+    snapshot = servico.snapshot
+    for valores in snapshot.store.valores.values():
+        valores.sum()
+    for coluna in snapshot.store.categoricas.values():
+        coluna.codigos.sum()
+    servico.selecionar_linhas({'categoria': ['Categoria 1']})
+
+    barreira.wait()
+    fila.put(memoria_processo())
+    barreira.wait()
+
+
+def medir(modo: str, diretorio: str, workers: int) -> list:
+    contexto = multiprocessing.get_context('spawn')
+    barreira = contexto.Barrier(workers)
+    fila = contexto.Queue()
+    processos = [contexto.Process(target=worker, args=(modo, diretorio, barreira, fila))
+                 for _ in range(workers)]
+    for p in processos:
+        p.start()
+    medidas = [fila.get() for _ in processos]
+    for p in processos:
+        p.join()
+    return medidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    store = ColumnarStore.from_records(gerar_registros(args.linhas))
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        for modo in ('sqlite', 'mmap'):
+            criar_armazenamento(modo, diretorio).salvar_dados(store)
+            medidas = medir(modo, diretorio, args.workers)
+            rss = sum(m['rss'] for m in medidas)
+            pss = sum(m['pss'] for m in medidas)
+            print(f'{modo:>6}: {args.workers} workers, RSS médio {rss / len(medidas):8.1f} MB, '
+                  f'PSS total {pss:8.1f} MB ({pss / len(medidas):6.1f} MB/worker)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Memória por linha e taxa de construção das representações de linhas
+
+Compara, para o mesmo conjunto:
+
+- dicionarios: lista de dicionários (`ColumnarStore.to_records`, formato da API)
+- projecao: um `ProjecaoFinanceira` por linha (valores monetários como texto,
+  formatados antes de cronometrar; a memória inclui os textos)
+- batch: `ProjecaoBatch` com os arrays paralelos de uma seleção
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_modelos --linhas 300000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.models import ProjecaoBatch, ProjecaoFinanceira
+from app.services.columnar_store import ColumnarStore
+from benchmarks.bench_armazenamento import gerar_registros, medir_memoria
+
+
+def formatar_campos(registros) -> list:
+    """Campos de cada linha na ordem do modelo, valores monetários como texto"""
+    return [(
+        r['DATA_COMPLETA'], r['MES'], r['ANO'], r['CATEGORIA'],
+        f"R$ {r['CURVA_REALIZADO']:,.2f}", f"R$ {r['PROJETADO_ANALITICO']:,.2f}",
+        f"R$ {r['PROJETADO_MERCADO']:,.2f}", f"R$ {r['PROJETADO_AJUSTADO']:,.2f}",
+    ) for r in registros]
+
+
+def construir_projecoes(campos) -> list:
+    """Um modelo por linha a partir dos campos já formatados"""
+    return [ProjecaoFinanceira(*linha) for linha in campos]
+
+
+def taxa(construir, linhas: int, repeticoes: int) -> float:
+    """Melhor taxa de construção em linhas por segundo"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        construir()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return linhas / melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=300_000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    store = ColumnarStore.from_records(gerar_registros(args.linhas))
+    # Seleção de metade das linhas: o batch guarda só os ids
+    ids = np.arange(0, args.linhas, 2)
+    selecao = ProjecaoBatch(store, ids)
+    linhas = len(selecao)
+    registros = selecao.to_records()
+    # Formatação fora do tempo medido: só a construção dos modelos é cronometrada
+    campos = formatar_campos(registros)
+
+    construtores = {
+        'dicionarios': selecao.to_records,
+        'projecao': lambda: construir_projecoes(campos),
+        # Os ids próprios (cópia) são tudo o que o batch aloca
+        'batch': lambda: ProjecaoBatch(store, ids.copy()),
+    }
+    # Na memória por linha entram também os textos que cada modelo guarda
+    alocacoes = {**construtores, 'projecao': lambda: construir_projecoes(formatar_campos(registros))}
+
+    print(f'{linhas:,} linhas selecionadas de {args.linhas:,}')
+    print(f'{"representação":18s} {"bytes/linha":>12s} {"linhas/s":>14s}')
+    for nome, construir in construtores.items():
+        _, memoria = medir_memoria(alocacoes[nome])
+        por_segundo = taxa(construir, linhas, args.repeticoes)
+        print(f'{nome:18s} {memoria / linhas:12.1f} {por_segundo:14,.0f}')
+    print(f'{"batch (copiado)":18s} {selecao.nbytes / linhas:12.1f} {"":>14s}')
+
+
+if __name__ == '__main__':
+    main()
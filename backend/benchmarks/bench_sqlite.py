@@ -0,0 +1,97 @@
+"""
+Vazão de escrita e leitura do armazenamento SQLite (WAL)
+
+As consultas filtradas passam pelo DataService sobre o SQLite, como na
+API: o snapshot é carregado do banco uma vez e os filtros são resolvidos
+pelos índices em memória (cache de filtros desligado).
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_sqlite --linhas 300000 --simulacoes 5000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from app.services.armazenamento import ArmazenamentoSQLite
+from app.services.columnar_store import ColumnarStore
+from app.services.data_service import DataService
+from benchmarks.bench_armazenamento import gerar_registros
+
+
+def cronometrar(funcao, repeticoes: int = 1):
+    """(resultado da última execução, duração média em segundos)"""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return resultado, (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=300_000)
+    parser.add_argument('--simulacoes', type=int, default=5_000)
+    parser.add_argument('--usuarios', type=int, default=50)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    store = ColumnarStore.from_records(gerar_registros(args.linhas))
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazenamento = ArmazenamentoSQLite(os.path.join(diretorio, 'bench.sqlite3'))
+
+        _, t_insert = cronometrar(lambda: armazenamento.salvar_dados(store))
+        print(f'insert projeções:      {args.linhas / t_insert:12,.0f} linhas/s ({t_insert:.2f}s)')
+
+        _, t_carga = cronometrar(armazenamento.carregar_dados)
+        print(f'carga completa:        {args.linhas / t_carga:12,.0f} linhas/s ({t_carga:.2f}s)')
+
+        servico, t_snapshot = cronometrar(lambda: DataService(cache_max_entradas=0, armazenamento=armazenamento))
+        print(f'carga do snapshot:     {args.linhas / t_snapshot:12,.0f} linhas/s ({t_snapshot:.2f}s)')
+
+        cenarios = [
+            {'categoria': ['categoria 2'], 'ano': ['2025'], 'mes': ['março']},
+            {'categoria': ['categoria 3'], 'ano': ['2025']},
+            {'ano': ['2024', '2025'], 'mes': ['janeiro']},
+        ]
+        for filtros in cenarios:
+            linhas, t_leitura = cronometrar(lambda: servico.obter_dados(filtros), args.repeticoes)
+            rotulo = 'consulta ' + ','.join(filtros)
+            print(f'{rotulo:22s} {len(linhas) / t_leitura:12,.0f} linhas/s '
+                  f'({t_leitura * 1000:.1f} ms, {len(linhas)} linhas)')
+
+        curva = [{'mes': m, 'valor': 1000.0 + m} for m in range(12)]
+
+        def gravar_simulacoes():
+            for i in range(args.simulacoes):
+                armazenamento.salvar_simulacao({
+                    'id': f'sim_{i}',
+                    'usuario_id': f'user_{i % args.usuarios}',
+                    'nome': f'Simulação {i}',
+                    'data_criacao': datetime.now().isoformat(),
+                    'dados_ajustados': curva,
+                    'ativo': True,
+                })
+
+        _, t_sim = cronometrar(gravar_simulacoes)
+        print(f'insert simulações:     {args.simulacoes / t_sim:12,.0f} simulações/s')
+
+        sims, t_lista = cronometrar(lambda: armazenamento.listar_simulacoes('user_7'), args.repeticoes)
+        print(f'listar por usuário:    {t_lista * 1000:12.2f} ms ({len(sims)} simulações)')
+
+        sims, t_lista = cronometrar(
+            lambda: armazenamento.listar_simulacoes('user_7', limite=20, decrescente=True, resumo=True),
+            args.repeticoes
+        )
+        print(f'página resumida:       {t_lista * 1000:12.2f} ms ({len(sims)} simulações)')
+
+        _, t_obter = cronometrar(lambda: armazenamento.obter_simulacao('sim_42'), args.repeticoes)
+        print(f'obter por id:          {t_obter * 1000:12.3f} ms')
+
+        armazenamento.fechar()
+
+
+if __name__ == '__main__':
+    main()
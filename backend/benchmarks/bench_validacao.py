@@ -0,0 +1,94 @@
+"""
+Tempo de validação/conversão de uploads: linha a linha x coluna a coluna
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_validacao --linhas 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.data_service import DataService
+
+
+MESES = ['janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho',
+         'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro']
+
+
+def formatar_brl(valores: np.ndarray) -> list:
+    """Formata floats como 'R$ 1.234,56'"""
+    return [f'R$ {v:,.2f}'.replace('.', '#').replace(',', '.').replace('#', ',') for v in valores]
+
+
+def gerar_frame(total: int, monetario_texto: bool, seed: int = 42) -> pd.DataFrame:
+    """DataFrame bruto, como lido da planilha"""
+    rng = np.random.default_rng(seed)
+    idx = np.arange(total)
+    df = pd.DataFrame({
+        'DATA_COMPLETA': [f'01/{m + 1:02d}/2025' for m in idx % 12],
+        'MES': np.array(MESES, dtype=object)[idx % 12],
+        'ANO': 2024 + idx % 3,
+        'CATEGORIA': np.array([f'Categoria {i}' for i in range(8)], dtype=object)[idx % 8],
+    })
+    for coluna in ['CURVA_REALIZADO', 'PROJETADO_ANALITICO', 'PROJETADO_MERCADO', 'PROJETADO_AJUSTADO']:
+        valores = rng.uniform(1000, 5000, size=total).round(2)
+        df[coluna] = formatar_brl(valores) if monetario_texto else valores
+    return df
+
+
+def converter_linha_a_linha(df: pd.DataFrame) -> list:
+    """Implementação anterior: um dict por linha e 4 conversões escalares"""
+    def converter(valor):
+        try:
+            valor_limpo = valor.replace('R$', '').strip()
+            valor_limpo = valor_limpo.replace('.', '').replace(',', '.')
+            return float(valor_limpo)
+        except Exception:
+            return 0.0
+
+    saida = []
+    for registro in df.to_dict(orient='records'):
+        saida.append({
+            'DATA_COMPLETA': str(registro['DATA_COMPLETA']),
+            'MES': str(registro['MES']).lower(),
+            'ANO': str(registro['ANO']),
+            'CATEGORIA': str(registro['CATEGORIA']),
+            'CURVA_REALIZADO': converter(registro['CURVA_REALIZADO']),
+            'PROJETADO_ANALITICO': converter(registro['PROJETADO_ANALITICO']),
+            'PROJETADO_MERCADO': converter(registro['PROJETADO_MERCADO']),
+            'PROJETADO_AJUSTADO': converter(registro['PROJETADO_AJUSTADO']),
+        })
+    return saida
+
+
+def cronometrar(funcao) -> float:
+    """Duração de uma execução em segundos"""
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--sem-linha-a-linha', action='store_true',
+                        help='Não executa a implementação anterior (lenta)')
+    args = parser.parse_args()
+
+    service = DataService()
+    print(f'Linhas: {args.linhas}')
+    for rotulo, texto in [('texto R$', True), ('numérico', False)]:
+        df = gerar_frame(args.linhas, monetario_texto=texto)
+        t_colunas = cronometrar(lambda: service._validar_e_processar_frame(df))
+        linha = f'{rotulo:10s} coluna a coluna: {t_colunas:7.2f}s'
+        if not args.sem_linha_a_linha:
+            t_linhas = cronometrar(lambda: converter_linha_a_linha(df))
+            linha += f'   linha a linha: {t_linhas:7.2f}s'
+        print(linha)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+"""
+Teste de carga local: analistas simultâneos contra um backend real
+
+Sobe o backend em um processo separado (servidor WSGI com threads, como o
+`run.py`) ou usa um já em execução (--url), envia a planilha inicial e
+simula N analistas, cada um em uma thread, repetindo uma mistura de
+operações do dashboard com tempo de reflexão entre elas:
+
+- upload: POST /upload de uma das planilhas geradas
+- dados: GET /dados com os filtros típicos de bench_api
+- agregados: GET /agregados de uma categoria (às vezes agrupado por produto)
+- salvar_simulacao: POST /simulacao com uma curva ajustada
+- listar_simulacoes: GET /simulacoes/<usuario> (primeira página, resumo)
+- status: GET /status
+
+Os analistas entram aos poucos ao longo de --rampa segundos. A cada
+--janela segundos são impressos usuários ativos, vazão, taxa de erro e
+p50/p95/p99; no fim, o resumo por operação. Cliente e servidor dividem a
+mesma máquina: com poucos núcleos, prefira --url apontando para outra.
+
+Uso (a partir de backend/):
+    python -m benchmarks.carga_usuarios --usuarios 20 --rampa 30 --duracao 120 \\
+        --mix dados=40,agregados=25,listar_simulacoes=15,salvar_simulacao=12,status=7,upload=1 \\
+        --saida carga.json
+"""
+
+import argparse
+import gzip
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+
+import numpy as np
+
+from benchmarks.bench_api import carregar_gerador, misturar_filtros
+
+MIX_PADRAO = 'dados=40,agregados=25,listar_simulacoes=15,salvar_simulacao=12,status=7,upload=1'
+
+# Processo do servidor: mesmo app do run.py, sem debug/reloader
+_SERVIDOR = (
+    'import sys\n'
+    'from werkzeug.serving import run_simple\n'
+    'from app import create_app\n'
+    "run_simple(sys.argv[1], int(sys.argv[2]), create_app('production'), threaded=True)\n"
+)
+_DIRETORIO_BACKEND = os.path.join(os.path.dirname(__file__), '..')
+
+
+class Cliente:
+    """Requisições HTTP ao backend (urllib), com gzip como um navegador"""
+
+    def __init__(self, url_base: str, timeout: float):
+        self.url_base = url_base.rstrip('/')
+        self.timeout = timeout
+
+    def requisitar(self, metodo: str, caminho: str, corpo: bytes = None, content_type: str = None):
+        """
+        Executa a requisição e lê a resposta inteira
+
+        Returns:
+            Tupla (status HTTP ou 0 em falha de conexão, corpo JSON ou None)
+        """
+        cabecalhos = {'Accept-Encoding': 'gzip'}
+        if content_type:
+            cabecalhos['Content-Type'] = content_type
+        requisicao = urllib.request.Request(self.url_base + caminho, data=corpo, method=metodo,
+                                            headers=cabecalhos)
+        try:
+            with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+                status, conteudo, codificacao = resposta.status, resposta.read(), resposta.headers.get(
+                    'Content-Encoding')
+        except urllib.error.HTTPError as e:
+            status, conteudo, codificacao = e.code, e.read(), e.headers.get('Content-Encoding')
+        except (urllib.error.URLError, OSError):
+            return 0, None
+        if codificacao == 'gzip':
+            conteudo = gzip.decompress(conteudo)
+        try:
+            return status, json.loads(conteudo)
+        except ValueError:
+            return status, None
+
+
+def corpo_multipart(campo: str, nome_arquivo: str, conteudo: bytes):
+    """Corpo multipart/form-data com um arquivo; retorna (bytes, content type)"""
+    fronteira = uuid.uuid4().hex
+    corpo = (
+        f'--{fronteira}\r\n'
+        f'Content-Disposition: form-data; name="{campo}"; filename="{nome_arquivo}"\r\n'
+        'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode() + conteudo + f'\r\n--{fronteira}--\r\n'.encode()
+    return corpo, f'multipart/form-data; boundary={fronteira}'
+
+
+def ler_mix(texto: str) -> dict:
+    """'dados=40,upload=1' -> {'dados': 40.0, 'upload': 1.0}"""
+    mix = {}
+    for parte in texto.split(','):
+        nome, _, peso = parte.partition('=')
+        mix[nome.strip()] = float(peso)
+    return mix
+
+
+class Cenario:
+    """Operações do dashboard e os dados que elas enviam"""
+
+    def __init__(self, cliente: Cliente, planilhas: list, df):
+        self.cliente = cliente
+        self.planilhas = [corpo_multipart('arquivo', 'projecoes.xlsx', conteudo) for conteudo in planilhas]
+        self.consultas = [quote(consulta, safe='=&,') for consulta in misturar_filtros(df, 1000)]
+        self.categorias = sorted(df['CATEGORIA'].unique())
+        self.tem_produto = 'PRODUTO' in df
+
+    def upload(self, rng, usuario):
+        corpo, tipo = self.planilhas[rng.integers(len(self.planilhas))]
+        return self.cliente.requisitar('POST', '/api/data/upload', corpo, tipo)
+
+    def dados(self, rng, usuario):
+        consulta = self.consultas[rng.integers(len(self.consultas))]
+        return self.cliente.requisitar('GET', f'/api/data/dados?{consulta}')
+
+    def agregados(self, rng, usuario):
+        caminho = f'/api/data/agregados?categoria={quote(str(rng.choice(self.categorias)))}'
+        if self.tem_produto and rng.random() < 0.3:
+            caminho += '&agrupar=produto'
+        return self.cliente.requisitar('GET', caminho)
+
+    def salvar_simulacao(self, rng, usuario):
+        categoria = str(rng.choice(self.categorias))
+        ajustes = rng.uniform(0.9, 1.1, 12)
+        corpo = {
+            'usuario_id': usuario,
+            'nome': f'Simulação {uuid.uuid4().hex[:8]}',
+            'dados_ajustados': [{'DATA_COMPLETA': f'01/{mes:02d}/2025', 'CATEGORIA': categoria,
+                                 'PROJETADO_AJUSTADO': round(1000.0 * ajuste, 2)}
+                                for mes, ajuste in enumerate(ajustes, start=1)],
+        }
+        return self.cliente.requisitar('POST', '/api/data/simulacao', json.dumps(corpo).encode(),
+                                       'application/json')
+
+    def listar_simulacoes(self, rng, usuario):
+        return self.cliente.requisitar('GET', f'/api/data/simulacoes/{usuario}?limit=20&resumo=1')
+
+    def status(self, rng, usuario):
+        return self.cliente.requisitar('GET', '/api/data/status')
+
+
+def analista(indice: int, cenario: Cenario, mix: dict, inicio: float, fim: float, atraso: float,
+             pensar: float, registros: list, seed: int):
+    """
+    Um analista: espera sua vez na rampa e repete operações até o fim
+
+    Cada requisição vira um registro (segundo do término, operação,
+    latência em ms, erro).
+    """
+    rng = np.random.default_rng(seed + indice)
+    usuario = f'analista_{indice}'
+    operacoes = list(mix)
+    pesos = np.array([mix[o] for o in operacoes]) / sum(mix.values())
+    time.sleep(max(0.0, inicio + atraso - time.perf_counter()))
+    while time.perf_counter() < fim:
+        operacao = operacoes[rng.choice(len(operacoes), p=pesos)]
+        antes = time.perf_counter()
+        status, corpo = getattr(cenario, operacao)(rng, usuario)
+        depois = time.perf_counter()
+        erro = status == 0 or status >= 400 or (isinstance(corpo, dict) and corpo.get('sucesso') is False)
+        registros.append((depois - inicio, operacao, (depois - antes) * 1000, erro))
+        if pensar > 0:
+            time.sleep(rng.exponential(pensar))
+
+
+def resumir(registros: list, duracao: float) -> dict:
+    """Contagem, vazão, taxa de erro e percentis de um conjunto de registros"""
+    if not registros:
+        return {'requisicoes': 0, 'vazao_rps': 0.0, 'erros': 0, 'taxa_erro': 0.0,
+                'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    latencias = np.array([r[2] for r in registros])
+    erros = sum(r[3] for r in registros)
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+    return {
+        'requisicoes': len(registros),
+        'vazao_rps': round(len(registros) / duracao, 1) if duracao > 0 else None,
+        'erros': int(erros),
+        'taxa_erro': round(erros / len(registros), 4),
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+    }
+
+
+def ativos_em(segundo: float, usuarios: int, rampa: float) -> int:
+    """Analistas já iniciados em um instante do teste"""
+    if rampa <= 0:
+        return usuarios
+    return min(usuarios, int(segundo / (rampa / usuarios)) + 1)
+
+
+def linha_janela(rotulo: str, medidas: dict, ativos: int = None) -> str:
+    """Linha do relatório (usuários ativos só nas janelas de tempo)"""
+    usuarios = f' {ativos:>4} usuários' if ativos is not None else ''
+    if not medidas['requisicoes']:
+        return f'{rotulo}{usuarios}        sem requisições concluídas'
+    return (f'{rotulo}{usuarios} {medidas["vazao_rps"]:8.1f} req/s  '
+            f'erros {medidas["taxa_erro"] * 100:5.1f}%  p50 {medidas["p50_ms"]:8.1f} ms  '
+            f'p95 {medidas["p95_ms"]:8.1f} ms  p99 {medidas["p99_ms"]:8.1f} ms')
+
+
+def iniciar_servidor(host: str, porta: int, espera: float) -> subprocess.Popen:
+    """
+    Sobe o backend em um processo filho e espera /status responder
+
+    Raises:
+        RuntimeError: Se o servidor não responder dentro de `espera` segundos
+    """
+    processo = subprocess.Popen([sys.executable, '-c', _SERVIDOR, host, str(porta)], cwd=_DIRETORIO_BACKEND,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    cliente = Cliente(f'http://{host}:{porta}', timeout=1.0)
+    limite = time.perf_counter() + espera
+    while time.perf_counter() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f'Servidor terminou ao iniciar (código {processo.returncode})')
+        if cliente.requisitar('GET', '/api/data/status')[0] == 200:
+            return processo
+        time.sleep(0.2)
+    processo.terminate()
+    raise RuntimeError(f'Servidor não respondeu em {espera:.0f} s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--usuarios', type=int, default=20, help='Analistas simultâneos')
+    parser.add_argument('--rampa', type=float, default=30.0, help='Segundos até todos estarem ativos')
+    parser.add_argument('--duracao', type=float, default=120.0, help='Segundos de teste (rampa incluída)')
+    parser.add_argument('--pensar', type=float, default=1.0,
+                        help='Tempo médio de reflexão entre operações, em segundos (0 = sem pausa)')
+    parser.add_argument('--mix', default=MIX_PADRAO, help='Pesos das operações')
+    parser.add_argument('--janela', type=float, default=5.0, help='Segundos por linha do relatório')
+    parser.add_argument('--url', default=None, help='Backend já em execução (senão sobe um local)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=5055)
+    parser.add_argument('--timeout', type=float, default=60.0, help='Timeout de cada requisição (s)')
+    parser.add_argument('--categorias', type=int, default=8)
+    parser.add_argument('--produtos', type=int, default=20)
+    parser.add_argument('--tipos-cliente', type=int, default=4)
+    parser.add_argument('--anos', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--saida', default=None, help='Arquivo JSON com os resultados')
+    args = parser.parse_args()
+
+    mix = ler_mix(args.mix)
+    desconhecidas = [o for o in mix if not callable(getattr(Cenario, o, None)) or o.startswith('_')]
+    if desconhecidas:
+        parser.error(f'Operações desconhecidas no --mix: {", ".join(desconhecidas)}')
+
+    # Duas versões do conjunto (sementes diferentes) para os uploads alternarem
+    gerador = carregar_gerador()
+    df = gerador.gerar_dados(args.categorias, args.produtos, args.tipos_cliente, args.anos, seed=args.seed)
+    planilhas = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for seed in (args.seed, args.seed + 1):
+            caminho = os.path.join(diretorio, f'projecoes_{seed}.xlsx')
+            gerador.salvar(gerador.gerar_dados(args.categorias, args.produtos, args.tipos_cliente, args.anos,
+                                               seed=seed), caminho)
+            with open(caminho, 'rb') as arquivo:
+                planilhas.append(arquivo.read())
+
+    processo = None if args.url else iniciar_servidor(args.host, args.porta, espera=60.0)
+    try:
+        cliente = Cliente(args.url or f'http://{args.host}:{args.porta}', args.timeout)
+        cenario = Cenario(cliente, planilhas, df)
+        status, corpo = cenario.upload(np.random.default_rng(args.seed), 'preparacao')
+        if status != 200:
+            raise RuntimeError(f'Upload inicial falhou ({status}): {corpo}')
+
+        print(f'{len(df):,} linhas, {args.usuarios} usuários, rampa {args.rampa:.0f} s, '
+              f'duração {args.duracao:.0f} s, mix {args.mix}')
+        registros = []
+        inicio = time.perf_counter()
+        fim = inicio + args.duracao
+        intervalo = args.rampa / args.usuarios if args.usuarios else 0.0
+        with ThreadPoolExecutor(max_workers=args.usuarios) as executor:
+            futuros = [executor.submit(analista, i, cenario, mix, inicio, fim, i * intervalo,
+                                       args.pensar, registros, args.seed) for i in range(args.usuarios)]
+
+            # Relatório por janela enquanto os analistas rodam
+            janelas = []
+            inicio_janela = 0.0
+            while inicio_janela < args.duracao:
+                fim_janela = min(inicio_janela + args.janela, args.duracao)
+                ultima = fim_janela >= args.duracao
+                if ultima:
+                    # Requisições em andamento no fim do teste entram na última janela
+                    for futuro in futuros:
+                        futuro.result()
+                else:
+                    time.sleep(max(0.0, inicio + fim_janela - time.perf_counter()))
+                concluidos = [r for r in list(registros)
+                              if inicio_janela <= r[0] and (ultima or r[0] < fim_janela)]
+                medidas = resumir(concluidos, fim_janela - inicio_janela)
+                medidas.update(inicio_s=inicio_janela,
+                               usuarios_ativos=ativos_em(inicio_janela, args.usuarios, args.rampa))
+                janelas.append(medidas)
+                print(linha_janela(f'[{inicio_janela:6.0f}-{fim_janela:4.0f} s]', medidas,
+                                   medidas['usuarios_ativos']))
+                inicio_janela = fim_janela
+        duracao = time.perf_counter() - inicio
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+
+    por_operacao = {operacao: resumir([r for r in registros if r[1] == operacao], duracao) for operacao in mix}
+    total = resumir(registros, duracao)
+    print('\npor operação:')
+    for operacao, medidas in por_operacao.items():
+        print(linha_janela(f'  {operacao:18s}', medidas))
+    print(linha_janela(f'  {"total":18s}', total))
+
+    if args.saida:
+        resultado = {
+            'data': datetime.now().isoformat(),
+            'ambiente': {'python': platform.python_version(), 'plataforma': platform.platform(),
+                         'cpus': os.cpu_count()},
+            'parametros': {**vars(args), 'linhas': len(df)},
+            'janelas': janelas,
+            'operacoes': por_operacao,
+            'total': total,
+        }
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+        print(f'-> {args.saida}')
+
+
+if __name__ == '__main__':
+    main()
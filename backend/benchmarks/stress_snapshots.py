@@ -0,0 +1,164 @@
+"""
+Teste de estresse multithread das leituras durante uploads concorrentes
+
+Threads leitoras consultam /api/data/dados, /agregados e /status pelo
+cliente de teste do Flask enquanto uma thread escritora alterna entre dois
+conjuntos de dados (A e B) com anos e tamanhos diferentes. Cada resposta é
+conferida contra um dos dois conjuntos: qualquer mistura (total de um,
+linhas de outro) conta como inconsistência. Também mede a vazão de leitura
+só com leitores, por número de threads.
+
+Uso (a partir de backend/):
+    python -m benchmarks.stress_snapshots --linhas 200000 --segundos 5 --threads 1,2,4,8
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+
+from app import create_app
+from app.routes.data_routes import data_service
+from app.services.columnar_store import ColumnarStore
+from benchmarks.bench_armazenamento import gerar_registros
+
+
+CATEGORIA = 'Categoria 1'
+
+
+def gerar_conjunto(total: int, deslocamento_ano: int, seed: int) -> ColumnarStore:
+    """Store sintético com os anos deslocados para identificar o conjunto"""
+    registros = gerar_registros(total, seed=seed)
+    for registro in registros:
+        registro['ANO'] = str(int(registro['ANO']) + deslocamento_ano)
+    return ColumnarStore.from_records(registros)
+
+
+def esperado(store: ColumnarStore) -> dict:
+    """Invariantes de um conjunto: total, total filtrado, anos e curva agregada"""
+    data_service.armazenar_dados(store)
+    agregados = data_service.obter_agregados(categoria=CATEGORIA)
+    filtrado = data_service.selecionar_linhas({'categoria': [CATEGORIA]})
+    return {
+        'total': len(store),
+        'filtrado': len(filtrado),
+        'anos': set(store.valores_unicos('ANO')),
+        'ano_agregado': agregados['ano'],
+        'curva_ana': np.array(agregados['curvas']['ana'], dtype=float),
+    }
+
+
+def conferir(resposta_dados: dict, resposta_agregados: dict, total_status: int, conjuntos: list) -> list:
+    """Lista de inconsistências de um trio de respostas (vazia se ok)"""
+    erros = []
+    filtrado = resposta_dados.get('total_filtrado')
+    conjunto = next((c for c in conjuntos if c['filtrado'] == filtrado), None)
+    if conjunto is None:
+        erros.append(f'total_filtrado inesperado: {filtrado}')
+    else:
+        for linha in resposta_dados['dados']:
+            if linha['CATEGORIA'] != CATEGORIA or linha['ANO'] not in conjunto['anos']:
+                erros.append(f'linha de outro conjunto: {linha["ANO"]} / {linha["CATEGORIA"]}')
+                break
+
+    conjunto = next((c for c in conjuntos if c['ano_agregado'] == resposta_agregados.get('ano')), None)
+    if conjunto is None:
+        erros.append(f'ano agregado inesperado: {resposta_agregados.get("ano")}')
+    elif not np.allclose(np.array(resposta_agregados['curvas']['ana'], dtype=float), conjunto['curva_ana']):
+        erros.append('curva agregada não corresponde a nenhum conjunto')
+
+    if total_status not in {c['total'] for c in conjuntos}:
+        erros.append(f'total em /status inesperado: {total_status}')
+    return erros
+
+
+def ler(app, parar: threading.Event, conjuntos: list, resultado: dict, trava: threading.Lock):
+    """Laço de uma thread leitora"""
+    cliente = app.test_client()
+    requisicoes = 0
+    erros = []
+    while not parar.is_set():
+        dados = cliente.get(f'/api/data/dados?categoria={CATEGORIA}&limit=200')
+        agregados = cliente.get(f'/api/data/agregados?categoria={CATEGORIA}')
+        status = cliente.get('/api/data/status')
+        requisicoes += 3
+        if dados.status_code != 200 or agregados.status_code != 200 or status.status_code != 200:
+            erros.append(f'HTTP {dados.status_code}/{agregados.status_code}/{status.status_code}')
+            continue
+        if conjuntos:
+            erros += conferir(dados.get_json(), agregados.get_json(),
+                              status.get_json()['dados_armazenados'], conjuntos)
+    with trava:
+        resultado['requisicoes'] += requisicoes
+        resultado['erros'] += erros
+
+
+def escrever(parar: threading.Event, stores: list, contador: dict):
+    """Laço da thread escritora: alterna os conjuntos ativos"""
+    i = 0
+    while not parar.is_set():
+        data_service.armazenar_dados(stores[i % len(stores)])
+        i += 1
+    contador['uploads'] = i
+
+
+def rodar(app, threads: int, segundos: float, conjuntos: list, stores: list = None) -> dict:
+    """Executa leitores (e o escritor, se houver stores) por alguns segundos"""
+    parar = threading.Event()
+    trava = threading.Lock()
+    resultado = {'requisicoes': 0, 'erros': []}
+    contador = {'uploads': 0}
+    trabalhadores = [threading.Thread(target=ler, args=(app, parar, conjuntos, resultado, trava))
+                     for _ in range(threads)]
+    if stores:
+        trabalhadores.append(threading.Thread(target=escrever, args=(parar, stores, contador)))
+
+    inicio = time.perf_counter()
+    for t in trabalhadores:
+        t.start()
+    time.sleep(segundos)
+    parar.set()
+    for t in trabalhadores:
+        t.join()
+    duracao = time.perf_counter() - inicio
+    return {
+        'requisicoes_por_segundo': resultado['requisicoes'] / duracao,
+        'uploads': contador['uploads'],
+        'erros': resultado['erros'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=200_000)
+    parser.add_argument('--segundos', type=float, default=5.0)
+    parser.add_argument('--threads', default='1,2,4,8')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    store_a = gerar_conjunto(args.linhas, 0, seed=1)
+    store_b = gerar_conjunto(args.linhas // 2 + 7, 10, seed=2)
+    conjuntos = [esperado(store_a), esperado(store_b)]
+
+    print('leitura sem escritas:')
+    for threads in [int(t) for t in args.threads.split(',')]:
+        r = rodar(app, threads, args.segundos, [])
+        print(f'  {threads:3d} threads: {r["requisicoes_por_segundo"]:10,.0f} req/s')
+
+    print('leitura com uploads concorrentes:')
+    falhou = False
+    for threads in [int(t) for t in args.threads.split(',')]:
+        r = rodar(app, threads, args.segundos, conjuntos, [store_a, store_b])
+        print(f'  {threads:3d} threads: {r["requisicoes_por_segundo"]:10,.0f} req/s, '
+              f'{r["uploads"]} uploads, {len(r["erros"])} inconsistências')
+        for erro in r['erros'][:5]:
+            print(f'      {erro}')
+        falhou |= bool(r['erros'])
+
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == '__main__':
+    main()
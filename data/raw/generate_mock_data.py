@@ -1,12 +1,132 @@
 """
 Script para gerar dados mockados em formato Excel
 para o sistema de projeção financeira
+
+Sem argumentos gera o arquivo de exemplo (8 categorias, 24 meses). Com
+argumentos gera conjuntos parametrizados por categorias × produtos × tipos
+de cliente × anos, em Excel ou Parquet, para testes de carga:
+
+    python generate_mock_data.py --categorias 20 --produtos 40 --tipos-cliente 10 \\
+        --anos 12 --formato parquet --saida projecoes_1m.parquet
+
+(20 × 40 × 10 × 12 anos × 12 meses = 1.152.000 linhas)
 """
 
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+import argparse
 import os
+import sys
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+MESES = ['janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho',
+         'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro']
+CATEGORIAS = ['Pessoa Física', 'Pessoa Jurídica', 'Financiamento Imobiliário',
+              'Cartão de Crédito', 'Empréstimo Pessoal', 'Renda Fixa',
+              'Fundos de Investimento', 'Seguros']
+COLUNAS_VALOR = ['CURVA_REALIZADO', 'PROJETADO_ANALITICO', 'PROJETADO_MERCADO', 'PROJETADO_AJUSTADO']
+
+ABA = 'Projeções'
+# Linhas de dados por aba (limite do Excel menos o cabeçalho)
+MAX_LINHAS_ABA = 1_048_575
+
+
+def formatar_monetario(valores: np.ndarray) -> np.ndarray:
+    """Valores no formato 'R$ 1.234,56' usado nas planilhas de origem"""
+    return np.array([
+        f"R$ {v:,.2f}".replace('.', '#').replace(',', '.').replace('#', ',') for v in valores
+    ], dtype=object)
+
+
+def gerar_dados(categorias: int = 8, produtos: Optional[int] = None, tipos_cliente: Optional[int] = None,
+                anos: int = 2, ano_inicial: int = 2024, monetario: bool = True,
+                seed: Optional[int] = None) -> pd.DataFrame:
+    """
+    Gera um conjunto com uma linha por mês × categoria × produto × tipo de cliente
+
+    Args:
+        categorias: Número de categorias (as 8 primeiras têm os nomes reais)
+        produtos: Produtos por categoria (sem coluna PRODUTO se None)
+        tipos_cliente: Tipos de cliente (sem coluna TIPO_CLIENTE se None)
+        anos: Anos de dados, a partir de `ano_inicial`
+        ano_inicial: Primeiro ano
+        monetario: Valores como texto 'R$ 1.234,56' (senão float)
+        seed: Semente do gerador aleatório
+
+    Returns:
+        DataFrame no layout da aba 'Projeções'
+    """
+    rng = np.random.default_rng(seed)
+    nomes_categorias = [CATEGORIAS[i] if i < len(CATEGORIAS) else f'Categoria {i + 1}'
+                        for i in range(categorias)]
+    dimensoes = [anos * 12, categorias, produtos or 1, tipos_cliente or 1]
+    total = int(np.prod(dimensoes))
+    periodo, categoria, produto, tipo = np.unravel_index(np.arange(total), dimensoes)
+
+    mes = periodo % 12
+    ano = ano_inicial + periodo // 12
+
+    # Valor base por série com crescimento de 2% ao mês, como no exemplo original
+    valor_base = rng.uniform(1000, 5000, total) * (1 + periodo * 0.02)
+    projetado_analitico = valor_base * rng.uniform(0.95, 1.05, total)
+    valores = {
+        'CURVA_REALIZADO': valor_base * rng.uniform(0.9, 1.1, total),
+        'PROJETADO_ANALITICO': projetado_analitico,
+        'PROJETADO_MERCADO': valor_base * rng.uniform(0.85, 1.15, total),
+        'PROJETADO_AJUSTADO': projetado_analitico,
+    }
+
+    dados = {
+        'DATA_COMPLETA': np.char.add(np.char.add(np.char.add('01/', np.char.zfill((mes + 1).astype(str), 2)), '/'),
+                                     ano.astype(str)),
+        'MES': np.array(MESES, dtype=object)[mes],
+        'ANO': ano.astype(str),
+        'CATEGORIA': np.array(nomes_categorias, dtype=object)[categoria],
+    }
+    for coluna in COLUNAS_VALOR:
+        dados[coluna] = formatar_monetario(valores[coluna]) if monetario else valores[coluna].round(2)
+    if produtos:
+        dados['PRODUTO'] = np.char.add('Produto ', (produto + 1).astype(str))
+    if tipos_cliente:
+        dados['TIPO_CLIENTE'] = np.char.add('Tipo ', (tipo + 1).astype(str))
+    return pd.DataFrame(dados)
+
+
+def salvar_excel(df: pd.DataFrame, caminho: str):
+    """
+    Grava em Excel em modo write-only (memória constante)
+
+    Conjuntos maiores que o limite de linhas do Excel são divididos em abas
+    'Projeções', 'Projeções 2', ... (use /api/data/upload/lote com abas=*).
+    """
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    larguras = [max(len(str(v)) for v in [coluna] + df[coluna].head(100).tolist()) + 2 for coluna in df.columns]
+    for numero, inicio in enumerate(range(0, max(len(df), 1), MAX_LINHAS_ABA), start=1):
+        aba = workbook.create_sheet(ABA if numero == 1 else f'{ABA} {numero}')
+        for i, largura in enumerate(larguras, start=1):
+            aba.column_dimensions[get_column_letter(i)].width = largura
+        aba.append(list(df.columns))
+        for linha in df.iloc[inicio:inicio + MAX_LINHAS_ABA].itertuples(index=False, name=None):
+            aba.append(linha)
+    workbook.save(caminho)
+
+
+def salvar(df: pd.DataFrame, caminho: str, formato: str = 'xlsx'):
+    """
+    Grava o conjunto em Excel ('xlsx') ou Parquet ('parquet')
+    """
+    if formato == 'parquet':
+        df.to_parquet(caminho, index=False)
+    elif formato == 'xlsx':
+        salvar_excel(df, caminho)
+    else:
+        raise ValueError(f'Formato não suportado: {formato}')
+
 
 def gerar_dados_mockados():
     """
@@ -14,11 +134,8 @@ def gerar_dados_mockados():
     """
     
     # Configurações
-    meses = ['janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho', 
-             'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro']
-    categorias = ['Pessoa Física', 'Pessoa Jurídica', 'Financiamento Imobiliário', 
-                  'Cartão de Crédito', 'Empréstimo Pessoal', 'Renda Fixa', 
-                  'Fundos de Investimento', 'Seguros']
+    meses = MESES
+    categorias = CATEGORIAS
     
     dados = []
     
@@ -94,5 +211,31 @@ def gerar_dados_mockados():
     
     return df
 
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera dados mockados de projeções financeiras')
+    parser.add_argument('--categorias', type=int, default=8)
+    parser.add_argument('--produtos', type=int, default=None, help='Produtos (sem coluna PRODUTO se omitido)')
+    parser.add_argument('--tipos-cliente', type=int, default=None,
+                        help='Tipos de cliente (sem coluna TIPO_CLIENTE se omitido)')
+    parser.add_argument('--anos', type=int, default=2)
+    parser.add_argument('--ano-inicial', type=int, default=2024)
+    parser.add_argument('--numerico', action='store_true', help='Valores como número em vez de "R$ 1.234,56"')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--formato', choices=['xlsx', 'parquet'], default='xlsx')
+    parser.add_argument('--saida', default=None, help='Arquivo de saída (padrão: ao lado deste script)')
+    args = parser.parse_args()
+
+    df = gerar_dados(args.categorias, args.produtos, args.tipos_cliente, args.anos,
+                     args.ano_inicial, monetario=not args.numerico, seed=args.seed)
+    saida = args.saida or os.path.join(os.path.dirname(__file__), f'projecoes_financeiras_{len(df)}.{args.formato}')
+    salvar(df, saida, args.formato)
+    print(f"✓ Arquivo gerado com sucesso: {saida}")
+    print(f"  Total de registros: {len(df)}")
+
+
 if __name__ == "__main__":
-    gerar_dados_mockados()
+    if len(sys.argv) > 1:
+        main()
+    else:
+        gerar_dados_mockados()
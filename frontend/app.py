@@ -7,7 +7,7 @@ import streamlit as st
 import pandas as pd
 from styles import CORES, CSS_CUSTOM, aplicar_tema
 from pages import autenticacao, dashboard, simulador, perfil, upload
-from data_manager import init_data_state, get_dados_upload, adicionar_simulacao
+from data_manager import init_data_state, get_dados_upload, adicionar_simulacao, get_versao_backend
 from services.aggregations import _carregar_curvas_base
 
 # Inicializar data state logo no início
@@ -219,7 +219,8 @@ else:
             
             if df_upload is not None and not df_upload.empty and categoria and produto:
                 try:
-                    analitica, _, _ = _carregar_curvas_base(df_upload, cliente, categoria, produto)
+                    analitica, _, _ = _carregar_curvas_base(df_upload, cliente, categoria, produto,
+                                                            versao_backend=get_versao_backend())
                     if analitica and len(analitica) >= 12:
                         # Usar valores ajustados se disponíveis, senão usar analítica
                         ajustada = st.session_state.get("ajustada", None)
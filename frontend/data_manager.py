@@ -37,6 +37,12 @@ def init_data_state():
         st.session_state.sync_counter = 0
     if "last_combo" not in st.session_state:
         st.session_state.last_combo = None
+    if "versao_backend" not in st.session_state:
+        # Versão do conjunto no backend igual a dados_upload (None = não sincronizado)
+        st.session_state.versao_backend = None
+    if "ajustado_local" not in st.session_state:
+        # True quando PROJETADO_AJUSTADO foi alterado só na sessão
+        st.session_state.ajustado_local = False
     # ============== NOVO: Curvas ajustadas persistentes por combo ==============
     if "curvas_ajustadas_persistentes" not in st.session_state:
         # Estrutura: {combo_key: {"curva": [12], "data_salvo": iso, "nome": str}}
@@ -120,6 +126,8 @@ def resetar_tudo():
     Deve ser chamado quando quiser começar do zero.
     """
     st.session_state.dados_upload = None
+    st.session_state.versao_backend = None
+    st.session_state.ajustado_local = False
     st.session_state.simulacoes = []
     st.session_state.simulacoes_salvas = {}
     st.session_state.metricas_dashboard = {
@@ -156,6 +164,9 @@ def resetar_simulacao_atual():
 def set_dados_upload(df):
     """Armazena dados do upload no session state"""
     st.session_state.dados_upload = df
+    # Novo conjunto: só volta a usar o backend depois de enviado a ele
+    st.session_state.versao_backend = None
+    st.session_state.ajustado_local = False
     # Guarda backup do original para referência
     if st.session_state.dados_upload_original is None:
         st.session_state.dados_upload_original = df.copy() if df is not None else None
@@ -172,6 +183,22 @@ def get_dados_upload_original():
     return st.session_state.dados_upload_original
 
 
+def set_versao_backend(versao):
+    """Registra a versão do conjunto no backend após enviar dados_upload"""
+    st.session_state.versao_backend = versao
+
+
+def get_versao_backend(com_ajustado: bool = False):
+    """
+    Versão do backend que corresponde aos dados da sessão (None se não houver).
+    Com com_ajustado=True também é None quando curvas ajustadas foram
+    aplicadas só localmente (PROJETADO_AJUSTADO do backend está desatualizado).
+    """
+    if com_ajustado and st.session_state.get("ajustado_local"):
+        return None
+    return st.session_state.get("versao_backend")
+
+
 # ============================================================================
 # PERSISTÊNCIA DE CURVAS AJUSTADAS
 # ============================================================================
@@ -322,6 +349,7 @@ def _aplicar_curva_no_dataframe(cliente: str, categoria: str, produto: str,
     
     # Atualiza o DataFrame no session_state
     st.session_state.dados_upload = df
+    st.session_state.ajustado_local = True
     print(f"[PERSIST] DataFrame atualizado: {categoria}/{produto} com {len(curva)} meses")
 
 
@@ -48,7 +48,7 @@ from data_manager import (
     get_dados_upload, adicionar_simulacao, get_simulacoes_usuario,
     restaurar_simulacao, deletar_simulacao, get_simulacao_por_combo,
     resetar_simulacao_atual, carregar_curva_ajustada, existe_curva_salva,
-    aplicar_todas_curvas_salvas, get_score_by_produto_nome
+    aplicar_todas_curvas_salvas, get_score_by_produto_nome, get_versao_backend
 )
 
 MASCARAR_ZEROS_FINAIS = True
@@ -286,7 +286,8 @@ def renderizar():
     if not produto and not base_fc.empty:
         produto = str(base_fc["PRODUTO"].dropna().astype(str).unique()[0])
 
-    analitica, mercado, ano_proj = _carregar_curvas_base(df_upload, cliente, categoria, produto)
+    analitica, mercado, ano_proj = _carregar_curvas_base(df_upload, cliente, categoria, produto,
+                                                         versao_backend=get_versao_backend())
     combo = f"{cliente}::{categoria}::{produto}"
     
     # ==================== ATUALIZA PARÂMETROS NA SIDEBAR ====================
@@ -552,7 +553,8 @@ def renderizar():
         </div>
         """, unsafe_allow_html=True)
     
-    realizados_dict = _obter_realizados_por_ano(df_upload, cliente, categoria, produto, mascarar_zeros_finais=MASCARAR_ZEROS_FINAIS)
+    realizados_dict = _obter_realizados_por_ano(df_upload, cliente, categoria, produto, mascarar_zeros_finais=MASCARAR_ZEROS_FINAIS,
+                                                versao_backend=get_versao_backend())
     anos_realizados = sorted(realizados_dict.keys())
     variacoes_rlzd = {ano: _variacao_mensal(realizados_dict[ano]) for ano in anos_realizados}
 
@@ -944,7 +946,7 @@ def renderizar():
 
     # -------------------- GRÁFICOS AUXILIARES -------------------------
     g1 = _grafico_visao_anual_linhas(
-        _obter_realizados_por_ano(df_upload, cliente, categoria, produto, mascarar_zeros_finais=MASCARAR_ZEROS_FINAIS),
+        realizados_dict,
         analitica, mercado, ajustada, ano_proj, style_top, src_ajs_ref=src_ajs
     )
     g2 = _grafico_serie_historica(df_upload, cliente, categoria, produto,
@@ -1078,7 +1080,8 @@ def renderizar():
     st.markdown("<h2 class='uan-sec' style='margin:8px 0 4px 0;padding:4px 0;font-size:1.2rem;border-top:1px solid #e2e8f0;'>🗂️ Análises por Categoria</h2>", unsafe_allow_html=True)
     
     # Carrega dados agregados por categoria
-    agreg = _agregados_por_categoria(df_upload, cliente, ano_proj or 0, mascarar_zeros_finais=MASCARAR_ZEROS_FINAIS)
+    agreg = _agregados_por_categoria(df_upload, cliente, ano_proj or 0, mascarar_zeros_finais=MASCARAR_ZEROS_FINAIS,
+                                     versao_backend=get_versao_backend(com_ajustado=True))
     
     # Função auxiliar para garantir arrays de 12 elementos
     def _safe_array_12(arr):
@@ -1093,7 +1096,8 @@ def renderizar():
     
     # ==== APLICA AJUSTES DO DRAG-AND-DROP À CATEGORIA ATUAL ====
     if agreg and categoria in agreg:
-        serie_prod_orig = _carregar_ajustada_produto(df_upload, cliente, categoria, produto, ano_proj) or analitica[:]
+        serie_prod_orig = _carregar_ajustada_produto(df_upload, cliente, categoria, produto, ano_proj,
+                                                     versao_backend=get_versao_backend(com_ajustado=True)) or analitica[:]
         serie_prod_orig = np.array(_safe_array_12(serie_prod_orig), dtype=float)
         serie_drag = np.array(_safe_array_12(ajustada), dtype=float)
         
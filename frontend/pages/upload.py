@@ -8,13 +8,15 @@ import numpy as np
 import unicodedata
 import re
 from datetime import datetime
+import io
 import json
 import requests
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from data_manager import set_dados_upload, get_dados_upload
+from data_manager import set_dados_upload, get_dados_upload, set_versao_backend
+from services.backend_api import enviar_planilha_backend
 
 # ==============================
 # Configurações / Constantes
@@ -200,6 +202,47 @@ def _df_to_json_records(df: pd.DataFrame) -> list[dict]:
     out = out.where(pd.notnull(out), None)
     return out.to_dict("records")
 
+def _df_to_backend_xlsx(df: pd.DataFrame) -> bytes:
+    """
+    Planilha (aba 'Projeções') com os dados LIMPOS no layout do backend.
+    MES/ANO vão numéricos e DATA_COMPLETA sempre preenchida, para o backend
+    agregar exatamente as linhas que a sessão usa.
+    """
+    data = df["DATA_COMPLETA_DT"].dt.strftime("%Y-%m-%d")
+    data = data.fillna(df["ANO_NUM"].astype(str) + "-" + df["MES_NUM"].astype(str).str.zfill(2) + "-01")
+    out = pd.DataFrame({
+        "DATA_COMPLETA": data,
+        "MES": df["MES_NUM"],
+        "ANO": df["ANO_NUM"],
+        "CATEGORIA": df["CATEGORIA"],
+        "PRODUTO": df["PRODUTO"],
+        "TIPO_CLIENTE": df["TIPO_CLIENTE"],
+        **{c: df[c] for c in NUMERIC_COLS},
+    })
+    buf = io.BytesIO()
+    out.to_excel(buf, sheet_name="Projeções", index=False)
+    return buf.getvalue()
+
+def _enviar_para_backend(df: pd.DataFrame):
+    """
+    Substitui o conjunto do backend pelos dados limpos. A versão só é
+    registrada se o backend aceitou todas as linhas; sem ela as páginas
+    agregam localmente.
+    """
+    try:
+        resp = enviar_planilha_backend(_df_to_backend_xlsx(df))
+    except requests.exceptions.RequestException:
+        st.warning("⚠️ Backend indisponível. Dados salvos localmente.")
+        return
+    meta = resp.get("metadata") or {}
+    if (resp.get("sucesso") and not meta.get("total_rejeitados")
+            and meta.get("total_registros") == len(df)):
+        set_versao_backend(meta.get("versao_dataset"))
+        st.success("✅ Dados carregados no backend!")
+        st.balloons()
+    else:
+        st.warning("⚠️ Backend respondeu com erro. Dados salvos localmente.")
+
 def _consolidar_duplicatas(df: pd.DataFrame, metodo: str = "sum") -> pd.DataFrame:
     chaves = ["ANO_NUM", "MES_NUM", "CAT_N", "PROD_N"]
     if "CLI_N" in df.columns:
@@ -304,24 +347,8 @@ def processar_dados(df_raw: pd.DataFrame):
         with st.expander("🔎 Visualizar dados LIMPOS (o que o sistema usará)"):
             st.dataframe(df_clean.head(200), use_container_width=True)
 
-        dados_json = _df_to_json_records(df_clean)
-
-        try:
-            resp = requests.post(
-                "http://localhost:5000/api/upload",
-                json={"data": dados_json},
-                timeout=10,
-            )
-            if resp.status_code == 200:
-                st.session_state.dados_carregados = dados_json
-                st.success("✅ Dados carregados no backend!")
-                st.balloons()
-            else:
-                st.warning("⚠️ Backend respondeu com erro. Dados salvos localmente.")
-                st.session_state.dados_carregados = dados_json
-        except requests.exceptions.RequestException:
-            st.warning("⚠️ Backend indisponível. Dados salvos localmente.")
-            st.session_state.dados_carregados = dados_json
+        st.session_state.dados_carregados = _df_to_json_records(df_clean)
+        _enviar_para_backend(df_clean)
 
     except Exception as e:
         st.error(f"❌ Erro ao processar dados: {str(e)}")
@@ -1,14 +1,52 @@
 # frontend/services/aggregations.py
 import pandas as pd
 import numpy as np
+import requests
 
+from services.backend_api import carregar_agregados_backend
 from utils_ext.series import (
     _norm_txt, _mes_to_num, _ensure_cli_n, _mask_trailing_zeros
 )
 
-def _carregar_curvas_base(df_upload: pd.DataFrame, cliente: str, categoria: str, produto: str):
+# Mesmo recorte de anos das agregações locais
+ANO_MINIMO = 2022
+
+def _agregados_backend(versao_backend, **params):
+    """
+    /data/agregados quando o backend está com o conjunto da sessão
+    (versao_backend); None -> agregação local sobre o DataFrame.
+    """
+    if versao_backend is None:
+        return None
+    try:
+        resp = carregar_agregados_backend(**params)
+    except (requests.exceptions.RequestException, ValueError):
+        return None
+    if not resp.get("sucesso") or resp.get("versao_dataset") != versao_backend:
+        return None
+    return resp
+
+def _nan(serie):
+    """None (zeros finais mascarados no backend) -> np.nan, como _mask_trailing_zeros"""
+    return [np.nan if v is None else float(v) for v in serie]
+
+def _curvas_backend(curvas):
+    """Curvas do backend no formato de _agregados_por_categoria"""
+    prev = curvas["prev"]
+    return {
+        "ana": curvas["ana"], "mer": curvas["mer"], "ajs": curvas["ajs"], "rlzd": _nan(curvas["rlzd"]),
+        "prev": {"ana": prev["ana"], "mer": prev["mer"], "ajs": prev["ajs"], "rlzd": prev["rlzd"]}
+    }
+
+def _carregar_curvas_base(df_upload: pd.DataFrame, cliente: str, categoria: str, produto: str,
+                          versao_backend=None):
     if df_upload is None or len(df_upload) == 0:
         return [0.0]*12, [0.0]*12, None
+    resp = _agregados_backend(versao_backend, cliente=cliente, categoria=categoria, produto=produto)
+    if resp is not None:
+        if resp["ano"] is None:
+            return [0.0]*12, [0.0]*12, None
+        return resp["curvas"]["ana"], resp["curvas"]["mer"], int(resp["ano"])
     dff = _ensure_cli_n(df_upload)
     if "CAT_N" not in dff.columns:
         dff["CAT_N"] = dff["CATEGORIA"].astype(str).apply(_norm_txt)
@@ -41,12 +79,22 @@ def _carregar_curvas_base(df_upload: pd.DataFrame, cliente: str, categoria: str,
     mer = (grp["PROJETADO_MERCADO"].astype(float).tolist() + [0.0]*12)[:12]
     return ana, mer, ano
 
-def _carregar_ajustada_produto(df_upload: pd.DataFrame, cliente: str, categoria: str, produto: str, ano_proj: int):
+def _carregar_ajustada_produto(df_upload: pd.DataFrame, cliente: str, categoria: str, produto: str, ano_proj: int,
+                               versao_backend=None):
     """
     Série [12] do produto/ano: PROJETADO_AJUSTADO (fallback Analítico).
+    versao_backend só deve ser passada se PROJETADO_AJUSTADO não foi alterado localmente.
     """
     if df_upload is None or df_upload.empty:
         return None
+    resp = _agregados_backend(versao_backend, cliente=cliente, categoria=categoria,
+                              produto=produto, ano=ano_proj) if ano_proj else None
+    if resp is not None:
+        curvas = resp["curvas"]
+        # Sem linhas no ano (todas as métricas zeradas) -> None, como no cálculo local
+        if not any(any(curvas[m]) for m in ("ana", "mer", "ajs")):
+            return None
+        return curvas["ajs"]
     dff = _ensure_cli_n(df_upload)
     if cliente and cliente != "Todos":
         dff = dff[dff["CLI_N"] == _norm_txt(cliente)]
@@ -72,10 +120,15 @@ def _carregar_ajustada_produto(df_upload: pd.DataFrame, cliente: str, categoria:
             .sum().reindex(range(1,13)).fillna(0.0).astype(float))
     return (s.tolist() + [0.0]*12)[:12]
 
-def _obter_realizados_por_ano(df_upload: pd.DataFrame, cliente: str, categoria: str, produto: str, mascarar_zeros_finais: bool = True):
+def _obter_realizados_por_ano(df_upload: pd.DataFrame, cliente: str, categoria: str, produto: str, mascarar_zeros_finais: bool = True,
+                              versao_backend=None):
     result = {}
     if df_upload is None or df_upload.empty:
         return result
+    resp = _agregados_backend(versao_backend, cliente=cliente, categoria=categoria, produto=produto,
+                              ano_min=ANO_MINIMO, realizados=True, mascarar_zeros=mascarar_zeros_finais)
+    if resp is not None:
+        return {int(ano): _nan(serie) for ano, serie in sorted(resp["realizados"].items(), key=lambda kv: int(kv[0]))}
     dff = _ensure_cli_n(df_upload)
     if "CAT_N" not in dff.columns:
         dff["CAT_N"] = dff["CATEGORIA"].astype(str).apply(_norm_txt)
@@ -94,7 +147,7 @@ def _obter_realizados_por_ano(df_upload: pd.DataFrame, cliente: str, categoria:
         dff = dff[dff["CLI_N"] == _norm_txt(cliente)]
     dff = dff[(dff["CAT_N"] == _norm_txt(categoria)) & (dff["PROD_N"] == _norm_txt(produto))]
     dff = dff[pd.to_numeric(dff["MES_NUM"], errors="coerce").between(1, 12)]
-    dff = dff[pd.to_numeric(dff["ANO_NUM"], errors="coerce") >= 2022]
+    dff = dff[pd.to_numeric(dff["ANO_NUM"], errors="coerce") >= ANO_MINIMO]
     if dff.empty:
         return result
 
@@ -106,17 +159,23 @@ def _obter_realizados_por_ano(df_upload: pd.DataFrame, cliente: str, categoria:
         result[int(ano)] = _mask_trailing_zeros(serie) if mascarar_zeros_finais else serie
     return result
 
-def _agregados_por_categoria(df_upload: pd.DataFrame, cliente: str, ano_proj: int, mascarar_zeros_finais: bool = True):
+def _agregados_por_categoria(df_upload: pd.DataFrame, cliente: str, ano_proj: int, mascarar_zeros_finais: bool = True,
+                             versao_backend=None):
     """
     Retorna:
       { categoria: {
           "ana":[12], "mer":[12], "ajs":[12], "rlzd":[12],
           "prev": {"ana":[12], "mer":[12], "ajs":[12], "rlzd":[12]}
         } }
+    versao_backend só deve ser passada se PROJETADO_AJUSTADO não foi alterado localmente.
     """
     out = {}
     if df_upload is None or df_upload.empty:
         return out
+    resp = _agregados_backend(versao_backend, cliente=cliente, ano=ano_proj, agrupar="categoria",
+                              ano_min=ANO_MINIMO, mascarar_zeros=mascarar_zeros_finais) if ano_proj else None
+    if resp is not None:
+        return {cat: _curvas_backend(curvas) for cat, curvas in resp["grupos"].items()}
 
     dff = _ensure_cli_n(df_upload).copy()
     if cliente and cliente != "Todos":
@@ -129,7 +188,7 @@ def _agregados_por_categoria(df_upload: pd.DataFrame, cliente: str, ano_proj: in
     if "ANO_NUM" not in dff.columns:
         dff["ANO_NUM"] = pd.to_numeric(dff.get("ANO", 0), errors="coerce").fillna(0).astype(int)
     dff = dff[pd.to_numeric(dff["MES_NUM"], errors="coerce").between(1,12)]
-    dff = dff[pd.to_numeric(dff["ANO_NUM"], errors="coerce") >= 2022]
+    dff = dff[pd.to_numeric(dff["ANO_NUM"], errors="coerce") >= ANO_MINIMO]
 
     col_real = "CURVA_REALIZADO" if "CURVA_REALIZADO" in dff.columns else ("REALIZADO" if "REALIZADO" in dff.columns else None)
     has_ajs = "PROJETADO_AJUSTADO" in dff.columns
@@ -231,7 +290,7 @@ def _agregados_por_produto(df_upload: pd.DataFrame, cliente: str, categoria: str
     # Filtra por categoria e produto
     dff = dff[(dff["CAT_N"] == _norm_txt(categoria)) & (dff["PROD_N"] == _norm_txt(produto))]
     dff = dff[pd.to_numeric(dff["MES_NUM"], errors="coerce").between(1,12)]
-    dff = dff[pd.to_numeric(dff["ANO_NUM"], errors="coerce") >= 2022]
+    dff = dff[pd.to_numeric(dff["ANO_NUM"], errors="coerce") >= ANO_MINIMO]
     
     if dff.empty:
         return empty
@@ -0,0 +1,47 @@
+# frontend/services/backend_api.py
+import os
+from typing import Dict, Optional
+
+import requests
+
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:5000/api")
+
+
+def carregar_agregados_backend(cliente: str = "Todos", categoria: Optional[str] = None,
+                               produto: Optional[str] = None, ano: Optional[int] = None,
+                               agrupar: Optional[str] = None, ano_min: Optional[int] = None,
+                               realizados: bool = False, mascarar_zeros: bool = True,
+                               timeout: int = 10) -> Dict:
+    """
+    Curvas de 12 meses (ano e ano anterior) já agregadas no backend:
+      {"ano", "ano_anterior", "versao_dataset",
+       "curvas": {"ana","mer","ajs","rlzd","prev":{...}},
+       "grupos": {rotulo: curvas},      # só com agrupar=categoria|produto
+       "realizados": {"ano": [12]}}     # só com realizados=True
+    Com ano_min as células de anos anteriores são ignoradas.
+    """
+    params = {"cliente": cliente, "categoria": categoria, "produto": produto,
+              "ano": ano, "agrupar": agrupar, "ano_min": ano_min,
+              "realizados": 1 if realizados else None,
+              "mascarar_zeros": None if mascarar_zeros else 0}
+    resp = requests.get(
+        f"{API_BASE_URL}/data/agregados",
+        params={k: v for k, v in params.items() if v is not None},
+        timeout=timeout,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def enviar_planilha_backend(conteudo: bytes, nome: str = "dados.xlsx", timeout: int = 120) -> Dict:
+    """
+    Envia uma planilha para /data/upload (substitui o conjunto do backend)
+    e devolve o JSON da importação (metadata traz versao_dataset).
+    """
+    resp = requests.post(
+        f"{API_BASE_URL}/data/upload",
+        files={"arquivo": (nome, conteudo)},
+        timeout=timeout,
+    )
+    resp.raise_for_status()
+    return resp.json()